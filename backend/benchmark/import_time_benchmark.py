@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后端启动导入耗时分析
+在子进程中以 -X importtime 导入main，汇总累计耗时最长的模块，可选按启动预算检查
+
+运行方式（在backend目录下）:
+    python benchmark/import_time_benchmark.py
+    python benchmark/import_time_benchmark.py --top 30 --budget-ms 1500
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def profile_import(module: str):
+    """
+    在新的解释器中导入模块并收集导入耗时
+
+    Args:
+        module: 要导入的模块名
+
+    Returns:
+        (总耗时毫秒, [(模块名, 自身耗时毫秒, 累计耗时毫秒, 嵌套层级), ...])
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.join(BACKEND_DIR, "src"), env.get("PYTHONPATH")]))
+        # 导入main会创建结果存储和证据目录，指向临时目录避免改动工作空间
+        env.setdefault("RESULT_STORE_PATH", "")
+        env.setdefault("TRANSCRIPT_CACHE_PATH", "")
+        env.setdefault("EVIDENCE_DIR", os.path.join(temp_dir, "evidence"))
+        start_time = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+        )
+        total_ms = (time.perf_counter() - start_time) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{completed.stderr[-2000:]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return total_ms, entries
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="后端启动导入耗时分析")
+    parser.add_argument("--module", default="main", help="要导入的模块（默认main）")
+    parser.add_argument("--top", type=int, default=20, help="显示累计耗时最长的模块数")
+    parser.add_argument("--budget-ms", type=float, default=None, help="导入耗时预算，超出时返回非零退出码")
+    args = parser.parse_args()
+
+    total_ms, entries = profile_import(args.module)
+    import_ms = next((cumulative for name, _, cumulative, _ in entries if name == args.module), 0.0)
+    heavy = {"torch", "ultralytics", "dashscope", "pypinyin", "requests", "cv2", "numpy"}
+    loaded_heavy = sorted(name for name, _, _, _ in entries if name in heavy)
+
+    print(f"导入 {args.module}: {import_ms:.1f}ms，进程总耗时（含解释器启动）: {total_ms:.1f}ms")
+    print(f"已导入的重量级依赖: {', '.join(loaded_heavy) if loaded_heavy else '无'}")
+    print(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+    for name, self_ms, cumulative_ms, depth in sorted(entries, key=lambda entry: entry[2], reverse=True)[:args.top]:
+        print(f"{cumulative_ms:>10.1f} {self_ms:>10.1f}  {'  ' * depth}{name}")
+
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        print(f"导入耗时 {import_ms:.1f}ms 超出预算 {args.budget_ms:.1f}ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
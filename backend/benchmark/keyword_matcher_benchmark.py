@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+关键词匹配微基准
+对比逐个关键词re.finditer的原实现与Aho–Corasick自动机，
+关键词数量模拟不断增加的方言变体
+
+运行方式（在backend目录下）:
+    PYTHONPATH=src python benchmark/keyword_matcher_benchmark.py
+"""
+
+import re
+import timeit
+
+from camera_surveillance.keyword_detector import KeywordDetector, DetectionResult
+
+def legacy_detect(keyword_patterns, text):
+    """原实现：遍历所有操作类型和关键词，逐个执行未编译的正则匹配"""
+    results = []
+    for operation_type, patterns in keyword_patterns.items():
+        for pattern in patterns:
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                confidence = min(len(match.group()) / 20.0, 1.0)
+                results.append(DetectionResult(
+                    operation_type=operation_type,
+                    timestamp=0.0,
+                    confidence=confidence,
+                    text=match.group()
+                ))
+    return results
+
+def expand_patterns(keyword_patterns, variants):
+    """为每个关键词生成方言变体，模拟关键词表增长"""
+    prefixes = ["", "请", "现在", "马上", "已经", "开始", "准备", "完成", "再次", "继续"]
+    suffixes = ["", "了", "啦", "咯", "一下", "完毕", "好了", "操作", "作业", "到位"]
+    expanded = {}
+    for operation_type, keywords in keyword_patterns.items():
+        expanded[operation_type] = [
+            prefixes[i % len(prefixes)] + keyword + suffixes[(i // len(prefixes)) % len(suffixes)]
+            for keyword in keywords
+            for i in range(variants)
+        ]
+    return expanded
+
+def main():
+    """主函数"""
+    text = "调车作业开始，现在进行车号确认，铁鞋设置完成，手闸已拧紧，请注意安全，" * 4
+    detector = KeywordDetector()
+    base_patterns = detector.keyword_patterns
+    number = 2000
+
+    print(f"文本长度: {len(text)} 字")
+    print(f"{'关键词数':>8} {'原实现(微秒)':>14} {'自动机(微秒)':>14} {'加速比':>8}")
+    for variants in [1, 10, 50, 100]:
+        patterns = expand_patterns(base_patterns, variants)
+        detector.set_keyword_patterns(patterns)
+        count = sum(len(keywords) for keywords in patterns.values())
+
+        legacy = timeit.timeit(lambda: legacy_detect(patterns, text), number=number) / number * 1e6
+        automaton = timeit.timeit(lambda: detector.detect_keywords(text), number=number) / number * 1e6
+        print(f"{count:>8} {legacy:>14.1f} {automaton:>14.1f} {legacy / automaton:>7.1f}x")
+
+    # 拼音容错模糊匹配，用于流式中间结果时的单次耗时
+    fuzzy_detector = KeywordDetector(fuzzy=True)
+    fuzzy = timeit.timeit(lambda: fuzzy_detector.detect_keywords(text), number=200) / 200 * 1e6
+    print(f"模糊匹配（内置关键词）: {fuzzy:.1f} 微秒")
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,15 @@ import os
 import sys
 import time
 import asyncio
-import json
 import logging
-from typing import List
+import threading
+import subprocess
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
 from datetime import datetime
-from fastapi import FastAPI, WebSocket, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
@@ -36,16 +39,56 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
 
 from camera_surveillance.workspace import WorkspaceManager
-from camera_surveillance.video_processor import VideoStreamProcessor
-from camera_surveillance.processor import AudioTranscriber
-from camera_surveillance.processor import SpeechProcessor
-from camera_surveillance.keyword_detector import KeywordDetector, OperationType
+from camera_surveillance.video_processor import VideoStreamProcessor, IncrementalAudioExtractor
+from camera_surveillance.processor import AudioTranscriber, TranscriptCache
+from camera_surveillance.keyword_detector import (
+    KeywordDetector, StreamingKeywordDetector, DetectionHoldQueue, OperationType
+)
+from camera_surveillance.keyword_matcher import default_pinyin
+from camera_surveillance.transcript import TranscriptSegment
 from camera_surveillance.frame_extractor import FrameExtractor
-from camera_surveillance.processor.vehicle_recognizer import VehicleNumberRecognizer
-from camera_surveillance.processor.local_models import AntiRollingModel, RemoveRollingModel
+from camera_surveillance.frame_quality import FrameQualityScorer, detect_number_region
+from camera_surveillance.frame_preprocessor import FramePreprocessor
+from camera_surveillance.processor.vehicle_recognizer import VehicleNumberRecognizer, LocalOCRBackend
+from camera_surveillance.processor.local_models import (
+    AntiRollingModel, RemoveRollingModel, VotingPolicy, BaseModelInterface, DEPENDENCIES_AVAILABLE
+)
 from camera_surveillance.result_reporter import ResultReporter
+from camera_surveillance.result_store import ResultStore
+from camera_surveillance.evidence_frames import EvidenceFrameStore, parse_byte_range
+from camera_surveillance.serialization import negotiate_codec
+from camera_surveillance.frame_ack import FrameAcknowledger
+from camera_surveillance.session_manager import DeviceSessionManager, real_device_id
+from camera_surveillance.readiness import ReadinessTracker, ComponentUnavailable
+from camera_surveillance.metrics import (
+    REGISTRY, LIVE_MESSAGES_RECEIVED, LIVE_MESSAGES_DROPPED, FFMPEG_SECONDS,
+    FRAME_EXTRACTION_SECONDS, ASR_LATENCY_SECONDS
+)
 
-app = FastAPI(title="外勤作业智能分析系统", description="实时视频流处理和分析服务")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """服务生命周期：启动时在后台预热依赖和模型并定期清理过期结果，停止时关闭设备会话和共用的模型，写入剩余结果并关闭结果存储"""
+    warmup_task = None
+    if WARMUP_ON_STARTUP:
+        # 预热在后台进行，期间/health/live可以响应，/health/ready返回503
+        warmup_task = asyncio.create_task(warm_up_components())
+    else:
+        readiness.finished = True
+    retention_task = None
+    if RESULT_RETENTION_DAYS > 0:
+        retention_task = asyncio.create_task(prune_expired_results(RESULT_RETENTION_DAYS * 86400))
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if retention_task is not None:
+        retention_task.cancel()
+    await device_sessions.close_all()
+    for model in shared_models.values():
+        model.executor.shutdown(wait=False, cancel_futures=True)
+    if result_store is not None:
+        result_store.close()
+
+app = FastAPI(title="外勤作业智能分析系统", description="实时视频流处理和分析服务", lifespan=lifespan)
 
 # 添加CORS中间件
 app.add_middleware(
@@ -58,11 +101,76 @@ app.add_middleware(
 
 # 配置参数
 MAX_CONCURRENT_MODELS = int(os.getenv("MAX_CONCURRENT_MODELS", "5"))  # 最大并发模型调用数
+MAX_CONCURRENT_DETECTIONS = int(os.getenv("MAX_CONCURRENT_DETECTIONS", "4"))  # 每个任务同时处理的检测结果数
+ROLLING_REQUIRED_TRUE_FRAMES = int(os.getenv("ROLLING_REQUIRED_TRUE_FRAMES", "1"))  # 防遛/撤遛确认判定成功所需的成功帧数，1表示任一帧成功即可
+VEHICLE_RECOGNITION_MAX_CALLS = int(os.getenv("VEHICLE_RECOGNITION_MAX_CALLS", "2"))  # 每次车号确认最多调用远程识别的次数
+FRAME_REGION_DETECTION = os.getenv("FRAME_REGION_DETECTION", "0") == "1"  # 帧评分时是否启用车号区域检测
+VEHICLE_UPLOAD_CONFIG = os.getenv("VEHICLE_UPLOAD_CONFIG")  # 车号图像上传预处理配置文件（按设备配置裁剪区域和分辨率）
+LOCAL_OCR_MODEL = os.getenv("LOCAL_OCR_MODEL")  # 本地车号文字识别ONNX模型路径，未设置时只使用远程识别
+LOCAL_OCR_CHARSET = os.getenv("LOCAL_OCR_CHARSET")  # 本地文字识别模型字符表文件
+LOCAL_OCR_CONFIDENCE = float(os.getenv("LOCAL_OCR_CONFIDENCE", "0.85"))  # 本地识别置信度低于该值时调用远程识别
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", "workspace/transcript_cache.db")  # 转录缓存数据库路径，设为空字符串时禁用缓存
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "256"))  # 转录缓存大小上限（MB）
+ASR_CHUNK_SECONDS = float(os.getenv("ASR_CHUNK_SECONDS", "60"))  # 上传录音分块转录时每块的最大时长（秒），设为0时整段顺序转录
+ASR_MAX_CONCURRENT = int(os.getenv("ASR_MAX_CONCURRENT", "4"))  # 分块转录的最大并发识别数
+KEYWORD_TABLE_PATH = os.getenv("KEYWORD_TABLE_PATH")  # 关键词表JSON文件路径，修改后自动重新加载；未设置时使用内置关键词
+KEYWORD_FUZZY_MATCHING = os.getenv("KEYWORD_FUZZY_MATCHING", "0") == "1"  # 是否启用拼音容错的关键词模糊匹配
+KEYWORD_MERGE_WINDOW = float(os.getenv("KEYWORD_MERGE_WINDOW", "5"))  # 同一操作在该时间窗口（秒）内重复出现时只处理一次
+DETECTION_FRAMES_BEFORE = 2.0  # 检测结果提取关键词之前多少秒的帧
+DETECTION_FRAMES_AFTER = 4.0  # 检测结果提取关键词之后多少秒的帧，实时检测等这段音频提取完成后才处理
+RESULT_QUEUE_SIZE = int(os.getenv("RESULT_QUEUE_SIZE", "100"))  # 每个结果WebSocket连接的发送队列长度上限
+RESULT_SLOW_CONSUMER_POLICY = os.getenv("RESULT_SLOW_CONSUMER_POLICY", "drop")  # 发送队列满时的处理策略: drop/coalesce/disconnect
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "workspace/results.db")  # 结果存储数据库路径，设为空字符串时不保存结果
+RESULT_REPLAY_LIMIT = int(os.getenv("RESULT_REPLAY_LIMIT", "1000"))  # 结果WebSocket重连时最多重放的结果数
+RESULT_RETENTION_DAYS = float(os.getenv("RESULT_RETENTION_DAYS", "30"))  # 结果和证据帧的保留天数，设为0时不清理
+EVIDENCE_DIR = os.getenv("EVIDENCE_DIR", "workspace/evidence")  # 证据帧和缩略图缓存目录
+THUMBNAIL_CACHE_MAX_MB = int(os.getenv("THUMBNAIL_CACHE_MAX_MB", "64"))  # 缩略图缓存大小上限（MB）
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "320"))  # 默认缩略图宽度（像素）
+LIVE_ACK_MODE = os.getenv("LIVE_ACK_MODE", "frame")  # 实时视频帧确认模式: frame每帧确认/count每N帧确认/interval每T毫秒确认
+LIVE_ACK_EVERY_FRAMES = int(os.getenv("LIVE_ACK_EVERY_FRAMES", "10"))  # count模式下每多少帧确认一次
+LIVE_ACK_INTERVAL_MS = float(os.getenv("LIVE_ACK_INTERVAL_MS", "200"))  # interval模式的确认间隔，也是累计确认的最长等待时间（毫秒）
+LIVE_ACK_WINDOW = int(os.getenv("LIVE_ACK_WINDOW", "64"))  # 信用窗口：确认后客户端最多还可发送的帧数
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"  # 启动时是否预热依赖和模型，预热完成前/health/ready返回503
+DEVICE_SESSION_IDLE_TIMEOUT = float(os.getenv("DEVICE_SESSION_IDLE_TIMEOUT", "300"))  # 设备会话没有连接超过该时长（秒）后关闭，期间重连可恢复会话和录制
 
 # 全局变量
 workspace_manager = WorkspaceManager("workspace")
-result_reporter = ResultReporter()
+result_store = ResultStore(RESULT_STORE_PATH) if RESULT_STORE_PATH else None
+evidence_frame_store = EvidenceFrameStore(
+    EVIDENCE_DIR,
+    thumbnail_max_bytes=THUMBNAIL_CACHE_MAX_MB * 1024 * 1024,
+    thumbnail_width=THUMBNAIL_WIDTH
+)
+result_reporter = ResultReporter(
+    max_queue_size=RESULT_QUEUE_SIZE,
+    slow_consumer_policy=RESULT_SLOW_CONSUMER_POLICY,
+    store=result_store,
+    frame_store=evidence_frame_store
+)
+frame_quality_scorer = FrameQualityScorer(
+    region_detector=detect_number_region if FRAME_REGION_DETECTION else None
+)
+frame_preprocessor = (
+    FramePreprocessor.from_json_file(VEHICLE_UPLOAD_CONFIG) if VEHICLE_UPLOAD_CONFIG else FramePreprocessor()
+)
+local_ocr_backend = None
+if LOCAL_OCR_MODEL and LOCAL_OCR_CHARSET:
+    try:
+        local_ocr_backend = LocalOCRBackend.from_files(LOCAL_OCR_MODEL, LOCAL_OCR_CHARSET)
+    except Exception as e:
+        log_with_timestamp(f"加载本地文字识别模型失败，仅使用远程识别: {e}")
+transcript_cache = (
+    TranscriptCache(TRANSCRIPT_CACHE_PATH, max_bytes=TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
+    if TRANSCRIPT_CACHE_PATH else None
+)
 active_connections: List[WebSocket] = []
+# 实时视频连接处理的消息类型
+LIVE_MESSAGE_TYPES = ("video_frame", "recorded_video", "detection_video_chunk")
+readiness = ReadinessTracker()
+# 进程内共用的本地模型，由启动预热或第一个设备处理流水线加载，所有设备会话共用，服务停止时关闭
+shared_models: Dict[str, BaseModelInterface] = {}
+# 每个模型一把锁，同一模型只加载一次，不同模型可以同时加载
+shared_model_locks = {"anti_rolling_model": threading.Lock(), "remove_rolling_model": threading.Lock()}
 
 @app.get("/list-video-files")
 async def list_video_files():
@@ -96,23 +204,261 @@ async def list_video_files():
 
 @app.websocket("/ws/results")
 async def websocket_results(websocket: WebSocket):
-    """WebSocket端点，用于实时发送处理结果"""
+    """
+    WebSocket端点，用于实时发送处理结果
+    默认接收所有结果；可在连接地址中用device_ids、types参数（逗号分隔）指定订阅，
+    或发送 {"action": "subscribe", "device_ids": [...], "types": [...]} 更改订阅；
+    重连时用since参数传入收到的最后一条结果的seq，补发断开期间的结果；
+    连接地址中encoding=msgpack时结果以MessagePack二进制消息发送
+    """
     await websocket.accept()
+    codec = negotiate_codec(websocket.query_params.get("encoding"))
     active_connections.append(websocket)
-    result_reporter.add_websocket_connection(websocket)
+    result_reporter.add_websocket_connection(websocket, codec)
+    device_ids = websocket.query_params.get("device_ids")
+    result_types = websocket.query_params.get("types")
+    if device_ids or result_types:
+        result_reporter.subscribe(
+            websocket,
+            device_ids=[d for d in (device_ids or "").split(",") if d],
+            types=[t for t in (result_types or "").split(",") if t]
+        )
+    since = websocket.query_params.get("since")
+    if since:
+        try:
+            await result_reporter.replay(websocket, int(since), limit=RESULT_REPLAY_LIMIT)
+        except ValueError:
+            log_with_timestamp(f"无效的重放游标: {since}")
     
     try:
         while True:
             # 保持连接活跃
-            data = await websocket.receive_text()
-            # 可以处理来自前端的指令
-            await websocket.send_text(json.dumps({"status": "connected"}))
+            data = await receive_message(websocket)
+            # 可以处理来自前端的指令，回复与结果消息共用发送队列，避免并发写同一连接
+            try:
+                command = codec.decode(data)
+            except Exception:
+                command = None
+            if isinstance(command, dict) and command.get("action") == "subscribe":
+                result_reporter.subscribe(websocket, command.get("device_ids"), command.get("types"))
+                result_reporter.send_to_connection(websocket, {
+                    "status": "subscribed",
+                    "device_ids": command.get("device_ids") or [],
+                    "types": command.get("types") or []
+                })
+            else:
+                result_reporter.send_to_connection(websocket, {"status": "connected"})
     except Exception as e:
         log_with_timestamp(f"WebSocket连接错误: {e}")
     finally:
-        active_connections.remove(websocket)
+        if websocket in active_connections:
+            active_connections.remove(websocket)
         result_reporter.remove_websocket_connection(websocket)
 
+async def receive_message(websocket: WebSocket):
+    """
+    接收一条文本或二进制消息
+    
+    Returns:
+        文本消息返回字符串，二进制消息返回字节
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("text") is not None:
+        return message["text"]
+    return message.get("bytes")
+
+@app.get("/results")
+async def query_results(device_id: Optional[str] = None, type: Optional[str] = None,
+                        start_time: Optional[float] = None, end_time: Optional[float] = None,
+                        cursor: Optional[int] = None, limit: int = 100):
+    """
+    分页查询历史结果，按序号升序返回
+    
+    Args:
+        device_id: 设备ID，带时间戳后缀时按真实设备ID查询
+        type: 结果类型
+        start_time: 结果上报时间下限（Unix时间戳）
+        end_time: 结果上报时间上限（Unix时间戳）
+        cursor: 上一页返回的next_cursor
+        limit: 每页条数，最多1000
+    """
+    if result_store is None:
+        return {"results": [], "next_cursor": None}
+    limit = max(1, min(limit, 1000))
+    results, next_cursor = await asyncio.get_running_loop().run_in_executor(
+        None,
+        lambda: result_store.query(
+            device_id=real_device_id(device_id) if device_id else None,
+            result_type=type,
+            start_time=start_time,
+            end_time=end_time,
+            after_seq=cursor,
+            limit=limit
+        )
+    )
+    return {"results": results, "next_cursor": next_cursor}
+
+def evidence_file_response(request: Request, path: str, etag: str) -> Response:
+    """
+    返回证据帧或缩略图文件，支持ETag条件请求和单区间Range请求
+    帧ID由内容哈希得到，同一ID的内容不会变化，客户端可长期缓存
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes"
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    size = os.path.getsize(path)
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        return FileResponse(path, media_type="image/jpeg", headers=headers)
+    
+    start, end = byte_range
+    with open(path, "rb") as frame_file:
+        frame_file.seek(start)
+        content = frame_file.read(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(content=content, status_code=206, media_type="image/jpeg", headers=headers)
+
+@app.get("/frames/{frame_id}")
+async def get_evidence_frame(frame_id: str, request: Request):
+    """按帧ID获取原始证据帧"""
+    path = evidence_frame_store.frame_path(frame_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="证据帧不存在")
+    return evidence_file_response(request, path, f'"{frame_id}"')
+
+@app.get("/frames/{frame_id}/thumbnail")
+async def get_evidence_thumbnail(frame_id: str, request: Request, width: Optional[int] = None):
+    """
+    按帧ID获取缩略图，首次请求时生成并缓存
+    
+    Args:
+        width: 缩略图宽度（32~1280像素），默认THUMBNAIL_WIDTH
+    """
+    width = max(32, min(width or THUMBNAIL_WIDTH, 1280))
+    path = await asyncio.get_running_loop().run_in_executor(
+        None, evidence_frame_store.thumbnail_path, frame_id, width
+    )
+    if path is None:
+        raise HTTPException(status_code=404, detail="证据帧不存在")
+    return evidence_file_response(request, path, f'"{frame_id}-{width}"')
+
+def check_ffmpeg() -> str:
+    """
+    检查ffmpeg是否可用
+    
+    Returns:
+        ffmpeg版本信息
+    """
+    result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, timeout=10)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg返回码: {result.returncode}")
+    return result.stdout.splitlines()[0] if result.stdout else ""
+
+def import_dashscope():
+    """预先导入百炼SDK的语音识别和多模态对话模块，避免第一次识别时等待导入"""
+    from dashscope import MultiModalConversation
+    from dashscope.audio.asr import Recognition, RecognitionCallback
+
+def get_shared_model(name: str, model_class) -> BaseModelInterface:
+    """
+    获取进程内共用的本地模型，尚未加载时加载；加载模型较慢，应在线程池中调用
+    
+    Args:
+        name: 模型名称
+        model_class: 模型类
+        
+    Returns:
+        共用的模型
+    """
+    with shared_model_locks[name]:
+        model = shared_models.get(name)
+        if model is None:
+            model = shared_models[name] = model_class(max_concurrent=MAX_CONCURRENT_MODELS)
+        return model
+
+def load_model(name: str, model_class) -> BaseModelInterface:
+    """
+    加载共用的本地模型并用空白图像预热
+    
+    Args:
+        name: 模型名称
+        model_class: 模型类
+        
+    Returns:
+        已预热的模型
+    """
+    if not DEPENDENCIES_AVAILABLE:
+        raise ComponentUnavailable("依赖库不可用，模型无法加载")
+    model = get_shared_model(name, model_class)
+    model.warm_up()
+    return model
+
+async def preload_model(name: str, model_class):
+    """预热共用的模型"""
+    await readiness.warm_up(name, lambda: load_model(name, model_class))
+
+async def warm_up_components():
+    """并发预热依赖和模型，全部结束后更新就绪状态"""
+    for name in ("ffmpeg", "dashscope", "anti_rolling_model", "remove_rolling_model"):
+        readiness.register(name)
+    warmups = [
+        readiness.warm_up("ffmpeg", check_ffmpeg),
+        readiness.warm_up("dashscope", import_dashscope),
+        preload_model("anti_rolling_model", AntiRollingModel),
+        preload_model("remove_rolling_model", RemoveRollingModel)
+    ]
+    if KEYWORD_FUZZY_MATCHING:
+        # 拼音词典在第一次转换时加载
+        warmups.append(readiness.warm_up("pypinyin", lambda: default_pinyin("车号确认")))
+    await asyncio.gather(*warmups)
+    readiness.finished = True
+    log_with_timestamp(f"组件预热结束，服务{'已就绪' if readiness.ready else '未就绪'}")
+
+async def prune_expired_results(max_age: float, interval: float = 3600.0):
+    """
+    定期清理过期结果和证据帧，证据帧与结果使用相同的保留时长，保留的结果引用的帧不会被删除
+    
+    Args:
+        max_age: 保留时长（秒）
+        interval: 清理间隔（秒）
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            if result_store is not None:
+                await loop.run_in_executor(None, result_store.prune, max_age)
+            await loop.run_in_executor(None, evidence_frame_store.prune, max_age)
+        except Exception as e:
+            log_with_timestamp(f"清理过期结果时出错: {e}")
+        await asyncio.sleep(interval)
+
+@app.get("/metrics")
+async def metrics():
+    """各处理阶段的计数器和耗时直方图，Prometheus文本格式"""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/health/live")
+async def health_live():
+    """存活检查：进程能够响应请求即返回200"""
+    return {"status": "alive", "uptime_seconds": round(time.time() - readiness.started_at, 1)}
+
+@app.get("/health/ready")
+async def health_ready():
+    """就绪检查：组件预热结束且没有失败的组件时返回200，否则返回503；附各组件状态和预热耗时"""
+    snapshot = readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
 @app.post("/video-stream/{device_id}")
 async def receive_video_stream(device_id: str):
     """接收视频流的端点"""
@@ -137,7 +483,7 @@ async def receive_video_stream(device_id: str):
 async def process_video_stream(device_id: str, request: Request):
     """处理视频流的端点 - 接收实时视频数据流"""
     # 从设备ID中提取原始ID（因为可能包含时间戳）
-    original_device_id = device_id.split('_')[0] if '_' in device_id else device_id
+    original_device_id = real_device_id(device_id)
     
     # 从请求体中读取视频流数据
     video_stream_data = await request.body()
@@ -151,33 +497,156 @@ async def process_video_stream(device_id: str, request: Request):
         "original_device_id": original_device_id
     }
 
+class DevicePipeline:
+    """
+    设备处理流水线，由设备会话管理器按设备创建，同一设备的实时视频连接和视频处理任务共用识别模块和模型；
+    实时视频的录制、流式识别会话和检测任务在第一个实时连接时启动，客户端断线重连后继续使用
+    """
+    
+    def __init__(self, device_id: str):
+        """
+        初始化设备处理流水线，加载识别模块和模型
+        
+        Args:
+            device_id: 设备ID
+        """
+        self.device_id = device_id
+        self.audio_transcriber = AudioTranscriber(transcript_cache=transcript_cache)
+        self.keyword_detector = KeywordDetector(keyword_table_path=KEYWORD_TABLE_PATH, fuzzy=KEYWORD_FUZZY_MATCHING)
+        self.vehicle_recognizer = VehicleNumberRecognizer(
+            preprocessor=frame_preprocessor,
+            local_backend=local_ocr_backend,
+            confidence_threshold=LOCAL_OCR_CONFIDENCE
+        )
+        # 模型为进程内共用，启动时已预热的直接使用，并发推理数由MAX_CONCURRENT_MODELS在所有设备间共同限制
+        self.anti_rolling_model = get_shared_model("anti_rolling_model", AntiRollingModel)
+        self.remove_rolling_model = get_shared_model("remove_rolling_model", RemoveRollingModel)
+        
+        # 实时视频状态，由start_live创建
+        self.workspace_path: Optional[str] = None
+        self.video_processor: Optional[VideoStreamProcessor] = None
+        self.video_path: Optional[str] = None
+        self.sentence_queue: Optional[asyncio.Queue] = None
+        self.asr_session = None
+        self.sentence_task: Optional[asyncio.Task] = None
+        # 已送入识别会话的媒体块: [(流内起始时间, 视频路径), ...]
+        self.media_chunks = []
+        # 正在处理的检测任务，关闭流水线时等待其完成
+        self.detection_tasks = set()
+    
+    def start_live(self):
+        """启动实时视频的工作空间、录制、流式识别会话和识别结果消费任务，已启动时不重复启动"""
+        if self.sentence_task is not None:
+            return
+        self.workspace_path = workspace_manager.create_workspace(self.device_id)
+        log_with_timestamp(f"为设备 {self.device_id} 创建工作空间: {self.workspace_path}")
+        self.video_processor = VideoStreamProcessor(self.workspace_path)
+        self.video_path = self.video_processor.start_video_recording()
+        log_with_timestamp(f"开始录制视频到: {self.video_path}")
+        
+        # 每个设备一个长连接流式识别会话，识别结果从回调线程投递到事件循环；
+        # 会话与设备会话一样长期存在，句子只经回调处理，不在会话中保存
+        loop = asyncio.get_running_loop()
+        sentence_queue: asyncio.Queue = asyncio.Queue()
+        self.sentence_queue = sentence_queue
+        self.asr_session = self.audio_transcriber.create_stream_session(
+            on_sentence=lambda segment: loop.call_soon_threadsafe(sentence_queue.put_nowait, segment),
+            emit_partial=True,
+            keep_segments=False
+        )
+        self.sentence_task = asyncio.create_task(consume_live_sentences(
+            self.device_id,
+            sentence_queue,
+            StreamingKeywordDetector(self.keyword_detector, merge_window=KEYWORD_MERGE_WINDOW),
+            self.media_chunks,
+            lambda: self.asr_session.fed_duration,
+            self.detection_tasks,
+            self.vehicle_recognizer,
+            self.anti_rolling_model,
+            self.remove_rolling_model
+        ))
+    
+    async def pause_live(self):
+        """没有实时连接时停止识别器并处理完已识别的结果，重连后送入音频时识别器自动重新启动，流内时间保持连续"""
+        if self.asr_session is None:
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self.asr_session.stop)
+        # 音频不会再增加，等待中的检测结果用已有的帧处理
+        self.sentence_queue.put_nowait(None)
+        await self.sentence_queue.join()
+    
+    async def close(self):
+        """停止流式识别会话，等待剩余识别结果和检测任务处理完成后释放资源"""
+        if self.sentence_task is not None:
+            await self.pause_live()
+            self.sentence_task.cancel()
+        if self.detection_tasks:
+            await asyncio.gather(*self.detection_tasks, return_exceptions=True)
+        if self.video_processor is not None:
+            self.video_processor.stop_processing()
+        # 共用的模型由其他设备会话继续使用，服务停止时才关闭
+        log_with_timestamp(f"设备 {self.device_id} 的处理流水线已关闭")
+
+async def create_device_pipeline(device_id: str) -> DevicePipeline:
+    """在线程池中创建设备处理流水线，加载模型时不阻塞事件循环"""
+    return await asyncio.get_running_loop().run_in_executor(None, DevicePipeline, device_id)
+
+device_sessions = DeviceSessionManager(
+    create_device_pipeline,
+    DevicePipeline.close,
+    idle_timeout=DEVICE_SESSION_IDLE_TIMEOUT
+)
+
 @app.websocket("/ws/live-video/{device_id}")
 async def websocket_live_video(websocket: WebSocket, device_id: str):
-    """WebSocket端点，用于接收实时视频帧并处理"""
+    """
+    WebSocket端点，用于接收实时视频帧并处理
+    连接地址中encoding=msgpack时确认消息以MessagePack二进制消息发送，客户端也可发送MessagePack二进制消息；
+    ack、ack_every、ack_interval_ms参数可覆盖默认的帧确认模式，消息中带seq时确认返回已处理的最大seq和信用上限credit；
+    断线后在DEVICE_SESSION_IDLE_TIMEOUT内以相同设备ID重连时恢复原来的录制和流式识别会话
+    """
     await websocket.accept()
-    log_with_timestamp(f"实时视频WebSocket连接已建立，设备ID: {device_id}")
-    
-    # 创建工作空间
-    workspace_path = workspace_manager.create_workspace(device_id)
-    log_with_timestamp(f"为设备 {device_id} 创建工作空间: {workspace_path}")
-    
-    # 初始化处理模块
-    video_processor = VideoStreamProcessor(workspace_path)
-    audio_transcriber = AudioTranscriber()
-    keyword_detector = KeywordDetector()
-    vehicle_recognizer = VehicleNumberRecognizer()
-    anti_rolling_model = AntiRollingModel(max_concurrent=MAX_CONCURRENT_MODELS)
-    remove_rolling_model = RemoveRollingModel(max_concurrent=MAX_CONCURRENT_MODELS)
+    codec = negotiate_codec(websocket.query_params.get("encoding"))
+    try:
+        acknowledger = FrameAcknowledger(
+            lambda message: codec.send(websocket, message),
+            mode=websocket.query_params.get("ack", LIVE_ACK_MODE),
+            every_frames=int(websocket.query_params.get("ack_every", LIVE_ACK_EVERY_FRAMES)),
+            interval_ms=float(websocket.query_params.get("ack_interval_ms", LIVE_ACK_INTERVAL_MS)),
+            window=LIVE_ACK_WINDOW
+        )
+    except ValueError as e:
+        log_with_timestamp(f"帧确认参数无效，使用每帧确认: {e}")
+        acknowledger = FrameAcknowledger(lambda message: codec.send(websocket, message), window=LIVE_ACK_WINDOW)
+    log_with_timestamp(f"实时视频WebSocket连接已建立，设备ID: {device_id}，消息编码: {codec.name}")
     
-    # 开始视频录制
-    video_path = video_processor.start_video_recording()
-    log_with_timestamp(f"开始录制视频到: {video_path}")
+    loop = asyncio.get_running_loop()
+    # 客户端每次连接的设备ID带有新的时间戳，会话和指标标签使用真实设备ID，避免每次连接产生新的会话和时间序列
+    device_label = real_device_id(device_id)
+    session = None
+    # 本连接检测视频的增量音频提取器，收到第一个数据块时创建；重连后客户端发送新的媒体流，对应新的媒体块
+    audio_extractor = None
     
     try:
+        # 同一设备的连接共用设备会话中的处理流水线，断线重连后继续原来的录制和流式识别会话
+        session = await device_sessions.acquire(device_label)
+        pipeline: DevicePipeline = session.pipeline
+        pipeline.start_live()
+        workspace_path = pipeline.workspace_path
+        video_processor = pipeline.video_processor
+        vehicle_recognizer = pipeline.vehicle_recognizer
+        asr_session = pipeline.asr_session
+        acknowledger.start()
+        
         while True:
             # 接收来自前端的数据
-            data = await websocket.receive_text()
-            frame_data = json.loads(data)
+            frame_data = codec.decode(await receive_message(websocket))
+            message_type = frame_data.get("type")
+            if message_type not in LIVE_MESSAGE_TYPES:
+                # 未知类型不处理，标签只使用已知类型，避免客户端数据产生过多时间序列
+                message_type = "other"
+                LIVE_MESSAGES_DROPPED.inc(device_id=device_label, reason="unknown_type")
+            LIVE_MESSAGES_RECEIVED.inc(device_id=device_label, type=message_type)
             
             if frame_data["type"] == "video_frame":
                 # 处理实时视频帧
@@ -207,42 +676,14 @@ async def websocket_live_video(websocket: WebSocket, device_id: str):
                     # 定期处理视频片段
                     current_time = time.time()
                     if current_time % 5 < 0.1:  # 每5秒处理一次
-                        # 提取音频（如果有的话）
-                        audio_path = os.path.join(workspace_path, "extracted_audio.wav")
-                        
-                        # 检查是否有音频数据可处理
-                        if os.path.exists(audio_path) and os.path.getsize(audio_path) > 0:
-                            # 转录音频
-                            speech_processor = SpeechProcessor()
-                            transcriptions = speech_processor.transcribe_file(audio_path)
-                            
-                            # 如果没有转录结果，使用模拟数据
-                            if not transcriptions:
-                                transcriptions = [
-                                    (current_time % 100, "现在进行车号确认操作"),
-                                    (current_time % 100 + 15, "铁鞋设置手闸拧紧"),
-                                    (current_time % 100 + 30, "铁鞋撤除手闸松开")
-                                ]
-                            
-                            # 检测关键词
-                            detections = keyword_detector.detect_keywords_with_context(transcriptions)
-                            
-                            # 处理每个检测到的操作
-                            for detection in detections:
-                                await process_detection(
-                                    device_id, 
-                                    detection, 
-                                    video_path, 
-                                    vehicle_recognizer, 
-                                    anti_rolling_model, 
-                                    remove_rolling_model
-                                )
-                        
+                        # 语音由流式识别会话持续处理，这里只对当前帧进行图像识别
                         # 也可以直接对当前帧进行图像识别
                         # 尝试识别车辆编号
-                        vehicle_number = vehicle_recognizer.recognize_vehicle_number(temp_image_path)
+                        vehicle_number = vehicle_recognizer.recognize_vehicle_number(temp_image_path, device_id=device_id)
                         if vehicle_number:
-                            result = result_reporter.create_vehicle_number_result(
+                            # 登记证据帧需要计算哈希并复制文件，在线程池中执行
+                            result = await loop.run_in_executor(
+                                None, result_reporter.create_vehicle_number_result,
                                 device_id, vehicle_number, [temp_image_path], current_time
                             )
                             await result_reporter.report_result(result)
@@ -288,7 +729,8 @@ async def websocket_live_video(websocket: WebSocket, device_id: str):
                                 output_video_path,
                                 '-y'
                             ]
-                            result = subprocess.run(cmd, capture_output=True, text=True)
+                            with FFMPEG_SECONDS.time(operation="recorded_video"):
+                                result = subprocess.run(cmd, capture_output=True, text=True)
                             
                             if result.returncode != 0:
                                 # 如果ffmpeg失败，回退到直接复制文件
@@ -309,103 +751,40 @@ async def websocket_live_video(websocket: WebSocket, device_id: str):
                             os.unlink(temp_video_path)
                         except:
                             pass
+                else:
+                    LIVE_MESSAGES_DROPPED.inc(device_id=device_label, reason="invalid_data")
             elif frame_data["type"] == "detection_video_chunk":
                 # 处理实时视频检测的数据块
                 video_data_url = frame_data["data"]
                 
                 # 解析base64数据
                 import base64
-                import tempfile
                 
                 # 移除data URL前缀
                 if "," in video_data_url:
                     header, encoded = video_data_url.split(",", 1)
                     video_bytes = base64.b64decode(encoded)
                     
-                    # 创建临时视频文件
-                    with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_file:
-                        temp_file.write(video_bytes)
-                        temp_video_path = temp_file.name
-                    
+                    # 数据块按顺序追加到同一个会话视频文件，只提取新到达部分的音频送入流式识别会话，
+                    # 关键词检测由识别结果回调驱动
                     try:
-                        # 将数据块添加到视频中
-                        output_video_path = os.path.join(workspace_path, f"detection_video_{int(time.time())}.webm")
-                        
-                        # 如果系统有ffmpeg，尝试转换格式以确保兼容性
-                        try:
-                            import subprocess
-                            # 尝试将webm转换为mp4
-                            output_video_path = os.path.join(workspace_path, f"detection_video_{int(time.time())}.mp4")
-                            cmd = [
-                                'ffmpeg',
-                                '-i', temp_video_path,
-                                '-c:v', 'libx264',
-                                '-c:a', 'aac',
-                                output_video_path,
-                                '-y'
-                            ]
-                            result = subprocess.run(cmd, capture_output=True, text=True)
-                            
-                            if result.returncode != 0:
-                                # 如果ffmpeg失败，回退到直接复制文件
-                                import shutil
-                                output_video_path = os.path.join(workspace_path, f"detection_video_{int(time.time())}.webm")
-                                shutil.copy2(temp_video_path, output_video_path)
-                        except:
-                            # 如果ffmpeg不可用，直接复制webm文件
-                            import shutil
-                            output_video_path = os.path.join(workspace_path, f"detection_video_{int(time.time())}.webm")
-                            shutil.copy2(temp_video_path, output_video_path)
-                        
-                        log_with_timestamp(f"检测视频块已保存到: {output_video_path}")
-                        
-                        # 对视频进行处理和分析
-                        try:
-                            # 提取音频用于转录
-                            audio_path = os.path.join(workspace_path, "detection_extracted_audio.wav")
-                            video_processor.extract_audio_from_video(output_video_path, audio_path)
-                            
-                            # 转录音频
-                            speech_processor = SpeechProcessor()
-                            transcriptions = speech_processor.transcribe_file(audio_path)
-                            
-                            # 如果没有转录结果，使用模拟数据
-                            if not transcriptions:
-                                transcriptions = [
-                                    (time.time() % 100, "现在进行车号确认操作"),
-                                    (time.time() % 100 + 15, "铁鞋设置手闸拧紧"),
-                                    (time.time() % 100 + 30, "铁鞋撤除手闸松开")
-                                ]
-                            
-                            # 检测关键词
-                            detections = keyword_detector.detect_keywords_with_context(transcriptions)
-                            
-                            # 处理每个检测到的操作
-                            for detection in detections:
-                                await process_detection(
-                                    device_id, 
-                                    detection, 
-                                    output_video_path, 
-                                    vehicle_recognizer, 
-                                    anti_rolling_model, 
-                                    remove_rolling_model
-                                )
-                        
-                        except Exception as e:
-                            log_with_timestamp(f"处理检测视频时出错: {e}")
-                        
-                    finally:
-                        # 清理临时文件
-                        try:
-                            os.unlink(temp_video_path)
-                        except:
-                            pass
+                        if audio_extractor is None:
+                            session_video_path = os.path.join(workspace_path, f"detection_video_{int(time.time())}.webm")
+                            audio_extractor = IncrementalAudioExtractor(
+                                session_video_path, asr_session.feed, sample_rate=pipeline.audio_transcriber.sample_rate
+                            )
+                            # 会话视频的时间零点对应识别会话的当前位置
+                            pipeline.media_chunks.append((asr_session.fed_duration, session_video_path))
+                            log_with_timestamp(f"检测视频保存到: {session_video_path}")
+                        await loop.run_in_executor(None, audio_extractor.append, video_bytes)
+                    except Exception as e:
+                        log_with_timestamp(f"处理检测视频时出错: {e}")
+                        LIVE_MESSAGES_DROPPED.inc(device_id=device_label, reason="audio_extraction_error")
+                else:
+                    LIVE_MESSAGES_DROPPED.inc(device_id=device_label, reason="invalid_data")
             
-            # 发送确认消息
-            await websocket.send_text(json.dumps({
-                "status": "frame_processed",
-                "timestamp": frame_data.get("timestamp", time.time())
-            }))
+            # 按确认模式发送确认消息
+            await acknowledger.frame_processed(frame_data.get("seq"), frame_data.get("timestamp", time.time()))
             
     except Exception as e:
         log_with_timestamp(f"处理设备 {device_id} 的实时视频流时出错: {e}")
@@ -418,12 +797,97 @@ async def websocket_live_video(websocket: WebSocket, device_id: str):
         }
         await result_reporter.report_result(error_result)
     finally:
-        # 停止视频处理并释放资源
-        video_processor.stop_processing()
+        await acknowledger.stop()
+        # 提取完本连接剩余的音频；录制、识别会话和检测任务保留在设备会话中，会话空闲超时后才关闭
+        if audio_extractor is not None:
+            await loop.run_in_executor(None, audio_extractor.close)
+        if session is not None:
+            try:
+                if session.connections == 1:
+                    await session.pipeline.pause_live()
+            finally:
+                device_sessions.release(session)
         log_with_timestamp(f"实时视频WebSocket连接已关闭，设备ID: {device_id}")
 
+def locate_media_chunk(media_chunks, stream_time: float):
+    """
+    根据流内时间查找对应的媒体块
+    
+    Args:
+        media_chunks: [(流内起始时间, 视频路径), ...]，按时间顺序排列
+        stream_time: 流内时间
+        
+    Returns:
+        (媒体块起始时间, 视频路径)，未找到时返回None
+    """
+    located = None
+    for chunk_offset, chunk_path in media_chunks:
+        if chunk_offset > stream_time:
+            break
+        located = (chunk_offset, chunk_path)
+    return located
+
+async def consume_live_sentences(device_id: str, sentence_queue: asyncio.Queue,
+                                 keyword_detector: StreamingKeywordDetector, media_chunks,
+                                 media_watermark: Callable[[], float],
+                                 detection_tasks: set,
+                                 vehicle_recognizer: VehicleNumberRecognizer,
+                                 anti_rolling_model: AntiRollingModel,
+                                 remove_rolling_model: RemoveRollingModel,
+                                 poll_interval: float = 0.5):
+    """
+    消费流式识别会话输出的中间结果和句子，检测关键词并处理检测到的操作
+    检测结果等到关键词之后DETECTION_FRAMES_AFTER秒的音频提取完成（media_watermark越过该位置）才处理，
+    队列中的None表示音频不会再增加，等待中的检测结果立即处理；
+    检测结果在后台任务中并发处理，不阻塞后续识别结果的消费，正在处理的任务记录在detection_tasks中
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DETECTIONS)
+    hold_queue = DetectionHoldQueue(after_seconds=DETECTION_FRAMES_AFTER)
+    
+    def dispatch(detections):
+        for detection in detections:
+            located = locate_media_chunk(media_chunks, detection.timestamp)
+            if located is None:
+                log_with_timestamp(f"未找到时间 {detection.timestamp:.2f}s 对应的媒体块")
+                continue
+            # 流内时间换算为媒体块内时间
+            chunk_offset, chunk_path = located
+            detection.shift(chunk_offset)
+            # 会话视频仍在追加写入，每个检测单独打开视频才能读到最新的帧
+            task = asyncio.create_task(process_detection_limited(
+                semaphore,
+                device_id,
+                detection,
+                chunk_path,
+                vehicle_recognizer,
+                anti_rolling_model,
+                remove_rolling_model
+            ))
+            detection_tasks.add(task)
+            task.add_done_callback(detection_tasks.discard)
+    
+    while True:
+        try:
+            # 没有新的识别结果时也定期检查水位线
+            segment = await asyncio.wait_for(sentence_queue.get(), timeout=poll_interval)
+        except asyncio.TimeoutError:
+            dispatch(hold_queue.release(media_watermark()))
+            continue
+        try:
+            if segment is None:
+                dispatch(hold_queue.flush())
+            else:
+                # 中间结果中出现关键词即可检测，合并窗口内的重复检测被抑制
+                hold_queue.add(segment, keyword_detector.process(segment))
+                dispatch(hold_queue.release(media_watermark()))
+        except Exception as e:
+            log_with_timestamp(f"处理流式识别结果时出错: {e}")
+        finally:
+            sentence_queue.task_done()
+
 async def process_video_task(device_id: str, video_stream_data: bytes):
     """异步处理视频流任务 - 接收实时视频数据流"""
+    session = None
     try:
         # 使用已存在的工作空间路径，而不是重新创建
         # 首先尝试找到与设备ID对应的工作空间
@@ -436,13 +900,15 @@ async def process_video_task(device_id: str, video_stream_data: bytes):
         else:
             log_with_timestamp(f"使用现有工作空间: {workspace_path}")
         
-        # 2. 初始化各个处理模块（带并发配置）
+        # 2. 识别模块和模型使用设备会话中的处理流水线，视频处理器每个任务单独创建
+        session = await device_sessions.acquire(real_device_id(device_id))
+        pipeline: DevicePipeline = session.pipeline
+        audio_transcriber = pipeline.audio_transcriber
+        keyword_detector = pipeline.keyword_detector
+        vehicle_recognizer = pipeline.vehicle_recognizer
+        anti_rolling_model = pipeline.anti_rolling_model
+        remove_rolling_model = pipeline.remove_rolling_model
         video_processor = VideoStreamProcessor(workspace_path)
-        audio_transcriber = AudioTranscriber()
-        keyword_detector = KeywordDetector()
-        vehicle_recognizer = VehicleNumberRecognizer()
-        anti_rolling_model = AntiRollingModel(max_concurrent=MAX_CONCURRENT_MODELS)
-        remove_rolling_model = RemoveRollingModel(max_concurrent=MAX_CONCURRENT_MODELS)
         
         # 3. 开始视频录制
         video_path = video_processor.start_video_recording()
@@ -451,34 +917,39 @@ async def process_video_task(device_id: str, video_stream_data: bytes):
         # 4. 处理视频流数据 - 将字节数据传递给视频处理器
         video_processor.process_video_stream_from_bytes(video_stream_data, video_path)
         
-        # 5. 提取音频
-        audio_path = os.path.join(workspace_path, "extracted_audio.wav")
-        video_processor.extract_audio_from_video(video_path, audio_path)
-        
-        # 6. 转录音频 - 使用SpeechProcessor
-        speech_processor = SpeechProcessor()
-        transcriptions = speech_processor.transcribe_file(audio_path)
+        # 5~6. 提取16kHz单声道PCM，在语音停顿处分块并发转录
+        with ASR_LATENCY_SECONDS.time(mode="file"):
+            transcriptions = await asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: audio_transcriber.transcribe_media_file(
+                    video_path,
+                    max_chunk_seconds=ASR_CHUNK_SECONDS or None,
+                    max_concurrent=ASR_MAX_CONCURRENT
+                )
+            )
         # 如果没有转录结果，使用模拟数据
         if not transcriptions:
             transcriptions = [
-                (10.5, "现在进行车号确认操作"),
-                (25.2, "铁鞋设置手闸拧紧"),
-                (42.8, "铁鞋撤除手闸松开")
+                TranscriptSegment(8.5, 10.5, "现在进行车号确认操作"),
+                TranscriptSegment(23.2, 25.2, "铁鞋设置手闸拧紧"),
+                TranscriptSegment(40.8, 42.8, "铁鞋撤除手闸松开")
             ]
         
-        # 7. 检测关键词
-        detections = keyword_detector.detect_keywords_with_context(transcriptions)
+        # 7. 检测关键词，同一句中同一操作的多个关键词和短时间内的重复指令只处理一次
+        streaming_detector = StreamingKeywordDetector(keyword_detector, merge_window=KEYWORD_MERGE_WINDOW)
+        detections = []
+        for segment in sorted(transcriptions, key=lambda segment: segment.begin):
+            detections.extend(streaming_detector.process(segment))
         
-        # 8. 处理每个检测到的操作
-        for detection in detections:
-            await process_detection(
-                device_id, 
-                detection, 
-                video_path, 
-                vehicle_recognizer, 
-                anti_rolling_model, 
-                remove_rolling_model
-            )
+        # 8. 并发处理检测到的操作，每个操作处理完成后立即上报结果
+        await process_detections_concurrently(
+            device_id,
+            detections,
+            video_path,
+            vehicle_recognizer,
+            anti_rolling_model,
+            remove_rolling_model
+        )
         
         log_with_timestamp(f"设备 {device_id} 的视频处理完成")
         
@@ -492,25 +963,86 @@ async def process_video_task(device_id: str, video_stream_data: bytes):
             "timestamp": time.time()
         }
         await result_reporter.report_result(error_result)
+    finally:
+        if session is not None:
+            device_sessions.release(session)
 
-async def process_detection(device_id: str, detection, video_path: str,
-                          vehicle_recognizer: VehicleNumberRecognizer,
-                          anti_rolling_model: AntiRollingModel,
-                          remove_rolling_model: RemoveRollingModel):
-    """处理单个检测结果"""
+async def process_detections_concurrently(device_id: str, detections, video_path: str,
+                                         vehicle_recognizer: VehicleNumberRecognizer,
+                                         anti_rolling_model: AntiRollingModel,
+                                         remove_rolling_model: RemoveRollingModel):
+    """
+    并发处理同一视频的多个检测结果
+    同时处理的检测数不超过MAX_CONCURRENT_DETECTIONS，所有检测共用一个帧提取器，
+    每个检测处理完成后立即上报结果，总耗时接近最慢的单个检测
+    """
+    if not detections:
+        return
+    frame_extractor = FrameExtractor(video_path)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DETECTIONS)
     try:
-        # 1. 提取相关帧（根据操作类型使用不同的时间点逻辑）
-        frame_extractor = FrameExtractor(video_path)
-        
-        # TODO: 这里需要根据实际的音频片段时间来提取帧
-        # 目前我们假设detection.timestamp就是音频片段的结束时间
-        frame_paths = frame_extractor.extract_frames_around_timestamp(
+        await asyncio.gather(*[
+            process_detection_limited(
+                semaphore,
+                device_id,
+                detection,
+                video_path,
+                vehicle_recognizer,
+                anti_rolling_model,
+                remove_rolling_model,
+                frame_extractor=frame_extractor
+            )
+            for detection in detections
+        ])
+    finally:
+        frame_extractor.release()
+
+async def process_detection_limited(semaphore: asyncio.Semaphore, *args, **kwargs):
+    """在并发数限制内处理单个检测结果"""
+    async with semaphore:
+        await process_detection(*args, **kwargs)
+
+def extract_detection_frames(frame_extractor: FrameExtractor, detection):
+    """提取检测结果相关的帧"""
+    with FRAME_EXTRACTION_SECONDS.time(operation=detection.operation_type.name.lower()):
+        # 有关键词所在音频片段的媒体时间范围时，按片段提取帧
+        if detection.segment_start is not None and detection.segment_end is not None:
+            return frame_extractor.extract_frames_for_audio_segment(
+                detection.segment_start,
+                detection.segment_end,
+                before_seconds=DETECTION_FRAMES_BEFORE,
+                after_seconds=DETECTION_FRAMES_AFTER,
+                interval_seconds=1.0
+            )
+        return frame_extractor.extract_frames_around_timestamp(
             detection.timestamp,
-            before_seconds=2.0,
-            after_seconds=4.0,
+            before_seconds=DETECTION_FRAMES_BEFORE,
+            after_seconds=DETECTION_FRAMES_AFTER,
             interval_seconds=1.0
         )
-        frame_extractor.release()
+
+async def process_detection(device_id: str, detection, video_path: str,
+                          vehicle_recognizer: VehicleNumberRecognizer,
+                          anti_rolling_model: AntiRollingModel,
+                          remove_rolling_model: RemoveRollingModel,
+                          frame_extractor: Optional[FrameExtractor] = None):
+    """
+    处理单个检测结果
+    
+    Args:
+        frame_extractor: 共用的帧提取器，为None时为该检测单独打开视频
+    """
+    try:
+        # 1. 在线程池中提取相关帧，不阻塞事件循环
+        loop = asyncio.get_running_loop()
+        if frame_extractor is not None:
+            frame_paths = await loop.run_in_executor(None, extract_detection_frames, frame_extractor, detection)
+        else:
+            own_extractor = FrameExtractor(video_path)
+            try:
+                frame_paths = await loop.run_in_executor(None, extract_detection_frames, own_extractor, detection)
+            finally:
+                own_extractor.release()
         
         # 2. 根据操作类型处理
         if detection.operation_type == OperationType.VEHICLE_NUMBER:
@@ -534,20 +1066,48 @@ async def process_vehicle_number(device_id: str, detection, frame_paths,
     """处理车号确认操作"""
     log_with_timestamp(f"处理车号确认操作: {detection.text}")
     
-    # 尝试识别车辆编号
+    # 本地按清晰度、曝光和运动模糊对候选帧排序，从质量最好的帧开始识别
+    # 评分和识别调用在线程池中执行，不阻塞同时处理的其他检测
+    loop = asyncio.get_running_loop()
+    ranked_frames = await loop.run_in_executor(None, frame_quality_scorer.rank_frames, frame_paths)
+    
+    # 尝试识别车辆编号：本地识别优先，远程调用次数受预算限制
     vehicle_number = None
-    for timestamp, frame_path in frame_paths:
-        vehicle_number = vehicle_recognizer.recognize_vehicle_number(frame_path)
+    remote_calls = 0
+    for quality in ranked_frames:
+        allow_remote = remote_calls < VEHICLE_RECOGNITION_MAX_CALLS
+        if not allow_remote and vehicle_recognizer.local_backend is None:
+            log_with_timestamp(f"已达到车号识别调用上限 {VEHICLE_RECOGNITION_MAX_CALLS} 次，停止识别")
+            break
+        if not quality.readable:
+            continue
+        log_with_timestamp(
+            f"识别帧 {quality.frame_path}，评分: {quality.score:.3f}，清晰度: {quality.sharpness:.1f}"
+        )
+        vehicle_number, attempts = await loop.run_in_executor(
+            None,
+            lambda: vehicle_recognizer.recognize_with_attempts(
+                quality.frame_path, device_id=device_id, region=quality.region, allow_remote=allow_remote
+            )
+        )
+        remote_calls += sum(1 for attempt in attempts if attempt.remote)
         if vehicle_number:
+            answered_by = next(attempt.backend for attempt in attempts if attempt.accepted)
+            log_with_timestamp(f"车号由 {answered_by} 识别: {vehicle_number}")
             break
+    log_with_timestamp(
+        f"车号确认共调用远程识别 {remote_calls} 次，累计上传 {vehicle_recognizer.total_uploaded_bytes} 字节"
+    )
     
-    # 创建结果报告
+    # 创建结果报告，登记证据帧需要计算哈希并复制文件，在线程池中执行
     if vehicle_number:
-        result = result_reporter.create_vehicle_number_result(
+        result = await loop.run_in_executor(
+            None, result_reporter.create_vehicle_number_result,
             device_id, vehicle_number, [fp for _, fp in frame_paths], detection.timestamp
         )
     else:
-        result = result_reporter.create_vehicle_number_failure(
+        result = await loop.run_in_executor(
+            None, result_reporter.create_vehicle_number_failure,
             device_id, [fp for _, fp in frame_paths], detection.timestamp
         )
     
@@ -559,19 +1119,15 @@ async def process_anti_rolling(device_id: str, detection, frame_paths,
     """处理防遛确认操作"""
     log_with_timestamp(f"处理防遛确认操作: {detection.text}")
     
-    # 使用模型并行处理所有帧
+    # 使用模型并行处理所有帧，按投票策略得出结论后取消剩余帧的处理
     frame_file_paths = [frame_path for _, frame_path in frame_paths]
-    results = await anti_rolling_model.process_images_parallel(frame_file_paths)
-    
-    # 检查是否有任何帧处理成功
-    is_success = False
-    for _, result in results:
-        if result is True:
-            is_success = True
-            break
+    is_success, _ = await anti_rolling_model.evaluate_images(
+        frame_file_paths, VotingPolicy(required_true=ROLLING_REQUIRED_TRUE_FRAMES)
+    )
     
-    # 创建结果报告
-    result = result_reporter.create_anti_rolling_result(
+    # 创建结果报告，登记证据帧需要计算哈希并复制文件，在线程池中执行
+    result = await asyncio.get_running_loop().run_in_executor(
+        None, result_reporter.create_anti_rolling_result,
         device_id, is_success, [fp for _, fp in frame_paths], detection.timestamp
     )
     
@@ -583,19 +1139,15 @@ async def process_remove_rolling(device_id: str, detection, frame_paths,
     """处理撤遛确认操作"""
     log_with_timestamp(f"处理撤遛确认操作: {detection.text}")
     
-    # 使用模型并行处理所有帧
+    # 使用模型并行处理所有帧，按投票策略得出结论后取消剩余帧的处理
     frame_file_paths = [frame_path for _, frame_path in frame_paths]
-    results = await remove_rolling_model.process_images_parallel(frame_file_paths)
-    
-    # 检查是否有任何帧处理成功
-    is_success = False
-    for _, result in results:
-        if result is True:
-            is_success = True
-            break
+    is_success, _ = await remove_rolling_model.evaluate_images(
+        frame_file_paths, VotingPolicy(required_true=ROLLING_REQUIRED_TRUE_FRAMES)
+    )
     
-    # 创建结果报告
-    result = result_reporter.create_remove_rolling_result(
+    # 创建结果报告，登记证据帧需要计算哈希并复制文件，在线程池中执行
+    result = await asyncio.get_running_loop().run_in_executor(
+        None, result_reporter.create_remove_rolling_result,
         device_id, is_success, [fp for _, fp in frame_paths], detection.timestamp
     )
     
@@ -0,0 +1,254 @@
+import os
+import re
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from datetime import datetime
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+FRAME_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析HTTP Range请求头，只支持单个字节区间
+
+    Args:
+        range_header: Range请求头，例如 "bytes=0-1023"、"bytes=1024-"、"bytes=-512"
+        size: 文件大小（字节）
+
+    Returns:
+        (起始位置, 结束位置)，结束位置包含在内；请求头为空、格式不支持或包含多个区间时返回None，应返回完整文件
+
+    Raises:
+        ValueError: 区间超出文件范围，应返回416
+    """
+    if not range_header:
+        return None
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header)
+    if match is None:
+        return None
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+    if not start_text:
+        # 后缀区间：最后N个字节
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("请求区间为空")
+        return max(0, size - length), size - 1
+    start = int(start_text)
+    end = min(int(end_text), size - 1) if end_text else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"请求区间超出文件范围: {range_header}")
+    return start, end
+
+class EvidenceFrameStore:
+    """
+    证据帧存储
+    结果中的帧按内容哈希复制到证据目录，以不透明的帧ID引用，不受工作空间中同名帧文件被覆盖的影响；
+    缩略图按需生成并缓存在磁盘上，总大小超过上限时按最近访问时间淘汰；
+    帧文件的修改时间为最近一次被结果引用的时间，按与结果存储相同的保留时长清理
+    """
+
+    def __init__(self, base_dir: str, thumbnail_max_bytes: int = 64 * 1024 * 1024,
+                 thumbnail_width: int = 320, thumbnail_quality: int = 80):
+        """
+        初始化证据帧存储
+
+        Args:
+            base_dir: 证据目录，帧保存在frames子目录，缩略图缓存在thumbnails子目录
+            thumbnail_max_bytes: 缩略图缓存总大小上限（字节）
+            thumbnail_width: 默认缩略图宽度（像素）
+            thumbnail_quality: 缩略图JPEG质量
+        """
+        self.frames_dir = os.path.join(base_dir, "frames")
+        self.thumbnails_dir = os.path.join(base_dir, "thumbnails")
+        self.thumbnail_max_bytes = thumbnail_max_bytes
+        self.thumbnail_width = thumbnail_width
+        self.thumbnail_quality = thumbnail_quality
+        os.makedirs(self.frames_dir, exist_ok=True)
+        os.makedirs(self.thumbnails_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # 缩略图路径 -> 文件大小，按最近访问时间从旧到新排列
+        self._thumbnails: "OrderedDict[str, int]" = OrderedDict()
+        entries = []
+        for name in os.listdir(self.thumbnails_dir):
+            path = os.path.join(self.thumbnails_dir, name)
+            if name.endswith(".tmp"):
+                # 上次运行中断时留下的临时文件
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._thumbnails[path] = size
+        self._thumbnail_bytes = sum(self._thumbnails.values())
+
+    def register(self, frame_path: str) -> Optional[str]:
+        """
+        登记证据帧
+
+        Args:
+            frame_path: 帧文件路径
+
+        Returns:
+            帧ID，文件不存在时返回None
+        """
+        try:
+            digest = hashlib.sha256()
+            with open(frame_path, "rb") as frame_file:
+                for block in iter(lambda: frame_file.read(1024 * 1024), b""):
+                    digest.update(block)
+        except OSError as e:
+            log_with_timestamp(f"登记证据帧 {frame_path} 失败: {e}")
+            return None
+        frame_id = digest.hexdigest()[:32]
+        stored_path = self._stored_path(frame_id)
+        try:
+            # 已登记的帧被新结果引用，顺延保留时间
+            os.utime(stored_path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+            # 先复制到临时文件再改名，并发登记同一帧时不会读到写了一半的文件
+            temp_path = f"{stored_path}.{threading.get_ident()}.tmp"
+            shutil.copyfile(frame_path, temp_path)
+            os.replace(temp_path, stored_path)
+        return frame_id
+
+    def _stored_path(self, frame_id: str) -> str:
+        """帧ID对应的证据帧文件路径"""
+        return os.path.join(self.frames_dir, frame_id[:2], f"{frame_id}.jpg")
+
+    def frame_path(self, frame_id: str) -> Optional[str]:
+        """
+        查找证据帧文件
+
+        Args:
+            frame_id: 帧ID
+
+        Returns:
+            证据帧文件路径，帧ID无效或不存在时返回None
+        """
+        if not FRAME_ID_PATTERN.match(frame_id):
+            return None
+        path = self._stored_path(frame_id)
+        return path if os.path.exists(path) else None
+
+    def thumbnail_path(self, frame_id: str, width: Optional[int] = None) -> Optional[str]:
+        """
+        获取缩略图，未缓存时生成
+
+        Args:
+            frame_id: 帧ID
+            width: 缩略图宽度，为None时使用默认宽度；不超过原图宽度
+
+        Returns:
+            缩略图文件路径，帧不存在或无法解码时返回None
+        """
+        import cv2
+        source_path = self.frame_path(frame_id)
+        if source_path is None:
+            return None
+        width = width or self.thumbnail_width
+        path = os.path.join(self.thumbnails_dir, f"{frame_id}_{width}.jpg")
+
+        with self._lock:
+            if path in self._thumbnails and os.path.exists(path):
+                self._thumbnails.move_to_end(path)
+                os.utime(path)
+                return path
+
+        # 解码、缩放和编码不持有锁，生成缩略图时不阻塞其他帧的缓存命中
+        image = cv2.imread(source_path)
+        if image is None:
+            log_with_timestamp(f"无法解码证据帧: {source_path}")
+            return None
+        height, source_width = image.shape[:2]
+        if width < source_width:
+            image = cv2.resize(
+                image, (width, max(1, round(height * width / source_width))), interpolation=cv2.INTER_AREA
+            )
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.thumbnail_quality])
+        if not ok:
+            return None
+        data = encoded.tobytes()
+        # 并发生成同一缩略图时各自写临时文件再改名，不会读到写了一半的文件
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as thumbnail_file:
+            thumbnail_file.write(data)
+        os.replace(temp_path, path)
+
+        # 只在更新缓存索引时持有锁
+        with self._lock:
+            self._thumbnail_bytes += len(data) - self._thumbnails.pop(path, 0)
+            self._thumbnails[path] = len(data)
+            evicted = self._evict(keep=path)
+        self._remove_files(evicted)
+        return path
+
+    def _evict(self, keep: str) -> List[str]:
+        """按最近访问时间从索引中淘汰缩略图，直到总大小不超过上限，返回需要删除的文件；调用方需持有锁"""
+        evicted = []
+        while self._thumbnail_bytes > self.thumbnail_max_bytes and len(self._thumbnails) > 1:
+            path, size = next(iter(self._thumbnails.items()))
+            if path == keep:
+                break
+            del self._thumbnails[path]
+            self._thumbnail_bytes -= size
+            evicted.append(path)
+        return evicted
+
+    @staticmethod
+    def _remove_files(paths: List[str]):
+        """删除文件，已不存在的忽略"""
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def prune(self, max_age: float) -> int:
+        """
+        删除超过保留时长没有被结果引用的证据帧及其缩略图
+
+        Args:
+            max_age: 保留时长（秒），应与结果存储的保留时长一致
+
+        Returns:
+            删除的证据帧数
+        """
+        cutoff = time.time() - max_age
+        expired = []
+        for directory in os.scandir(self.frames_dir):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        expired.append(entry.path)
+                except FileNotFoundError:
+                    continue
+        self._remove_files(expired)
+        frame_ids = {os.path.basename(path)[:32] for path in expired}
+
+        with self._lock:
+            thumbnails = [path for path in self._thumbnails if os.path.basename(path)[:32] in frame_ids]
+            for path in thumbnails:
+                self._thumbnail_bytes -= self._thumbnails.pop(path)
+        self._remove_files(thumbnails)
+        if expired:
+            log_with_timestamp(f"清理 {len(expired)} 个过期证据帧和 {len(thumbnails)} 个缩略图")
+        return len(expired)
+
+    @property
+    def thumbnail_bytes(self) -> int:
+        """缩略图缓存总大小（字节）"""
+        return self._thumbnail_bytes
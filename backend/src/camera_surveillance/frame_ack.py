@@ -0,0 +1,125 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from datetime import datetime
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+# 确认模式：每帧确认 / 每N帧累计确认 / 每T毫秒累计确认
+ACK_MODES = ("frame", "count", "interval")
+
+class FrameAcknowledger:
+    """
+    实时视频帧确认
+    累计确认只发送已处理的最大序号，并附带信用窗口：客户端发送的序号不应超过确认中的credit，
+    收到新的确认后再继续发送，实现基于信用的流量控制
+    """
+
+    def __init__(self, send: Callable[[Dict[str, Any]], Awaitable[None]], mode: str = "frame",
+                 every_frames: int = 10, interval_ms: float = 200, window: int = 64):
+        """
+        初始化帧确认器
+
+        Args:
+            send: 发送确认消息的协程函数
+            mode: 确认模式，见ACK_MODES
+            every_frames: count模式下每多少帧确认一次
+            interval_ms: interval模式下的确认间隔；count模式下有未确认帧且空闲超过该时间时也会确认
+            window: 信用窗口，确认后客户端最多还可发送的帧数，count模式下不小于every_frames
+        """
+        if mode not in ACK_MODES:
+            raise ValueError(f"不支持的确认模式: {mode}")
+        self.send = send
+        self.mode = mode
+        self.every_frames = max(1, every_frames)
+        self.interval = max(1.0, interval_ms) / 1000.0
+        # count模式下窗口小于确认间隔的帧数时，客户端会在收到确认前用完信用
+        self.window = max(window, self.every_frames) if mode == "count" else max(1, window)
+        self.highest_seq = 0
+        self.acked_seq = 0
+        self.last_timestamp = None
+        self.pending = 0
+        self.ack_count = 0
+        self._last_ack_time = time.monotonic()
+        self._send_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """累计确认模式下启动空闲确认任务，避免客户端等待信用时剩余帧一直得不到确认"""
+        if self.mode != "frame" and self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_idle())
+
+    async def stop(self):
+        """停止空闲确认任务"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+    async def frame_processed(self, seq: Optional[int] = None, timestamp: Any = None) -> bool:
+        """
+        记录一帧已处理，按确认模式决定是否发送确认
+
+        Args:
+            seq: 客户端消息中的序号，为None时按收到的消息数计数
+            timestamp: 客户端消息中的时间戳，原样带回
+
+        Returns:
+            是否记录了该帧，序号无效时不记录，回复frame_rejected
+        """
+        if seq is None:
+            seq = self.highest_seq + 1
+        try:
+            seq = int(seq)
+        except (TypeError, ValueError, OverflowError):
+            # 序号来自客户端，格式错误时不影响确认状态，也不能让异常断开连接
+            log_with_timestamp(f"帧序号无效，不确认该帧: {seq!r}")
+            async with self._send_lock:
+                await self.send({"status": "frame_rejected", "reason": "invalid_seq", "timestamp": timestamp})
+            return False
+        self.highest_seq = max(self.highest_seq, seq)
+        self.last_timestamp = timestamp
+        self.pending += 1
+
+        if self.mode == "frame":
+            await self.flush()
+        elif self.mode == "count" and self.pending >= self.every_frames:
+            await self.flush()
+        elif self.mode == "interval" and time.monotonic() - self._last_ack_time >= self.interval:
+            await self.flush()
+        return True
+
+    async def flush(self):
+        """发送累计确认，没有未确认的帧时不发送"""
+        async with self._send_lock:
+            if self.pending == 0:
+                return
+            message = {
+                "status": "frame_processed",
+                "timestamp": self.last_timestamp,
+                "seq": self.highest_seq,
+                "frames": self.pending,
+                "credit": self.highest_seq + self.window
+            }
+            self.acked_seq = self.highest_seq
+            self.pending = 0
+            self._last_ack_time = time.monotonic()
+            self.ack_count += 1
+            await self.send(message)
+
+    async def _flush_idle(self):
+        """定期检查，有未确认的帧且距上次确认超过确认间隔时发送确认"""
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.pending and time.monotonic() - self._last_ack_time >= self.interval:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    log_with_timestamp(f"发送帧确认时出错: {e}")
+                    return
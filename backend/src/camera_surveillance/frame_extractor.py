@@ -1,10 +1,15 @@
-import cv2
 import os
+import uuid
+import threading
 from pathlib import Path
 from typing import List, Tuple
 
 class FrameExtractor:
-    """图像帧提取器，用于从视频中提取特定时间点的帧"""
+    """
+    图像帧提取器，用于从视频中提取特定时间点的帧
+    同一视频的多个检测可以共用一个提取器，定位和读帧在锁内进行，可从多个线程调用；
+    每次提取的帧文件名带有唯一后缀，同一目录下的其他提取器和并发的检测不会覆盖正在使用的帧文件
+    """
     
     def __init__(self, video_path: str):
         """
@@ -13,9 +18,12 @@ class FrameExtractor:
         Args:
             video_path: 视频文件路径
         """
+        import cv2
         self.video_path = video_path
         self.cap = cv2.VideoCapture(video_path)
         self.fps = int(self.cap.get(cv2.CAP_PROP_FPS))
+        # VideoCapture的定位和读取不是线程安全的
+        self._lock = threading.Lock()
         
     def extract_frames_around_timestamp(self, timestamp: float, 
                                        before_seconds: float = 2.0, 
@@ -33,7 +41,10 @@ class FrameExtractor:
         Returns:
             帧时间戳和文件路径的列表
         """
+        import cv2
         frame_paths = []
+        # 本次提取的帧文件后缀，帧文件在提取结束后还会被评分、识别和登记为证据帧
+        token = uuid.uuid4().hex[:8]
         
         # 计算开始和结束帧
         start_time = max(0, timestamp - before_seconds)
@@ -46,17 +57,19 @@ class FrameExtractor:
         
         # 提取帧
         for frame_idx in range(start_frame, end_frame + 1, interval_frames):
-            # 设置视频位置
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            
-            # 读取帧
-            ret, frame = self.cap.read()
+            # 只有定位和读帧需要在锁内进行
+            with self._lock:
+                # 设置视频位置
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                
+                # 读取帧
+                ret, frame = self.cap.read()
             if ret:
                 # 计算实际时间戳
                 actual_timestamp = frame_idx / self.fps
                 
                 # 保存帧到文件
-                frame_filename = f"frame_{actual_timestamp:.2f}.jpg"
+                frame_filename = f"frame_{actual_timestamp:.2f}_{token}.jpg"
                 frame_path = os.path.join(os.path.dirname(self.video_path), frame_filename)
                 cv2.imwrite(frame_path, frame)
                 
@@ -95,5 +108,6 @@ class FrameExtractor:
     
     def release(self):
         """释放视频资源"""
-        if self.cap:
-            self.cap.release()
\ No newline at end of file
+        with self._lock:
+            if self.cap:
+                self.cap.release()
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+import json
+import tempfile
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from datetime import datetime
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from .frame_quality import detect_number_region
+from .session_manager import real_device_id
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+@dataclass
+class UploadPreprocessConfig:
+    """上传前图像预处理配置"""
+    roi: Optional[Tuple[float, float, float, float]] = None  # 固定感兴趣区域，相对坐标(x, y, w, h)，取值0~1
+    detect_region: bool = True   # 未配置固定区域时，是否自动检测车号区域
+    region_padding: float = 0.5  # 检测到的区域向外扩展的比例（相对区域宽高）
+    max_side: int = 1024         # 上传图像最长边上限
+    jpeg_quality: int = 80       # JPEG编码质量
+
+@dataclass
+class PreprocessedImage:
+    """预处理后的上传图像"""
+    path: str
+    original_bytes: int
+    uploaded_bytes: int
+    crop: Optional[Tuple[int, int, int, int]] = None  # 裁剪区域（原图坐标）
+    size: Tuple[int, int] = (0, 0)                    # 上传图像尺寸(宽, 高)
+    is_original: bool = False                         # 是否直接使用原图
+
+class FramePreprocessor:
+    """帧预处理器，在上传视觉大模型前裁剪车号区域并按上限重新编码"""
+
+    def __init__(self, default_config: Optional[UploadPreprocessConfig] = None,
+                 device_configs: Optional[Dict[str, UploadPreprocessConfig]] = None):
+        """
+        初始化帧预处理器
+
+        Args:
+            default_config: 默认预处理配置
+            device_configs: 按设备ID配置的预处理参数
+        """
+        self.default_config = default_config or UploadPreprocessConfig()
+        self.device_configs = device_configs or {}
+
+    @classmethod
+    def from_json_file(cls, config_path: str) -> "FramePreprocessor":
+        """
+        从JSON配置文件创建预处理器
+        文件格式: {"default": {...}, "devices": {"camera_1": {...}}}
+
+        Args:
+            config_path: 配置文件路径
+
+        Returns:
+            帧预处理器
+        """
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        def to_config(values: dict) -> UploadPreprocessConfig:
+            values = dict(values)
+            if values.get("roi") is not None:
+                values["roi"] = tuple(values["roi"])
+            return UploadPreprocessConfig(**values)
+
+        default_config = to_config(data.get("default", {}))
+        device_configs = {}
+        for device_id, values in data.get("devices", {}).items():
+            # 设备配置在默认配置的基础上覆盖
+            merged = asdict(default_config)
+            merged.update(values)
+            device_configs[device_id] = to_config(merged)
+        return cls(default_config, device_configs)
+
+    def get_config(self, device_id: Optional[str] = None) -> UploadPreprocessConfig:
+        """
+        获取设备的预处理配置，设备ID带时间戳后缀时按原始设备ID查找
+
+        Args:
+            device_id: 设备ID
+
+        Returns:
+            预处理配置
+        """
+        if device_id:
+            if device_id in self.device_configs:
+                return self.device_configs[device_id]
+            original_device_id = real_device_id(device_id)
+            if original_device_id in self.device_configs:
+                return self.device_configs[original_device_id]
+        return self.default_config
+
+    @staticmethod
+    def _expand_region(region: Tuple[int, int, int, int], padding: float,
+                       width: int, height: int) -> Tuple[int, int, int, int]:
+        """按比例扩展区域并限制在图像范围内"""
+        x, y, w, h = region
+        pad_x = int(w * padding)
+        pad_y = int(h * padding)
+        x0 = max(0, x - pad_x)
+        y0 = max(0, y - pad_y)
+        x1 = min(width, x + w + pad_x)
+        y1 = min(height, y + h + pad_y)
+        return x0, y0, x1 - x0, y1 - y0
+
+    def _locate_crop(self, image: "np.ndarray", config: UploadPreprocessConfig,
+                     region: Optional[Tuple[int, int, int, int]]) -> Optional[Tuple[int, int, int, int]]:
+        """确定裁剪区域：固定ROI优先，其次是调用方提供或自动检测的车号区域"""
+        import cv2
+        height, width = image.shape[:2]
+
+        if config.roi is not None:
+            rx, ry, rw, rh = config.roi
+            crop = (int(rx * width), int(ry * height), int(rw * width), int(rh * height))
+            return self._expand_region(crop, 0.0, width, height)
+
+        if region is None and config.detect_region:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            # 在缩小的图像上检测，再映射回原图坐标
+            scale = min(1.0, 640.0 / max(height, width))
+            if scale < 1.0:
+                gray = cv2.resize(gray, (int(width * scale), int(height * scale)),
+                                  interpolation=cv2.INTER_AREA)
+            detected = detect_number_region(gray)
+            if detected is not None:
+                region = tuple(int(round(v / scale)) for v in detected)
+
+        if region is None:
+            return None
+        return self._expand_region(region, config.region_padding, width, height)
+
+    def prepare(self, image_path: str, device_id: Optional[str] = None,
+                region: Optional[Tuple[int, int, int, int]] = None) -> PreprocessedImage:
+        """
+        预处理待上传的图像：裁剪车号区域、限制分辨率并重新编码
+
+        Args:
+            image_path: 原始图像路径
+            device_id: 设备ID，用于选择预处理配置
+            region: 已知的车号区域（原图坐标），例如帧质量评分时检测到的区域
+
+        Returns:
+            预处理结果，处理失败时直接返回原图
+        """
+        import cv2
+        config = self.get_config(device_id)
+        original_bytes = os.path.getsize(image_path) if os.path.exists(image_path) else 0
+
+        image = cv2.imread(image_path)
+        if image is None:
+            return PreprocessedImage(image_path, original_bytes, original_bytes, is_original=True)
+
+        crop = self._locate_crop(image, config, region)
+        if crop is not None and crop[2] > 0 and crop[3] > 0:
+            x, y, w, h = crop
+            image = image[y:y + h, x:x + w]
+        else:
+            crop = None
+
+        height, width = image.shape[:2]
+        if max(height, width) > config.max_side:
+            scale = config.max_side / float(max(height, width))
+            image = cv2.resize(image, (int(width * scale), int(height * scale)),
+                               interpolation=cv2.INTER_AREA)
+            height, width = image.shape[:2]
+
+        ok, encoded = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), config.jpeg_quality])
+        if not ok:
+            return PreprocessedImage(image_path, original_bytes, original_bytes, is_original=True)
+
+        # 预处理没有带来收益时直接上传原图
+        if crop is None and original_bytes and len(encoded) >= original_bytes:
+            return PreprocessedImage(image_path, original_bytes, original_bytes,
+                                     size=(width, height), is_original=True)
+
+        # 同一帧可能被多个检测同时识别，上传文件名需唯一，避免一方删除另一方正在上传的文件
+        root, _ = os.path.splitext(image_path)
+        fd, output_path = tempfile.mkstemp(prefix=f"{os.path.basename(root)}_upload_", suffix=".jpg",
+                                           dir=os.path.dirname(image_path) or None)
+        with os.fdopen(fd, "wb") as f:
+            f.write(encoded.tobytes())
+
+        return PreprocessedImage(
+            path=output_path,
+            original_bytes=original_bytes,
+            uploaded_bytes=len(encoded),
+            crop=crop,
+            size=(width, height)
+        )
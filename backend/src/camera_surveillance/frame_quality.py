@@ -0,0 +1,194 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+from datetime import datetime
+
+# OpenCV和NumPy导入较慢，评分时才导入，不拖慢服务启动
+if TYPE_CHECKING:
+    import numpy as np
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+# 区域检测器：输入灰度图，返回(x, y, w, h)或None
+RegionDetector = Callable[["np.ndarray"], Optional[Tuple[int, int, int, int]]]
+
+@dataclass
+class FrameQuality:
+    """单帧质量评分数据类"""
+    timestamp: float
+    frame_path: str
+    sharpness: float = 0.0      # 拉普拉斯方差（原始值）
+    exposure: float = 0.0       # 曝光评分 0~1，越大越好
+    motion: float = 0.0         # 运动模糊评分 0~1，越大越清晰
+    region_found: bool = False  # 是否检测到车号区域
+    region: Optional[Tuple[int, int, int, int]] = None  # 车号区域（原图坐标）
+    score: float = 0.0          # 综合评分
+    readable: bool = True       # 图像是否可读
+
+def detect_number_region(gray: "np.ndarray") -> Optional[Tuple[int, int, int, int]]:
+    """
+    基于形态学的车号/车牌区域检测
+    车号通常是横向排列的高对比度字符，水平梯度密集，
+    闭运算后会形成横向细长的连通区域
+
+    Args:
+        gray: 灰度图像
+
+    Returns:
+        区域坐标(x, y, w, h)，未检测到则返回None
+    """
+    import cv2
+    height, width = gray.shape[:2]
+    grad_x = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3))
+    _, binary = cv2.threshold(grad_x, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # 横向闭运算，把相邻字符连成一片
+    kernel_width = max(3, width // 20)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_width, max(1, kernel_width // 4)))
+    closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+
+    contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    best_region = None
+    best_area = 0
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        area = w * h
+        # 过滤过小、过大或非横向的区域
+        if area < width * height * 0.002 or area > width * height * 0.5:
+            continue
+        if w < h * 2:
+            continue
+        if area > best_area:
+            best_area = area
+            best_region = (x, y, w, h)
+
+    return best_region
+
+class FrameQualityScorer:
+    """帧质量评分器，在本地对候选帧排序，决定送入远程识别的顺序"""
+
+    def __init__(self, region_detector: Optional[RegionDetector] = None,
+                 max_side: int = 640,
+                 sharpness_weight: float = 0.5,
+                 exposure_weight: float = 0.2,
+                 motion_weight: float = 0.2,
+                 region_weight: float = 0.1):
+        """
+        初始化帧质量评分器
+
+        Args:
+            region_detector: 可选的车号区域检测器，检测到区域时只在区域内计算清晰度
+            max_side: 评分前将图像缩放到的最长边，降低计算量
+            sharpness_weight: 清晰度权重
+            exposure_weight: 曝光权重
+            motion_weight: 运动模糊权重
+            region_weight: 区域检测权重
+        """
+        self.region_detector = region_detector
+        self.max_side = max_side
+        self.sharpness_weight = sharpness_weight
+        self.exposure_weight = exposure_weight
+        self.motion_weight = motion_weight
+        self.region_weight = region_weight
+
+    def _load_gray(self, frame_path: str) -> Tuple[Optional["np.ndarray"], float]:
+        """读取灰度图并缩放，返回(图像, 缩放比例)"""
+        import cv2
+        gray = cv2.imread(frame_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return None, 1.0
+
+        height, width = gray.shape[:2]
+        scale = 1.0
+        if max(height, width) > self.max_side:
+            scale = self.max_side / float(max(height, width))
+            gray = cv2.resize(gray, (int(width * scale), int(height * scale)),
+                              interpolation=cv2.INTER_AREA)
+        return gray, scale
+
+    @staticmethod
+    def _exposure_score(gray: "np.ndarray") -> float:
+        """曝光评分：平均亮度越接近中灰、过曝/欠曝像素越少，得分越高"""
+        import numpy as np
+        mean = float(gray.mean())
+        clipped = float(np.count_nonzero((gray <= 5) | (gray >= 250))) / gray.size
+        return max(0.0, 1.0 - abs(mean - 128.0) / 128.0) * (1.0 - clipped)
+
+    @staticmethod
+    def _motion_score(gray: "np.ndarray") -> float:
+        """运动模糊评分：运动模糊会削弱某一方向上的梯度，用横纵梯度能量之比衡量"""
+        import cv2
+        import numpy as np
+        grad_x = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+        grad_y = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+        energy_x = float(np.mean(grad_x * grad_x))
+        energy_y = float(np.mean(grad_y * grad_y))
+        if max(energy_x, energy_y) <= 0:
+            return 0.0
+        return min(energy_x, energy_y) / max(energy_x, energy_y)
+
+    def score_frame(self, timestamp: float, frame_path: str) -> FrameQuality:
+        """
+        计算单帧的各项质量指标（综合评分需要在一组帧中归一化后计算）
+
+        Args:
+            timestamp: 帧时间戳
+            frame_path: 帧图像路径
+
+        Returns:
+            帧质量评分
+        """
+        import cv2
+        quality = FrameQuality(timestamp=timestamp, frame_path=frame_path)
+        gray, scale = self._load_gray(frame_path)
+        if gray is None:
+            quality.readable = False
+            return quality
+
+        target = gray
+        if self.region_detector is not None:
+            try:
+                region = self.region_detector(gray)
+            except Exception as e:
+                log_with_timestamp(f"车号区域检测出错: {e}")
+                region = None
+            if region is not None:
+                x, y, w, h = region
+                if w > 0 and h > 0:
+                    quality.region_found = True
+                    quality.region = tuple(int(round(v / scale)) for v in region)
+                    target = gray[y:y + h, x:x + w]
+
+        quality.sharpness = float(cv2.Laplacian(target, cv2.CV_64F).var())
+        quality.exposure = self._exposure_score(target)
+        quality.motion = self._motion_score(target)
+        return quality
+
+    def rank_frames(self, frame_paths: List[Tuple[float, str]]) -> List[FrameQuality]:
+        """
+        对候选帧按综合质量从高到低排序
+
+        Args:
+            frame_paths: 帧时间戳和文件路径的列表
+
+        Returns:
+            排序后的帧质量列表，不可读的帧排在最后
+        """
+        qualities = [self.score_frame(timestamp, frame_path) for timestamp, frame_path in frame_paths]
+
+        # 拉普拉斯方差的绝对值随场景变化很大，在同一组候选帧内归一化
+        max_sharpness = max((q.sharpness for q in qualities if q.readable), default=0.0)
+        for quality in qualities:
+            if not quality.readable:
+                quality.score = -1.0
+                continue
+            sharpness = quality.sharpness / max_sharpness if max_sharpness > 0 else 0.0
+            quality.score = (self.sharpness_weight * sharpness +
+                             self.exposure_weight * quality.exposure +
+                             self.motion_weight * quality.motion +
+                             self.region_weight * (1.0 if quality.region_found else 0.0))
+
+        # 稳定排序，评分相同时保持时间顺序
+        return sorted(qualities, key=lambda q: q.score, reverse=True)
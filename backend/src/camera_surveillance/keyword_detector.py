@@ -1,7 +1,19 @@
-import re
-from typing import List, Tuple, Dict, Optional
+import json
+import os
+import time
+from typing import List, Tuple, Dict, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
+from datetime import datetime
+
+from .keyword_matcher import AhoCorasickMatcher, FuzzyKeywordMatcher, PINYIN_AVAILABLE
+from .metrics import KEYWORD_DETECTIONS
+from .transcript import TranscriptSegment
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
 
 class OperationType(Enum):
     """操作类型枚举"""
@@ -17,33 +29,147 @@ class DetectionResult:
     timestamp: float
     confidence: float
     text: str
+    # 关键词在句子文本中的字符区间
+    span: Optional[Tuple[int, int]] = None
+    # 关键词所在音频片段的媒体时间范围（秒），无词级时间戳时为整句范围
+    segment_start: Optional[float] = None
+    segment_end: Optional[float] = None
+
+    def shift(self, offset: float):
+        """
+        平移检测结果的时间，例如把流内时间换算为媒体块内时间
+
+        Args:
+            offset: 平移量（秒），时间减去该值
+        """
+        self.timestamp -= offset
+        if self.segment_start is not None:
+            self.segment_start -= offset
+        if self.segment_end is not None:
+            self.segment_end -= offset
 
 class KeywordDetector:
     """关键词检测器，用于识别音频中的特定关键词"""
     
-    def __init__(self):
-        """初始化关键词检测器"""
-        # 定义关键词模式
+    def __init__(self, keyword_table_path: Optional[str] = None, reload_interval: float = 2.0,
+                 fuzzy: bool = False, max_distance: int = 1, min_confidence: float = 0.8):
+        """
+        初始化关键词检测器
+        
+        Args:
+            keyword_table_path: 关键词表JSON文件路径，文件修改后自动重新加载；为None时使用内置关键词
+            reload_interval: 检查关键词表文件是否修改的最小间隔（秒）
+            fuzzy: 是否启用拼音容错的模糊匹配，识别同音字、模糊音和少量错字
+            max_distance: 模糊匹配允许的最大编辑距离
+            min_confidence: 模糊匹配结果的最低置信度，置信度为1减去编辑距离与关键词长度之比
+        """
+        # 定义关键词（按字面匹配，忽略大小写）
         self.keyword_patterns = {
             OperationType.VEHICLE_NUMBER: [
-                r"车号确认",
-                r"车号核对",
-                r"确认车号",
-                r"核对车号"
+                "车号确认",
+                "车号核对",
+                "确认车号",
+                "核对车号"
             ],
             OperationType.ANTI_ROLLING: [
-                r"铁鞋设置",
-                r"手闸拧紧",
-                r"防遛设置",
-                r"设置防遛"
+                "铁鞋设置",
+                "手闸拧紧",
+                "防遛设置",
+                "设置防遛"
             ],
             OperationType.REMOVE_ROLLING: [
-                r"铁鞋撤除",
-                r"手闸松开",
-                r"撤除防遛",
-                r"松开手闸"
+                "铁鞋撤除",
+                "手闸松开",
+                "撤除防遛",
+                "松开手闸"
             ]
         }
+        self.keyword_table_path = keyword_table_path
+        self.reload_interval = reload_interval
+        self.fuzzy = fuzzy
+        self.max_distance = max_distance
+        self.min_confidence = min_confidence
+        if fuzzy and not PINYIN_AVAILABLE:
+            log_with_timestamp("警告: 未安装pypinyin库，模糊匹配只按字符计算编辑距离: pip install pypinyin")
+        self._table_mtime = None
+        self._last_reload_check = 0.0
+        self._matcher = None
+        
+        if keyword_table_path:
+            self.reload_if_changed(force=True)
+        if self._matcher is None:
+            self.set_keyword_patterns(self.keyword_patterns)
+    
+    def set_keyword_patterns(self, keyword_patterns: Dict[OperationType, List[str]]):
+        """
+        替换关键词表并重新编译匹配自动机
+        编译完成后整体替换，正在进行的检测不受影响
+        
+        Args:
+            keyword_patterns: 操作类型到关键词列表的映射
+        """
+        keywords = [
+            (keyword, operation_type)
+            for operation_type, keywords in keyword_patterns.items()
+            for keyword in keywords
+        ]
+        if self.fuzzy:
+            matcher = FuzzyKeywordMatcher(keywords, max_distance=self.max_distance)
+        else:
+            matcher = AhoCorasickMatcher(keywords)
+        self.keyword_patterns = keyword_patterns
+        self._matcher = matcher
+    
+    def load_keyword_table(self, path: str) -> Dict[OperationType, List[str]]:
+        """
+        从JSON文件读取关键词表
+        
+        文件格式为 {"VEHICLE_NUMBER": ["车号确认", ...], ...}，键可以是操作类型的名称或取值
+        
+        Args:
+            path: 关键词表文件路径
+            
+        Returns:
+            操作类型到关键词列表的映射
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+        keyword_patterns = {}
+        for key, keywords in table.items():
+            if key in OperationType.__members__:
+                operation_type = OperationType[key]
+            else:
+                operation_type = OperationType(key)
+            keyword_patterns[operation_type] = list(keywords)
+        return keyword_patterns
+    
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """
+        关键词表文件修改后重新加载，加载失败时保留原关键词表
+        
+        Args:
+            force: 是否忽略检查间隔立即检查
+            
+        Returns:
+            是否重新加载了关键词表
+        """
+        if not self.keyword_table_path:
+            return False
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < self.reload_interval:
+            return False
+        self._last_reload_check = now
+        try:
+            mtime = os.path.getmtime(self.keyword_table_path)
+            if mtime == self._table_mtime:
+                return False
+            self.set_keyword_patterns(self.load_keyword_table(self.keyword_table_path))
+            self._table_mtime = mtime
+        except Exception as e:
+            log_with_timestamp(f"加载关键词表失败，继续使用当前关键词: {e}")
+            return False
+        log_with_timestamp(f"已加载关键词表: {self.keyword_table_path}，共 {len(self._matcher)} 个关键词")
+        return True
     
     def detect_keywords(self, text: str) -> List[DetectionResult]:
         """
@@ -55,43 +181,215 @@ class KeywordDetector:
         Returns:
             检测到的结果列表
         """
+        self.reload_if_changed()
         results = []
         
-        # 遍历所有操作类型和对应的关键词模式
-        for operation_type, patterns in self.keyword_patterns.items():
-            for pattern in patterns:
-                # 搜索匹配的关键词
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    # 计算置信度（基于匹配长度和位置）
-                    confidence = min(len(match.group()) / 20.0, 1.0)  # 简单置信度计算
-                    
-                    result = DetectionResult(
-                        operation_type=operation_type,
-                        timestamp=0.0,  # 需要根据实际音频时间戳设置
-                        confidence=confidence,
-                        text=match.group()
-                    )
-                    results.append(result)
+        # 单次扫描文本，匹配结果直接对应操作类型
+        for match in self._matcher.find_all(text):
+            # 置信度由匹配的编辑距离换算，精确匹配为1.0
+            if match.confidence < self.min_confidence:
+                continue
+            
+            result = DetectionResult(
+                operation_type=match.label,
+                timestamp=0.0,  # 需要根据实际音频时间戳设置
+                confidence=match.confidence,
+                text=match.keyword,
+                span=(match.start, match.end)
+            )
+            results.append(result)
         
         return results
     
-    def detect_keywords_with_context(self, texts: List[Tuple[float, str]]) -> List[DetectionResult]:
+    def detect_keywords_with_context(self, texts: List[Union[TranscriptSegment, Tuple[float, str]]]) -> List[DetectionResult]:
         """
         在带时间戳的文本列表中检测关键词
         
         Args:
-            texts: 带时间戳的文本列表 [(timestamp, text), ...]
+            texts: 转录片段列表，也兼容带时间戳的文本列表 [(timestamp, text), ...]
             
         Returns:
-            检测到的结果列表
+            检测到的结果列表；输入为转录片段时，结果带有关键词所在的媒体时间范围，
+            timestamp为该范围的结束时间
         """
         results = []
         
-        for timestamp, text in texts:
+        for item in texts:
+            if isinstance(item, TranscriptSegment):
+                segment, text = item, item.text
+            else:
+                segment, (timestamp, text) = None, item
             detections = self.detect_keywords(text)
             for detection in detections:
-                detection.timestamp = timestamp
+                if segment is not None:
+                    detection.segment_start, detection.segment_end = segment.time_range_for_span(*detection.span)
+                    detection.timestamp = detection.segment_end
+                else:
+                    detection.timestamp = timestamp
                 results.append(detection)
         
-        return results
\ No newline at end of file
+        return results
+
+class StreamingKeywordDetector:
+    """
+    流式关键词检测器
+    依次消费识别会话输出的中间结果和完整句子，中间结果只扫描新增文本；
+    同一句话中同一操作类型的多个关键词合并为一个检测结果，
+    时间窗口内重复出现的同一操作只上报一次
+    """
+    
+    def __init__(self, detector: KeywordDetector, merge_window: float = 5.0, use_partial: bool = True):
+        """
+        初始化流式关键词检测器
+        
+        Args:
+            detector: 关键词检测器
+            merge_window: 合并窗口（秒），与上次上报的同一操作间隔不超过该值时视为重复
+            use_partial: 是否在中间结果中检测关键词，开启后关键词一出现即可上报
+        """
+        self.detector = detector
+        self.merge_window = merge_window
+        self.use_partial = use_partial
+        # 每种操作最近一次检测到的结束时间（媒体时间）
+        self._last_end: Dict[OperationType, float] = {}
+        # 当前未结束句子的开始时间和已扫描过的文本
+        self._partial_begin: Optional[float] = None
+        self._partial_text = ""
+        self.suppressed = 0
+    
+    def _scan_start(self, segment: TranscriptSegment) -> int:
+        """计算本次需要扫描的起始字符位置，同一句话的后续结果只扫描新增部分"""
+        if self._partial_begin is None or abs(segment.begin - self._partial_begin) > 1e-6:
+            return 0
+        if not segment.text.startswith(self._partial_text):
+            return 0
+        # 回退一个关键词长度，保证跨越新旧文本边界的关键词能被匹配
+        keyword_length = max(
+            (len(keyword) for keywords in self.detector.keyword_patterns.values() for keyword in keywords),
+            default=0
+        )
+        return max(0, len(self._partial_text) - keyword_length - self.detector.max_distance)
+    
+    def process(self, segment: TranscriptSegment) -> List[DetectionResult]:
+        """
+        处理一条识别结果
+        
+        Args:
+            segment: 识别会话输出的中间结果或完整句子
+            
+        Returns:
+            新的检测结果列表，每种操作最多一个
+        """
+        if not segment.is_final and not self.use_partial:
+            return []
+        
+        scan_start = self._scan_start(segment) if self.use_partial else 0
+        if segment.is_final:
+            self._partial_begin, self._partial_text = None, ""
+        else:
+            self._partial_begin, self._partial_text = segment.begin, segment.text
+        
+        # 同一操作类型的关键词合并为一个检测结果
+        merged: Dict[OperationType, DetectionResult] = {}
+        for detection in self.detector.detect_keywords(segment.text[scan_start:]):
+            start, end = detection.span[0] + scan_start, detection.span[1] + scan_start
+            existing = merged.get(detection.operation_type)
+            if existing is None:
+                detection.span = (start, end)
+                merged[detection.operation_type] = detection
+            else:
+                existing.span = (min(existing.span[0], start), max(existing.span[1], end))
+                existing.confidence = max(existing.confidence, detection.confidence)
+        
+        results = []
+        for operation_type, detection in merged.items():
+            detection.text = segment.text[detection.span[0]:detection.span[1]]
+            detection.segment_start, detection.segment_end = segment.time_range_for_span(*detection.span)
+            detection.timestamp = detection.segment_end
+            
+            # 合并窗口内重复出现的同一操作不再上报，并顺延窗口
+            last_end = self._last_end.get(operation_type)
+            self._last_end[operation_type] = max(last_end or detection.segment_end, detection.segment_end)
+            if last_end is not None and detection.segment_start - last_end <= self.merge_window:
+                self.suppressed += 1
+                continue
+            KEYWORD_DETECTIONS.inc(operation=operation_type.name.lower())
+            results.append(detection)
+        return results
+
+class DetectionHoldQueue:
+    """
+    检测结果等待队列
+    实时会话视频仍在追加写入，检测结果需要关键词之后after_seconds秒的帧，
+    音频提取水位线越过该位置后才放行，保证提取的帧窗口完整且结果确定；
+    中间结果产生的检测在放行前收到同一句的完整句子时，按完整句子修正时间范围
+    """
+    
+    def __init__(self, after_seconds: float = 4.0):
+        """
+        初始化检测结果等待队列
+        
+        Args:
+            after_seconds: 检测结果需要的关键词之后的媒体时长（秒）
+        """
+        self.after_seconds = after_seconds
+        # 等待中的检测: [(检测结果, 所在句子的开始时间, 是否来自中间结果), ...]
+        self._pending: List[Tuple[DetectionResult, float, bool]] = []
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def _refine(self, detection: DetectionResult, segment: TranscriptSegment):
+        """按完整句子重新计算中间结果检测的时间范围"""
+        index = segment.text.find(detection.text) if detection.text else -1
+        if index >= 0:
+            detection.span = (index, index + len(detection.text))
+            detection.segment_start, detection.segment_end = segment.time_range_for_span(*detection.span)
+        else:
+            detection.segment_start, detection.segment_end = segment.begin, segment.end
+        detection.timestamp = detection.segment_end
+    
+    def add(self, segment: TranscriptSegment, detections: List[DetectionResult]):
+        """
+        加入一条识别结果产生的检测结果
+        
+        Args:
+            segment: 识别会话输出的中间结果或完整句子，时间为流内时间
+            detections: 该结果产生的新检测结果
+        """
+        if segment.is_final:
+            for index, (detection, sentence_begin, partial) in enumerate(self._pending):
+                if partial and abs(sentence_begin - segment.begin) < 1e-3:
+                    self._refine(detection, segment)
+                    self._pending[index] = (detection, sentence_begin, False)
+        for detection in detections:
+            self._pending.append((detection, segment.begin, not segment.is_final))
+    
+    def release(self, watermark: float) -> List[DetectionResult]:
+        """
+        取出帧窗口已完整的检测结果
+        
+        Args:
+            watermark: 已提取音频的流内时间水位线（秒）
+            
+        Returns:
+            可以处理的检测结果，按加入顺序排列
+        """
+        ready, pending = [], []
+        for entry in self._pending:
+            detection = entry[0]
+            end = detection.segment_end if detection.segment_end is not None else detection.timestamp
+            (ready if end + self.after_seconds <= watermark else pending).append(entry)
+        self._pending = pending
+        return [entry[0] for entry in ready]
+    
+    def flush(self) -> List[DetectionResult]:
+        """
+        取出全部等待中的检测结果，音频不会再增加时调用
+        
+        Returns:
+            等待中的检测结果
+        """
+        ready = [entry[0] for entry in self._pending]
+        self._pending = []
+        return ready
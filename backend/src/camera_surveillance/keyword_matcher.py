@@ -0,0 +1,296 @@
+import importlib.util
+from collections import deque
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# 拼音转换为可选依赖，未安装时模糊匹配只按字符计算编辑距离；
+# pypinyin加载词典耗时较长，只检查是否安装，第一次转换拼音时才导入
+PINYIN_AVAILABLE = importlib.util.find_spec("pypinyin") is not None
+
+@dataclass
+class KeywordMatch:
+    """关键词匹配结果，start/end为文本中的字符区间（不包含end）"""
+    start: int
+    end: int
+    keyword: str
+    label: Any
+    # 与关键词的编辑距离，精确匹配为0
+    distance: float = 0.0
+    # 由编辑距离换算的置信度，精确匹配为1.0
+    confidence: float = 1.0
+
+class AhoCorasickMatcher:
+    """
+    Aho–Corasick多模式匹配自动机
+    关键词表编译一次，之后每次匹配只需扫描一遍文本，耗时与关键词数量无关
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]], ignore_case: bool = True):
+        """
+        编译关键词表
+
+        Args:
+            keywords: (关键词, 标签)的可迭代对象，标签原样返回给调用方
+            ignore_case: 是否忽略大小写
+        """
+        self.ignore_case = ignore_case
+        self.keywords: List[Tuple[str, Any]] = []
+        # 状态转移表、失败指针和每个状态上结束的关键词编号
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for keyword, label in keywords:
+            if not keyword:
+                continue
+            self._add(self._normalize(keyword), len(self.keywords))
+            self.keywords.append((keyword, label))
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _normalize(self, text: str) -> str:
+        """大小写归一化，保证归一化前后字符位置一一对应"""
+        if not self.ignore_case:
+            return text
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered
+        return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+    def _add(self, keyword: str, index: int):
+        """把关键词加入字典树"""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build(self):
+        """按广度优先顺序计算失败指针，并沿失败指针合并输出"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """
+        查找文本中所有关键词的出现位置，包括相互重叠的匹配
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            按起始位置排序的匹配结果列表
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for position, char in enumerate(self._normalize(text)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                keyword, label = self.keywords[index]
+                start = position + 1 - len(keyword)
+                matches.append(KeywordMatch(start, position + 1, text[start:position + 1], label))
+        matches.sort(key=lambda match: (match.start, -match.end))
+        return matches
+
+def default_pinyin(text: str) -> List[str]:
+    """
+    把文本逐字转换为不带声调的拼音，非汉字保留原字符
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        与文本逐字对应的拼音列表；未安装pypinyin时返回字符本身
+    """
+    if not PINYIN_AVAILABLE:
+        return list(text)
+    from pypinyin import lazy_pinyin
+    syllables = lazy_pinyin(text, errors=lambda chars: list(chars))
+    return syllables if len(syllables) == len(text) else list(text)
+
+# 常见平翘舌、前后鼻音和n/l不分的模糊音
+_FUZZY_INITIALS = (("zh", "z"), ("ch", "c"), ("sh", "s"), ("l", "n"))
+_FUZZY_FINALS = (("ing", "in"), ("eng", "en"), ("ang", "an"))
+
+def fuzzy_syllable(syllable: str) -> str:
+    """把拼音归一化为模糊音，读音相近的音节得到相同结果"""
+    for source, target in _FUZZY_INITIALS:
+        if syllable.startswith(source):
+            syllable = target + syllable[len(source):]
+            break
+    for source, target in _FUZZY_FINALS:
+        if syllable.endswith(source):
+            syllable = syllable[:-len(source)] + target
+            break
+    return syllable
+
+def _deletion_variants(tokens: Tuple[str, ...], max_deletions: int) -> Set[Tuple[str, ...]]:
+    """生成删除不超过max_deletions个元素后的所有变体（含原序列）"""
+    variants = {tokens}
+    for count in range(1, min(max_deletions, len(tokens) - 1) + 1):
+        for indexes in combinations(range(len(tokens)), count):
+            removed = set(indexes)
+            variants.add(tuple(token for i, token in enumerate(tokens) if i not in removed))
+    return variants
+
+class FuzzyKeywordMatcher:
+    """
+    拼音容错的模糊关键词匹配器
+    关键词和文本都转换为模糊拼音序列，用预先计算的删除变体索引找候选，
+    再按加权编辑距离校验：同字为0，同音字较小，模糊音稍大，其他替换、插入、删除为1
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]], max_distance: int = 1,
+                 homophone_cost: float = 0.25, fuzzy_sound_cost: float = 0.5,
+                 pinyin: Optional[Callable[[str], List[str]]] = None, ignore_case: bool = True):
+        """
+        编译关键词表
+
+        Args:
+            keywords: (关键词, 标签)的可迭代对象
+            max_distance: 允许的最大编辑距离
+            homophone_cost: 同音不同字的替换代价
+            fuzzy_sound_cost: 模糊音（如zh/z、in/ing）的替换代价
+            pinyin: 逐字拼音转换函数，为None时使用pypinyin
+            ignore_case: 是否忽略大小写
+        """
+        self.max_distance = max_distance
+        self.homophone_cost = homophone_cost
+        self.fuzzy_sound_cost = fuzzy_sound_cost
+        self.to_pinyin = pinyin or default_pinyin
+        self.ignore_case = ignore_case
+        # (关键词, 标签, [(字符, 拼音, 模糊拼音), ...], 模糊拼音序列)
+        self.keywords = []
+        self._index: Dict[Tuple[str, ...], Set[int]] = {}
+        self._lengths: Set[int] = set()
+
+        for keyword, label in keywords:
+            chars, syllables = self._tokenize(keyword)
+            if not chars:
+                continue
+            fuzzy = tuple(fuzzy_syllable(syllable) for syllable in syllables)
+            index = len(self.keywords)
+            self.keywords.append((keyword, label, list(zip(chars, syllables, fuzzy)), fuzzy))
+            self._lengths.add(len(chars))
+            for variant in _deletion_variants(fuzzy, max_distance):
+                self._index.setdefault(variant, set()).add(index)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _tokenize(self, text: str, positions: Optional[List[int]] = None):
+        """提取文字和数字字符并转换为拼音，忽略标点和空白"""
+        chars = []
+        for position, char in enumerate(text):
+            if char.isalnum():
+                chars.append(char.lower() if self.ignore_case else char)
+                if positions is not None:
+                    positions.append(position)
+        syllables = self.to_pinyin("".join(chars)) if chars else []
+        return tuple(chars), tuple(syllables)
+
+    def _substitution_cost(self, a: Tuple[str, str, str], b: Tuple[str, str, str]) -> float:
+        """单个字的替换代价，参数为(字符, 拼音, 模糊拼音)"""
+        if a[0] == b[0]:
+            return 0.0
+        if a[1] == b[1]:
+            return self.homophone_cost
+        if a[2] == b[2]:
+            return self.fuzzy_sound_cost
+        return 1.0
+
+    def _distance(self, tokens: List[Tuple[str, str, str]], keyword_tokens: List[Tuple[str, str, str]]) -> float:
+        """加权编辑距离，超过max_distance时提前返回"""
+        previous = [float(j) for j in range(len(keyword_tokens) + 1)]
+        for i in range(1, len(tokens) + 1):
+            current = [float(i)] + [0.0] * len(keyword_tokens)
+            for j in range(1, len(keyword_tokens) + 1):
+                current[j] = min(
+                    previous[j] + 1.0,
+                    current[j - 1] + 1.0,
+                    previous[j - 1] + self._substitution_cost(tokens[i - 1], keyword_tokens[j - 1])
+                )
+            if min(current) > self.max_distance:
+                return float("inf")
+            previous = current
+        return previous[-1]
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """
+        查找文本中与关键词相近的片段
+        同一标签的重叠匹配只保留距离最小的一个
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            按起始位置排序的匹配结果列表
+        """
+        positions: List[int] = []
+        chars, syllables = self._tokenize(text, positions)
+        fuzzy = tuple(fuzzy_syllable(syllable) for syllable in syllables)
+        tokens = list(zip(chars, syllables, fuzzy))
+        n = len(chars)
+
+        window_lengths = sorted({
+            length + delta
+            for length in self._lengths
+            for delta in range(-self.max_distance, self.max_distance + 1)
+            if length + delta > 0
+        })
+        candidates = []
+        checked = set()
+        for start in range(n):
+            for length in window_lengths:
+                end = start + length
+                if end > n:
+                    break
+                keyword_ids = set()
+                for variant in _deletion_variants(fuzzy[start:end], self.max_distance):
+                    keyword_ids |= self._index.get(variant, set())
+                for keyword_id in keyword_ids:
+                    if (start, end, keyword_id) in checked:
+                        continue
+                    checked.add((start, end, keyword_id))
+                    keyword_tokens = self.keywords[keyword_id][2]
+                    distance = self._distance(tokens[start:end], keyword_tokens)
+                    if distance <= self.max_distance:
+                        candidates.append((distance, -len(keyword_tokens), start, end, keyword_id))
+
+        # 距离小的优先，同一标签的重叠区间只保留一个
+        selected: List[KeywordMatch] = []
+        for distance, _, start, end, keyword_id in sorted(candidates):
+            keyword, label, keyword_tokens, _ = self.keywords[keyword_id]
+            begin_pos, end_pos = positions[start], positions[end - 1] + 1
+            if any(m.label == label and m.start < end_pos and begin_pos < m.end for m in selected):
+                continue
+            selected.append(KeywordMatch(
+                start=begin_pos,
+                end=end_pos,
+                keyword=text[begin_pos:end_pos],
+                label=label,
+                distance=distance,
+                confidence=max(0.0, 1.0 - distance / len(keyword_tokens))
+            ))
+        selected.sort(key=lambda match: (match.start, -match.end))
+        return selected
@@ -0,0 +1,286 @@
+import math
+import time
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 默认耗时分桶（秒），覆盖毫秒级的关键词检测到数十秒的文件转录
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_value(value: float) -> str:
+    """按Prometheus文本格式输出数值"""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    """转义标签值"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """输出标签，没有标签时返回空字符串"""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class _Metric(ABC):
+    """指标基类，按标签值分别统计，记录时只持有本指标的锁"""
+
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        初始化指标
+
+        Args:
+            name: 指标名称
+            documentation: 指标说明
+            labelnames: 标签名列表
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        """按标签名顺序取标签值"""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签: {', '.join(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        """输出Prometheus文本格式的行"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """
+        输出各标签值的样本行
+
+        Returns:
+            样本行列表，不含HELP和TYPE行
+        """
+        pass
+
+class Counter(_Metric):
+    """只增计数器"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """
+        增加计数
+
+        Args:
+            amount: 增加量，不能为负
+            labels: 标签值
+        """
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """
+        读取计数
+
+        Args:
+            labels: 标签值
+
+        Returns:
+            当前计数，没有记录时为0
+        """
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Histogram(_Metric):
+    """
+    直方图
+    每次记录只更新一个分桶、总和与次数，输出时再累加为Prometheus要求的累计分桶
+    """
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        初始化直方图
+
+        Args:
+            name: 指标名称
+            documentation: 指标说明
+            labelnames: 标签名列表
+            buckets: 分桶上界，升序
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各分桶次数（最后一个为+Inf）, 总和, 次数]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        """
+        记录一次观测值
+
+        Args:
+            value: 观测值
+            labels: 标签值
+        """
+        key = self._label_values(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """
+        记录代码块的耗时（秒），代码块抛出异常时也会记录
+
+        Args:
+            labels: 标签值
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def count(self, **labels) -> int:
+        """
+        读取观测次数
+
+        Args:
+            labels: 标签值
+
+        Returns:
+            观测次数，没有记录时为0
+        """
+        with self._lock:
+            state = self._values.get(self._label_values(labels))
+            return state[2] if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """指标注册表，按注册顺序输出全部指标"""
+
+    def __init__(self):
+        """初始化指标注册表"""
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        """注册指标，同名指标只能注册一次"""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标已注册: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """注册计数器"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """注册直方图"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """按名称查找指标"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        输出Prometheus文本格式（text/plain; version=0.0.4）
+
+        Returns:
+            全部指标的文本
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# 各处理阶段的指标
+LIVE_MESSAGES_RECEIVED = REGISTRY.counter(
+    "surveillance_live_messages_received_total", "实时视频连接收到的消息数，device_id为去掉时间戳后缀的真实设备ID", ("device_id", "type")
+)
+LIVE_MESSAGES_DROPPED = REGISTRY.counter(
+    "surveillance_live_messages_dropped_total", "实时视频连接中未能处理而丢弃的消息数", ("device_id", "reason")
+)
+FFMPEG_SECONDS = REGISTRY.histogram(
+    "surveillance_ffmpeg_duration_seconds", "ffmpeg进程耗时", ("operation",)
+)
+AUDIO_EXTRACTION_SECONDS = REGISTRY.histogram(
+    "surveillance_audio_extraction_seconds", "增量音频提取中每个媒体块写入会话文件和ffmpeg的耗时"
+)
+AUDIO_EXTRACTED_SECONDS = REGISTRY.counter(
+    "surveillance_audio_extracted_seconds_total", "已提取的PCM音频时长（秒）", ("mode",)
+)
+ASR_LATENCY_SECONDS = REGISTRY.histogram(
+    "surveillance_asr_latency_seconds", "语音识别延迟，stream为句尾音频送入到收到最终结果，file为整个文件的转录耗时",
+    ("mode",)
+)
+KEYWORD_DETECTIONS = REGISTRY.counter(
+    "surveillance_keyword_detections_total", "检测到的操作数（合并窗口内的重复检测不计）", ("operation",)
+)
+FRAME_EXTRACTION_SECONDS = REGISTRY.histogram(
+    "surveillance_frame_extraction_seconds", "检测结果的帧提取耗时", ("operation",)
+)
+MODEL_INFERENCE_SECONDS = REGISTRY.histogram(
+    "surveillance_model_inference_seconds", "本地模型单张图像推理耗时", ("model",)
+)
+MODEL_BATCH_SECONDS = REGISTRY.histogram(
+    "surveillance_model_batch_seconds", "本地模型一批图像的判定耗时（提前得出结论时提前结束）", ("model", "batch_size")
+)
+VEHICLE_RECOGNITION_SECONDS = REGISTRY.histogram(
+    "surveillance_vehicle_recognition_seconds", "车号识别后端单次调用耗时，vlm为远程视觉大模型", ("backend", "outcome")
+)
+RESULTS_REPORTED = REGISTRY.counter(
+    "surveillance_results_reported_total", "上报的处理结果数", ("type",)
+)
+RESULT_FANOUT_SECONDS = REGISTRY.histogram(
+    "surveillance_result_fanout_seconds", "一条结果存储、路由、编码并放入全部订阅者发送队列的耗时",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+RESULT_MESSAGES_DROPPED = REGISTRY.counter(
+    "surveillance_result_messages_dropped_total", "订阅者发送队列满时被合并、丢弃或因断开连接未发送的结果消息数", ("action",)
+)
@@ -1,12 +1,21 @@
 from .audio_transcriber import AudioTranscriber
 from .speech_processor import SpeechProcessor
-from .vehicle_recognizer import VehicleNumberRecognizer
-from .local_models import AntiRollingModel, RemoveRollingModel
+from .vehicle_recognizer import VehicleNumberRecognizer, LocalOCRBackend, VLMBackend
+from .local_models import AntiRollingModel, RemoveRollingModel, VotingPolicy
+from .vad import VoiceActivityDetector, SpeechTimeline, StreamingSpeechGate
+from .transcript_cache import TranscriptCache
 
 __all__ = [
     "AudioTranscriber",
     "SpeechProcessor",
     "VehicleNumberRecognizer",
+    "LocalOCRBackend",
+    "VLMBackend",
     "AntiRollingModel",
-    "RemoveRollingModel"
+    "RemoveRollingModel",
+    "VotingPolicy",
+    "VoiceActivityDetector",
+    "SpeechTimeline",
+    "StreamingSpeechGate",
+    "TranscriptCache"
 ]
\ No newline at end of file
@@ -2,9 +2,19 @@ import os
 import time
 import wave
 import logging
-from typing import List, Tuple
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
 from datetime import datetime
 
+from ..transcript import TranscriptSegment
+from ..video_processor import stream_pcm_audio
+from ..metrics import ASR_LATENCY_SECONDS
+from .chunked_transcription import plan_transcription_chunks, merge_chunk_transcripts
+from .transcript_cache import TranscriptCache, transcript_cache_key, media_cache_key
+from .vad import VoiceActivityDetector, SpeechSegment, SpeechTimeline, StreamingSpeechGate, slice_pcm
+
 # 设置模块日志
 logger = logging.getLogger(__name__)
 
@@ -16,15 +26,193 @@ def log_with_timestamp(message: str):
     logger.info(f"[{timestamp}] {message}")
 
 
+class StreamingTranscriptionSession:
+    """
+    流式语音识别会话
+    一个设备对应一个长连接识别会话，增量送入16kHz单声道PCM数据，
+    每识别出一句话就回调一次，句子时间为流内相对时间（秒）；
+    设置语音活动检测器时只把语音送去识别，识别时间经语音时间轴换算回流内时间
+    """
+    
+    def __init__(self, recognition_factory: Callable[[object], object],
+                 on_sentence: Optional[Callable[[TranscriptSegment], None]] = None,
+                 sample_rate: int = 16000, emit_partial: bool = False, keep_segments: bool = True,
+                 vad: Optional[VoiceActivityDetector] = None):
+        """
+        初始化流式识别会话
+        
+        Args:
+            recognition_factory: 识别器工厂，接收回调对象，返回带start/send_audio_frame/stop方法的识别器
+            on_sentence: 句子回调，在识别器的回调线程中调用
+            sample_rate: 音频采样率
+            emit_partial: 是否回调未结束的中间结果
+            keep_segments: 是否保存识别出的句子供stop返回；长期存在的会话只通过回调处理句子时应关闭，避免内存持续增长
+            vad: 语音活动检测器，为None时送入的音频全部送去识别
+        """
+        self.recognition_factory = recognition_factory
+        self.on_sentence = on_sentence
+        self.sample_rate = sample_rate
+        self.emit_partial = emit_partial
+        self.keep_segments = keep_segments
+        self.segments: List[TranscriptSegment] = []
+        # 送入的音频字节数（流内时间）和实际送去识别的字节数（识别器时间）
+        self.bytes_fed = 0
+        self.bytes_sent = 0
+        self._gate = StreamingSpeechGate(vad) if vad is not None else None
+        self._recognition = None
+        self._time_offset = 0.0
+        self._failed = False
+        # 识别器出错次数，出错期间送入的音频可能没有识别结果
+        self.error_count = 0
+        self._lock = threading.Lock()
+        # 最近送入的音频位置: [(已送入时长, 送入时间), ...]，用于计算句子的识别延迟
+        self._feed_marks = deque(maxlen=6000)
+    
+    @property
+    def is_running(self) -> bool:
+        """会话是否已启动"""
+        return self._recognition is not None
+    
+    @property
+    def fed_duration(self) -> float:
+        """已送入音频的时长（秒），16位单声道PCM"""
+        return self.bytes_fed / float(self.sample_rate * 2)
+    
+    @property
+    def sent_duration(self) -> float:
+        """已送去识别的音频时长（秒），不做语音活动检测时与fed_duration相同"""
+        return self.bytes_sent / float(self.sample_rate * 2)
+    
+    def _make_callback(self):
+        """创建识别回调对象"""
+        session = self
+        
+        class SessionCallback:
+            def on_open(self) -> None:
+                log_with_timestamp('流式识别会话已建立')
+            
+            def on_complete(self) -> None:
+                pass
+            
+            def on_error(self, result) -> None:
+                log_with_timestamp(f'流式识别会话出错: {result}')
+                session.error_count += 1
+                session._failed = True
+            
+            def on_close(self) -> None:
+                log_with_timestamp('流式识别会话已关闭')
+            
+            def on_event(self, result) -> None:
+                sentence = result.get_sentence()
+                if sentence and isinstance(sentence, dict) and sentence.get('text'):
+                    session._handle_sentence(sentence)
+        
+        return SessionCallback()
+    
+    def _handle_sentence(self, sentence: dict):
+        """处理识别器返回的句子"""
+        segment = TranscriptSegment.from_sentence(sentence, offset=self._time_offset)
+        if not segment.is_final and not self.emit_partial:
+            return
+        if self._gate is not None:
+            segment = segment.map_time(self._gate.to_source_time)
+        if segment.is_final:
+            if self.keep_segments:
+                self.segments.append(segment)
+            self._observe_latency(segment)
+            log_with_timestamp(f'[{segment.begin:.2f}s-{segment.end:.2f}s] 识别结果: {segment.text}')
+        if self.on_sentence is not None:
+            try:
+                self.on_sentence(segment)
+            except Exception as e:
+                log_with_timestamp(f"处理识别结果回调时出错: {e}")
+    
+    def start(self):
+        """启动识别会话，重新启动时新会话的时间从已送去识别的音频时长开始计算"""
+        with self._lock:
+            if self._recognition is not None:
+                return
+            self._time_offset = self.sent_duration
+            self._failed = False
+            recognition = self.recognition_factory(self._make_callback())
+            recognition.start()
+            self._recognition = recognition
+    
+    def feed(self, pcm_data: bytes):
+        """
+        送入一段PCM音频数据，会话未启动或已出错时自动（重新）启动
+        
+        Args:
+            pcm_data: 16位PCM音频数据
+        """
+        if not pcm_data:
+            return
+        self.bytes_fed += len(pcm_data)
+        self._feed_marks.append((self.fed_duration, time.perf_counter()))
+        if self._gate is not None:
+            # 静音不送去识别，语音确认前的音频暂存在门限中
+            pcm_data = self._gate.process(pcm_data)
+            if not pcm_data:
+                return
+        if self._failed:
+            self._close_recognition()
+        if self._recognition is None:
+            self.start()
+        self._recognition.send_audio_frame(pcm_data)
+        self.bytes_sent += len(pcm_data)
+    
+    def _observe_latency(self, segment: TranscriptSegment):
+        """记录从句尾音频送入到收到该句最终结果的延迟，句子按时间顺序返回，更早的送入记录不再需要"""
+        marks = self._feed_marks
+        while marks and marks[0][0] < segment.end:
+            marks.popleft()
+        if marks:
+            ASR_LATENCY_SECONDS.observe(time.perf_counter() - marks[0][1], mode="stream")
+    
+    def _close_recognition(self):
+        """关闭当前识别器"""
+        with self._lock:
+            recognition = self._recognition
+            self._recognition = None
+        if recognition is not None:
+            try:
+                recognition.stop()
+            except Exception as e:
+                log_with_timestamp(f"停止流式识别会话时出错: {e}")
+    
+    def stop(self) -> List[TranscriptSegment]:
+        """
+        停止识别会话，等待剩余结果返回
+        
+        Returns:
+            会话内识别出的全部句子，不保存句子时为空列表
+        """
+        self._close_recognition()
+        return list(self.segments)
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
 class AudioTranscriber:
     """音频转文字处理器，集成百炼语音识别服务"""
     
-    def __init__(self, sample_rate: int = 16000):
+    def __init__(self, sample_rate: int = 16000, use_vad: bool = True,
+                 model: str = 'paraformer-realtime-v2', language_hints: Optional[List[str]] = None,
+                 transcript_cache: Optional[TranscriptCache] = None):
         """
         初始化音频转文字处理器
         
         Args:
             sample_rate: 音频采样率，默认16000Hz
+            use_vad: 是否在识别前做语音活动检测，只发送语音片段
+            model: 语音识别模型名称
+            language_hints: 语言提示，为None时使用模型默认设置
+            transcript_cache: 转录缓存，相同音频内容只识别一次
         """
         # 导入百炼SDK
         try:
@@ -41,17 +229,24 @@ class AudioTranscriber:
             raise
         
         self.sample_rate = sample_rate
+        self.use_vad = use_vad
+        self.model = model
+        self.language_hints = language_hints
+        self.transcript_cache = transcript_cache
+        self.vad = VoiceActivityDetector(sample_rate=sample_rate)
+        # 最近一次文件转录的语音时间轴，用于把识别时间换算回原始音频时间
+        self.last_speech_timeline: Optional[SpeechTimeline] = None
         log_with_timestamp(f"AudioTranscriber初始化完成，采样率: {self.sample_rate}Hz")
     
-    def transcribe_audio_file(self, audio_file_path: str) -> List[Tuple[float, str]]:
+    def transcribe_audio_file(self, audio_file_path: str) -> List[TranscriptSegment]:
         """
-        转录音频文件，返回带时间戳的文本列表
+        转录音频文件，返回带媒体时间的转录片段
         
         Args:
             audio_file_path: 音频文件路径
             
         Returns:
-            识别出的文本列表，每个元素为(时间戳, 文本)的元组
+            转录片段列表，句子和词的开始/结束时间均为原始音频中的时间（秒）
         """
         log_with_timestamp(f"开始转录音频文件: {audio_file_path}")
         
@@ -66,39 +261,31 @@ class AudioTranscriber:
         
         class TranscriptionCallback(self.RecognitionCallback):
             def __init__(self):
-                self.transcriptions = []
-                self.start_time = time.time()
+                self.transcriptions: List[TranscriptSegment] = []
                 
             def on_open(self) -> None:
                 log_with_timestamp('开始转录音频流...')
-                self.start_time = time.time()
                 
             def on_close(self) -> None:
                 log_with_timestamp('音频转录流关闭.')
                 
             def on_event(self, result: self.RecognitionResult) -> None:
                 sentence = result.get_sentence()
-                if sentence and 'text' in sentence:
-                    # 计算相对时间戳
-                    timestamp = time.time() - self.start_time
-                    self.transcriptions.append((timestamp, sentence['text']))
-                    log_with_timestamp(f'[{timestamp:.2f}s] 识别结果: {sentence["text"]}')
-                elif sentence:
+                if not sentence or 'text' not in sentence:
                     log_with_timestamp(f"收到空结果或不完整结果: {sentence}")
-                else:
-                    log_with_timestamp("收到空的识别结果")
-        
+                    return
+                # 时间取识别结果中的音频时间，而不是回调到达的时间；中间结果不保留
+                segment = TranscriptSegment.from_sentence(sentence)
+                if segment.is_final:
+                    self.transcriptions.append(segment)
+                    log_with_timestamp(f'[{segment.begin:.2f}s-{segment.end:.2f}s] 识别结果: {segment.text}')
         callback = TranscriptionCallback()
+        self.last_speech_timeline = None
         
         try:
             # 创建识别器实例
             log_with_timestamp("创建识别器实例...")
-            recognition = self.Recognition(
-                model='paraformer-realtime-v2',
-                format='pcm',
-                sample_rate=self.sample_rate,
-                callback=callback
-            )
+            recognition = self.create_recognition(callback)
             
             # 启动识别
             log_with_timestamp("启动识别器...")
@@ -106,7 +293,7 @@ class AudioTranscriber:
             
             # 读取音频文件并分块发送（模拟流式处理）
             log_with_timestamp("开始发送音频数据...")
-            self._send_audio_chunks(recognition, audio_file_path)
+            self.last_speech_timeline = self._send_audio_chunks(recognition, audio_file_path)
             
             # 增加30秒暂停，确保识别器有足够时间处理所有音频数据
             log_with_timestamp("等待30秒以确保识别器完成处理...")
@@ -116,13 +303,59 @@ class AudioTranscriber:
             recognition.stop()
             
             log_with_timestamp(f"转录完成，共识别出 {len(callback.transcriptions)} 条结果")
-            return callback.transcriptions
+            return self._to_media_time(callback.transcriptions)
             
         except Exception as e:
             log_with_timestamp(f"转录过程中发生错误: {e}")
-            return callback.transcriptions  # 返回已识别的部分结果
+            return self._to_media_time(callback.transcriptions)  # 返回已识别的部分结果
     
-    def _send_audio_chunks(self, recognition, audio_file_path: str, chunk_size: int = 3200):
+    def _to_media_time(self, segments: List[TranscriptSegment]) -> List[TranscriptSegment]:
+        """把只含语音片段的音频时间换算回原始音频时间"""
+        if self.last_speech_timeline is None:
+            return segments
+        return [segment.map_time(self.last_speech_timeline.to_source_time) for segment in segments]
+    
+    def _filter_speech(self, pcm_data: bytes, sample_rate: int, channels: int) -> Tuple[bytes, Optional[SpeechTimeline]]:
+        """
+        语音活动检测，只保留语音片段
+        
+        Args:
+            pcm_data: 16位PCM数据
+            sample_rate: 采样率
+            channels: 声道数
+            
+        Returns:
+            (语音PCM数据, 语音时间轴)，未启用检测时时间轴为None
+        """
+        if not self.use_vad:
+            return pcm_data, None
+        
+        vad = self.vad if self.vad.sample_rate == sample_rate else VoiceActivityDetector(sample_rate=sample_rate)
+        segments = vad.detect_pcm(pcm_data, channels=channels)
+        timeline = SpeechTimeline(segments)
+        total_duration = len(pcm_data) / float(sample_rate * channels * 2)
+        log_with_timestamp(
+            f"语音活动检测: 共 {len(segments)} 个语音片段，语音时长 {timeline.speech_duration:.1f}秒 / "
+            f"总时长 {total_duration:.1f}秒"
+        )
+        return slice_pcm(pcm_data, segments, sample_rate, channels), timeline
+    
+    def _send_pcm(self, recognition, pcm_data: bytes, chunk_size: int) -> Tuple[int, int]:
+        """分块发送PCM数据，返回(块数, 字节数)"""
+        bytes_sent = 0
+        chunks_sent = 0
+        for start in range(0, len(pcm_data), chunk_size):
+            audio_data = pcm_data[start:start + chunk_size]
+            recognition.send_audio_frame(audio_data)
+            bytes_sent += len(audio_data)
+            chunks_sent += 1
+            
+            # 每发送50个块打印一次进度
+            if chunks_sent % 50 == 0:
+                log_with_timestamp(f"已发送 {chunks_sent} 个数据块，共 {bytes_sent} 字节")
+        return chunks_sent, bytes_sent
+    
+    def _send_audio_chunks(self, recognition, audio_file_path: str, chunk_size: int = 3200) -> Optional[SpeechTimeline]:
         """
         分块发送音频数据
         
@@ -130,6 +363,9 @@ class AudioTranscriber:
             recognition: 识别器实例
             audio_file_path: 音频文件路径
             chunk_size: 每块音频数据大小
+            
+        Returns:
+            语音时间轴，未做语音活动检测时为None
         """
         log_with_timestamp(f"开始分块发送音频数据，文件: {audio_file_path}, 块大小: {chunk_size}")
         
@@ -137,37 +373,32 @@ class AudioTranscriber:
         if audio_file_path.lower().endswith('.wav'):
             log_with_timestamp("检测到WAV格式文件，使用WAV处理方法")
             # 处理WAV文件
-            self._send_wav_chunks(recognition, audio_file_path, chunk_size)
+            return self._send_wav_chunks(recognition, audio_file_path, chunk_size)
         else:
             log_with_timestamp("检测到非WAV格式文件，直接处理PCM数据")
-            # 处理PCM文件
+            # 处理PCM文件（16位单声道，采样率与初始化参数一致）
             try:
                 with open(audio_file_path, 'rb') as audio_file:
-                    bytes_sent = 0
-                    chunks_sent = 0
-                    while True:
-                        audio_data = audio_file.read(chunk_size)
-                        if not audio_data:
-                            break
-                        recognition.send_audio_frame(audio_data)
-                        bytes_sent += len(audio_data)
-                        chunks_sent += 1
-                        # 每发送100个块或每5秒打印一次进度
-                        if chunks_sent % 100 == 0:
-                            log_with_timestamp(f"已发送 {chunks_sent} 个数据块，共 {bytes_sent} 字节")
-                    log_with_timestamp(f"音频数据发送完成，总计发送 {chunks_sent} 个块，{bytes_sent} 字节")
+                    pcm_data = audio_file.read()
+                pcm_data, timeline = self._filter_speech(pcm_data, self.sample_rate, 1)
+                chunks_sent, bytes_sent = self._send_pcm(recognition, pcm_data, chunk_size)
+                log_with_timestamp(f"音频数据发送完成，总计发送 {chunks_sent} 个块，{bytes_sent} 字节")
+                return timeline
             except Exception as e:
                 log_with_timestamp(f"发送音频数据时发生错误: {e}")
                 raise
     
-    def _send_wav_chunks(self, recognition, wav_file_path: str, chunk_size: int = 3200):
+    def _send_wav_chunks(self, recognition, wav_file_path: str, chunk_size: int = 3200) -> Optional[SpeechTimeline]:
         """
-        分块发送WAV音频数据
+        分块发送WAV音频数据，启用语音活动检测时只发送语音片段
         
         Args:
             recognition: 识别器实例
             wav_file_path: WAV音频文件路径
             chunk_size: 每块音频数据大小
+            
+        Returns:
+            语音时间轴，未做语音活动检测时为None
         """
         log_with_timestamp(f"开始处理WAV文件: {wav_file_path}")
         
@@ -181,44 +412,318 @@ class AudioTranscriber:
                 
                 log_with_timestamp(f"WAV文件信息 - 声道数: {channels}, 采样宽度: {sample_width}字节, 采样率: {frame_rate}Hz, 帧数: {n_frames}")
                 
-                # 检查采样率
-                if frame_rate != self.sample_rate:
-                    log_with_timestamp(f"警告: 音频采样率不匹配，期望 {self.sample_rate}Hz，实际 {frame_rate}Hz")
-                
-                # 计算每个块的帧数（WAV文件每个样本2字节）
-                frames_per_chunk = chunk_size // 2
-                bytes_sent = 0
-                chunks_sent = 0
-                
-                # 读取并发送音频数据
-                while True:
-                    audio_data = wav_file.readframes(frames_per_chunk)
-                    if not audio_data:
-                        break
-                    recognition.send_audio_frame(audio_data)
-                    bytes_sent += len(audio_data)
-                    chunks_sent += 1
-                    
-                    # 每发送50个块打印一次进度
-                    if chunks_sent % 50 == 0:
-                        log_with_timestamp(f"WAV处理进度 - 已发送 {chunks_sent} 个块，共 {bytes_sent} 字节")
-                
-                log_with_timestamp(f"WAV文件处理完成，总计发送 {chunks_sent} 个块，{bytes_sent} 字节")
+                # 格式与识别器不一致时用ffmpeg转为单声道16位PCM，不发送错误采样率的音频
+                if frame_rate != self.sample_rate or channels != 1 or sample_width != 2:
+                    log_with_timestamp(
+                        f"音频格式不匹配，期望 {self.sample_rate}Hz 单声道16位，"
+                        f"实际 {frame_rate}Hz {channels}声道{sample_width * 8}位，重采样后发送"
+                    )
+                    pcm_data = None
+                else:
+                    pcm_data = wav_file.readframes(n_frames)
+            
+            if pcm_data is None:
+                pcm_data = b"".join(stream_pcm_audio(wav_file_path, sample_rate=self.sample_rate, channels=1))
+                frame_rate, channels, sample_width = self.sample_rate, 1, 2
+            
+            timeline = None
+            if sample_width == 2:
+                pcm_data, timeline = self._filter_speech(pcm_data, frame_rate, channels)
+            
+            chunks_sent, bytes_sent = self._send_pcm(recognition, pcm_data, chunk_size)
+            log_with_timestamp(f"WAV文件处理完成，总计发送 {chunks_sent} 个块，{bytes_sent} 字节")
+            return timeline
                 
         except Exception as e:
             log_with_timestamp(f"处理WAV文件时发生错误: {e}")
             raise
     
-    def transcribe_audio_stream(self, audio_stream) -> List[Tuple[float, str]]:
+    def create_recognition(self, callback):
+        """
+        创建百炼实时语音识别器
+        
+        Args:
+            callback: 识别回调对象
+            
+        Returns:
+            识别器实例
+        """
+        kwargs = {}
+        if self.language_hints:
+            kwargs['language_hints'] = self.language_hints
+        return self.Recognition(
+            model=self.model,
+            format='pcm',
+            sample_rate=self.sample_rate,
+            callback=callback,
+            **kwargs
+        )
+    
+    def create_stream_session(self, on_sentence: Optional[Callable[[TranscriptSegment], None]] = None,
+                              recognition_factory: Optional[Callable[[object], object]] = None,
+                              emit_partial: bool = False,
+                              keep_segments: bool = True,
+                              use_vad: Optional[bool] = None) -> StreamingTranscriptionSession:
         """
-        转录实时音频流（预留接口）
+        创建流式识别会话
         
         Args:
-            audio_stream: 音频流数据
+            on_sentence: 句子回调
+            recognition_factory: 识别器工厂，为None时使用百炼实时语音识别
+            emit_partial: 是否回调中间结果
+            keep_segments: 是否保存识别出的句子供stop返回
+            use_vad: 是否只把语音送去识别，为None时按初始化参数；送入的音频已只含语音时应关闭
             
         Returns:
-            识别出的文本列表
+            流式识别会话
         """
-        # 这个方法可以用于实时音频流处理
-        # 实现会类似于示例中的流式处理方式
-        raise NotImplementedError("实时音频流处理暂未实现")
\ No newline at end of file
+        return StreamingTranscriptionSession(
+            recognition_factory or self.create_recognition,
+            on_sentence=on_sentence,
+            sample_rate=self.sample_rate,
+            emit_partial=emit_partial,
+            keep_segments=keep_segments,
+            vad=self.vad if (self.use_vad if use_vad is None else use_vad) else None
+        )
+    
+    def transcribe_media_file(self, media_path: str,
+                              on_sentence: Optional[Callable[[TranscriptSegment], None]] = None,
+                              max_chunk_seconds: Optional[float] = None,
+                              max_concurrent: int = 4) -> List[TranscriptSegment]:
+        """
+        转录视频或音频文件：ffmpeg重采样后的PCM直接从管道送入识别，
+        不写中间WAV文件，提取音频的同时开始识别。
+        分块转录时边解码边规划分块，已完整的分块立即提交识别；
+        启用转录缓存时按文件内容查询缓存，命中则不再解码和调用语音识别
+        
+        Args:
+            media_path: 视频或音频文件路径
+            on_sentence: 句子回调，每识别出一句话调用一次
+            max_chunk_seconds: 分块转录时每块的最大跨度（秒），为None时整段顺序转录
+            max_concurrent: 分块转录的最大并发数
+            
+        Returns:
+            转录片段列表，时间为媒体中的时间（秒）
+        """
+        log_with_timestamp(f"开始转录媒体文件: {media_path}")
+        if not os.path.exists(media_path):
+            log_with_timestamp(f"错误: 媒体文件不存在: {media_path}")
+            return []
+        pcm_stream = stream_pcm_audio(media_path, sample_rate=self.sample_rate, channels=1)
+        if max_chunk_seconds:
+            # 各分块单独按PCM内容命中缓存
+            return self.transcribe_pcm_stream_chunked(
+                pcm_stream, max_chunk_seconds=max_chunk_seconds,
+                max_concurrent=max_concurrent, on_sentence=on_sentence
+            )
+        if self.transcript_cache is None:
+            return self.transcribe_audio_stream(pcm_stream, on_sentence=on_sentence)
+        
+        cache_key = media_cache_key(media_path, self.model, self.language_hints, self.sample_rate,
+                                    vad_params=self.vad.params() if self.use_vad else None)
+        cached = self.transcript_cache.get(cache_key)
+        if cached is not None:
+            log_with_timestamp(f"转录缓存命中，跳过音频提取和语音识别，共 {len(cached)} 条结果")
+            if on_sentence is not None:
+                for segment in cached:
+                    on_sentence(segment)
+            return cached
+        
+        session = self.create_stream_session(on_sentence=on_sentence)
+        completed = False
+        try:
+            for pcm_data in pcm_stream:
+                session.feed(pcm_data)
+            completed = True
+        except Exception as e:
+            log_with_timestamp(f"转录媒体文件时发生错误: {e}")
+        finally:
+            segments = session.stop()
+        if completed and session.error_count == 0:
+            self.transcript_cache.put(cache_key, segments)
+        log_with_timestamp(f"媒体文件转录完成，共识别出 {len(segments)} 条结果")
+        return segments
+    
+    def transcribe_pcm_chunked(self, pcm_data: bytes, max_chunk_seconds: float = 60.0,
+                               max_concurrent: int = 4,
+                               on_sentence: Optional[Callable[[TranscriptSegment], None]] = None) -> List[TranscriptSegment]:
+        """
+        分块并发转录长录音：在语音活动检测得到的停顿处分块，只送语音片段，
+        多个分块并发识别后换算回原始时间并合并，分块边界处的重复句子去重
+        
+        Args:
+            pcm_data: 16kHz单声道16位PCM数据
+            max_chunk_seconds: 每个分块在原始音频中的最大跨度（秒）
+            max_concurrent: 最大并发识别数
+            on_sentence: 句子回调，合并完成后按时间顺序调用
+            
+        Returns:
+            转录片段列表，时间为原始音频中的时间（秒）
+        """
+        return self.transcribe_pcm_stream_chunked([pcm_data], max_chunk_seconds=max_chunk_seconds,
+                                                  max_concurrent=max_concurrent, on_sentence=on_sentence)
+    
+    def transcribe_pcm_stream_chunked(self, pcm_stream: Iterable[bytes], max_chunk_seconds: float = 60.0,
+                                      max_concurrent: int = 4,
+                                      on_sentence: Optional[Callable[[TranscriptSegment], None]] = None) -> List[TranscriptSegment]:
+        """
+        边解码边分块转录：PCM数据块到达后按检测窗口做语音活动检测和分块规划，
+        已完整的分块立即提交识别，不必等整段音频解码完成；
+        检测窗口末尾可能还在延续的分块留到下一个窗口重新规划
+        
+        Args:
+            pcm_stream: 16kHz单声道16位PCM数据块的可迭代对象
+            max_chunk_seconds: 每个分块在原始音频中的最大跨度（秒）
+            max_concurrent: 最大并发识别数
+            on_sentence: 句子回调，合并完成后按时间顺序调用
+            
+        Returns:
+            转录片段列表，时间为原始音频中的时间（秒）
+        """
+        bytes_per_second = self.sample_rate * 2
+        # 窗口末尾这段时间内结束的分块可能被截断，留到下一个窗口
+        guard_seconds = 2.0
+        window_bytes = int((2 * max_chunk_seconds + guard_seconds) * self.sample_rate) * 2
+        buffer = bytearray()
+        base_bytes = 0
+        total_bytes = 0
+        chunk_count = 0
+        futures = []
+        
+        def transcribe_chunk(chunk_pcm, timeline):
+            segments = self.transcribe_pcm(chunk_pcm, use_vad=False)
+            return [segment.map_time(timeline.to_source_time) for segment in segments]
+        
+        def plan(window: bytes, final: bool, executor) -> int:
+            """规划窗口内的分块并提交已完整的分块，返回可以丢弃的窗口前部字节数"""
+            nonlocal chunk_count
+            window_seconds = len(window) / float(bytes_per_second)
+            base_seconds = base_bytes / float(bytes_per_second)
+            chunks = plan_transcription_chunks(self.vad.detect_pcm(window), max_chunk_seconds=max_chunk_seconds)
+            cut_seconds = window_seconds if final else window_seconds - guard_seconds
+            for chunk in chunks:
+                if not final and chunk.end > window_seconds - guard_seconds:
+                    cut_seconds = min(cut_seconds, chunk.start)
+                    break
+                timeline = SpeechTimeline([
+                    SpeechSegment(segment.start + base_seconds, segment.end + base_seconds)
+                    for segment in chunk.segments
+                ])
+                chunk_pcm = slice_pcm(window, chunk.segments, self.sample_rate)
+                futures.append(executor.submit(transcribe_chunk, chunk_pcm, timeline))
+                chunk_count += 1
+            return int(cut_seconds * self.sample_rate) * 2
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrent)) as executor:
+            for pcm_data in pcm_stream:
+                buffer.extend(pcm_data)
+                total_bytes += len(pcm_data)
+                while len(buffer) >= window_bytes:
+                    cut = plan(bytes(buffer[:window_bytes]), False, executor)
+                    del buffer[:cut]
+                    base_bytes += cut
+            if buffer:
+                plan(bytes(buffer), True, executor)
+            chunk_results = [future.result() for future in futures]
+        
+        log_with_timestamp(
+            f"音频时长 {total_bytes / float(bytes_per_second):.1f}秒，"
+            f"划分为 {chunk_count} 个分块，最大并发 {max_concurrent}"
+        )
+        if chunk_count == 0:
+            log_with_timestamp("未检测到语音，跳过识别")
+            return []
+        
+        segments = merge_chunk_transcripts(chunk_results)
+        if on_sentence is not None:
+            for segment in segments:
+                on_sentence(segment)
+        log_with_timestamp(f"分块转录完成，共识别出 {len(segments)} 条结果")
+        return segments
+    
+    def transcribe_pcm(self, pcm_data: bytes,
+                       on_sentence: Optional[Callable[[TranscriptSegment], None]] = None,
+                       chunk_duration: float = 0.1,
+                       use_vad: Optional[bool] = None) -> List[TranscriptSegment]:
+        """
+        转录完整的16kHz单声道16位PCM数据，启用转录缓存时相同内容只识别一次；
+        启用语音活动检测时只把语音片段送去识别
+        
+        Args:
+            pcm_data: 16位PCM数据，采样率与初始化参数一致
+            on_sentence: 句子回调，命中缓存时对缓存中的每个句子调用
+            chunk_duration: 送入识别器的数据块时长（秒）
+            use_vad: 是否做语音活动检测，为None时按初始化参数；数据已只含语音时应关闭
+            
+        Returns:
+            转录片段列表，时间为PCM数据中的时间（秒）
+        """
+        use_vad = self.use_vad if use_vad is None else use_vad
+        cache_key = None
+        if self.transcript_cache is not None:
+            cache_key = transcript_cache_key([pcm_data], self.model, self.language_hints, self.sample_rate,
+                                             vad_params=self.vad.params() if use_vad else None)
+            cached = self.transcript_cache.get(cache_key)
+            if cached is not None:
+                log_with_timestamp(f"转录缓存命中，跳过语音识别，共 {len(cached)} 条结果")
+                if on_sentence is not None:
+                    for segment in cached:
+                        on_sentence(segment)
+                return cached
+        
+        timeline = None
+        if use_vad:
+            speech_segments = self.vad.detect_pcm(pcm_data)
+            timeline = SpeechTimeline(speech_segments)
+            log_with_timestamp(
+                f"语音活动检测: 共 {len(speech_segments)} 个语音片段，语音时长 {timeline.speech_duration:.1f}秒 / "
+                f"总时长 {len(pcm_data) / float(self.sample_rate * 2):.1f}秒"
+            )
+            pcm_data = slice_pcm(pcm_data, speech_segments, self.sample_rate)
+            if on_sentence is not None:
+                callback = on_sentence
+                on_sentence = lambda segment: callback(segment.map_time(timeline.to_source_time))
+        
+        chunk_size = max(2, int(self.sample_rate * chunk_duration) * 2)
+        session = self.create_stream_session(on_sentence=on_sentence, use_vad=False)
+        completed = False
+        try:
+            for start in range(0, len(pcm_data), chunk_size):
+                session.feed(pcm_data[start:start + chunk_size])
+            completed = True
+        except Exception as e:
+            log_with_timestamp(f"转录PCM数据时发生错误: {e}")
+        finally:
+            segments = session.stop()
+        if timeline is not None:
+            segments = [segment.map_time(timeline.to_source_time) for segment in segments]
+        
+        # 只缓存完整且识别过程中没有出错的结果，重试时不会拿到残缺结果
+        if cache_key is not None and completed and session.error_count == 0:
+            self.transcript_cache.put(cache_key, segments)
+        log_with_timestamp(f"PCM转录完成，共识别出 {len(segments)} 条结果")
+        return segments
+    
+    def transcribe_audio_stream(self, audio_stream: Iterable[bytes],
+                                on_sentence: Optional[Callable[[TranscriptSegment], None]] = None) -> List[TranscriptSegment]:
+        """
+        转录实时音频流
+        
+        Args:
+            audio_stream: 16kHz单声道16位PCM数据块的可迭代对象
+            on_sentence: 句子回调，每识别出一句话调用一次
+            
+        Returns:
+            转录片段列表，时间为音频流中的时间（秒）
+        """
+        session = self.create_stream_session(on_sentence=on_sentence)
+        try:
+            for pcm_data in audio_stream:
+                session.feed(pcm_data)
+        except Exception as e:
+            log_with_timestamp(f"流式转录过程中发生错误: {e}")
+        finally:
+            segments = session.stop()
+        
+        log_with_timestamp(f"流式转录完成，共识别出 {len(segments)} 条结果")
+        return segments
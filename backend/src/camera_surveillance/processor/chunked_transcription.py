@@ -0,0 +1,105 @@
+import re
+from dataclasses import dataclass
+from typing import List
+from datetime import datetime
+
+from ..transcript import TranscriptSegment
+from .vad import SpeechSegment, SpeechTimeline
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+@dataclass
+class TranscriptionChunk:
+    """转录分块，由若干语音片段组成，片段时间为原始音频中的时间（秒）"""
+    index: int
+    segments: List[SpeechSegment]
+
+    @property
+    def start(self) -> float:
+        return self.segments[0].start
+
+    @property
+    def end(self) -> float:
+        return self.segments[-1].end
+
+    @property
+    def timeline(self) -> SpeechTimeline:
+        """分块内拼接后的时间到原始音频时间的换算"""
+        return SpeechTimeline(self.segments)
+
+def plan_transcription_chunks(speech_segments: List[SpeechSegment], max_chunk_seconds: float = 60.0,
+                              overlap_seconds: float = 1.0) -> List[TranscriptionChunk]:
+    """
+    在语音停顿处把长录音划分为转录分块
+    相邻语音片段依次并入当前分块，跨度超过上限时在停顿处开始新分块；
+    单个语音片段超过上限时强制切分，切分处前后保留重叠，合并结果时去重
+
+    Args:
+        speech_segments: 语音活动检测得到的语音片段，按时间顺序排列
+        max_chunk_seconds: 每个分块在原始音频中的最大跨度（秒）
+        overlap_seconds: 强制切分时相邻分块的重叠时长（秒）
+
+    Returns:
+        转录分块列表
+    """
+    step = max(max_chunk_seconds - overlap_seconds, max_chunk_seconds / 2.0)
+    pieces = []
+    for segment in speech_segments:
+        start = segment.start
+        while segment.end - start > max_chunk_seconds:
+            pieces.append(SpeechSegment(start, start + max_chunk_seconds))
+            start += step
+        pieces.append(SpeechSegment(start, segment.end))
+
+    chunks: List[TranscriptionChunk] = []
+    current: List[SpeechSegment] = []
+    for piece in pieces:
+        if current and piece.end - current[0].start > max_chunk_seconds:
+            chunks.append(TranscriptionChunk(len(chunks), current))
+            current = []
+        current.append(piece)
+    if current:
+        chunks.append(TranscriptionChunk(len(chunks), current))
+    return chunks
+
+def _normalize_text(text: str) -> str:
+    """去掉标点和空白，用于比较分块边界处的重复句子"""
+    return re.sub(r"[\s，。！？、,.!?;；:：]", "", text)
+
+def _is_duplicate(previous: TranscriptSegment, segment: TranscriptSegment) -> bool:
+    """判断两个时间重叠的句子是否为分块重叠区域中的同一句话"""
+    overlap = min(previous.end, segment.end) - max(previous.begin, segment.begin)
+    if overlap <= 0:
+        return False
+    shorter = min(previous.end - previous.begin, segment.end - segment.begin)
+    if overlap < 0.5 * shorter:
+        return False
+    a, b = _normalize_text(previous.text), _normalize_text(segment.text)
+    return bool(a) and bool(b) and (a in b or b in a)
+
+def merge_chunk_transcripts(chunk_results: List[List[TranscriptSegment]]) -> List[TranscriptSegment]:
+    """
+    合并各分块的转录结果，时间需已换算为原始音频时间
+    按开始时间排序，分块边界处时间重叠且文本重复的句子只保留较完整的一条
+
+    Args:
+        chunk_results: 按分块顺序排列的转录结果
+
+    Returns:
+        合并后的转录片段列表
+    """
+    merged: List[TranscriptSegment] = []
+    candidates = sorted(
+        (segment for result in chunk_results for segment in result),
+        key=lambda segment: (segment.begin, segment.end)
+    )
+    for segment in candidates:
+        if merged and _is_duplicate(merged[-1], segment):
+            if len(_normalize_text(segment.text)) > len(_normalize_text(merged[-1].text)):
+                merged[-1] = segment
+            continue
+        merged.append(segment)
+    return merged
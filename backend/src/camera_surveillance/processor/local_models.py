@@ -1,30 +1,79 @@
 import asyncio
 import concurrent.futures
 from abc import ABC, abstractmethod
-from typing import Optional, List, Tuple
+from typing import AsyncIterator, Optional, List, Tuple
 import time
 from datetime import datetime
 import os
 import sys
+import importlib.util
+
+from ..metrics import MODEL_INFERENCE_SECONDS, MODEL_BATCH_SECONDS
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-# 尝试导入必要的库，处理可能的依赖问题
-try:
+# 检查必要的库是否安装；ultralytics和torch导入耗时可达数秒，加载模型时才导入，不拖慢服务启动
+_MISSING_DEPENDENCIES = [name for name in ("ultralytics", "cv2", "torch") if importlib.util.find_spec(name) is None]
+DEPENDENCIES_AVAILABLE = not _MISSING_DEPENDENCIES
+if not DEPENDENCIES_AVAILABLE:
+    print(f"警告: 无法导入必要的依赖库: {', '.join(_MISSING_DEPENDENCIES)}")
+
+def _import_model_dependencies():
+    """
+    导入模型依赖库
+    
+    Returns:
+        (YOLO类, torch模块)
+    """
     from ultralytics import YOLO
-    import cv2
     import torch
-    DEPENDENCIES_AVAILABLE = True
-except ImportError as e:
-    print(f"警告: 无法导入必要的依赖库: {e}")
-    DEPENDENCIES_AVAILABLE = False
+    return YOLO, torch
 
 def log_with_timestamp(message: str):
     """带时间戳的日志输出函数"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
 
+class VotingPolicy:
+    """
+    多帧投票策略：至少required_true帧判为True时结论为True，
+    剩余未完成的帧即使全部为True也达不到要求时结论为False
+    """
+    
+    def __init__(self, required_true: int = 1):
+        """
+        初始化投票策略
+        
+        Args:
+            required_true: 结论为True所需的True帧数，1表示任一帧为True即可
+        """
+        if required_true < 1:
+            raise ValueError("required_true必须大于0")
+        self.required_true = required_true
+    
+    @classmethod
+    def first_true(cls) -> "VotingPolicy":
+        """任一帧为True即判定为True"""
+        return cls(required_true=1)
+    
+    def decide(self, true_count: int, pending_count: int) -> Optional[bool]:
+        """
+        根据已完成的结果判断是否已能得出结论
+        
+        Args:
+            true_count: 已完成且结果为True的帧数
+            pending_count: 尚未完成的帧数
+            
+        Returns:
+            True或False表示结论已确定，None表示需要等待更多结果
+        """
+        if true_count >= self.required_true:
+            return True
+        if true_count + pending_count < self.required_true:
+            return False
+        return None
+
 class BaseModelInterface(ABC):
     """本地模型接口基类"""
     
@@ -63,6 +112,7 @@ class BaseModelInterface(ABC):
         """
         loop = asyncio.get_event_loop()
         tasks = []
+        start_time = time.perf_counter()
         
         # 创建并发任务
         for image_path in image_paths:
@@ -75,6 +125,9 @@ class BaseModelInterface(ABC):
         
         # 等待所有任务完成
         results = await asyncio.gather(*tasks, return_exceptions=True)
+        MODEL_BATCH_SECONDS.observe(
+            time.perf_counter() - start_time, model=type(self).__name__, batch_size=len(image_paths)
+        )
         
         # 组合结果
         processed_results = []
@@ -87,6 +140,77 @@ class BaseModelInterface(ABC):
         
         return processed_results
     
+    async def process_images_as_completed(self, image_paths: List[str]) -> AsyncIterator[Tuple[str, Optional[bool]]]:
+        """
+        并行处理多个图像，按完成顺序逐个返回结果
+        调用方提前结束迭代时取消尚未开始的任务，释放线程池
+        
+        Args:
+            image_paths: 图像文件路径列表
+            
+        Yields:
+            (图像路径, 处理结果)
+        """
+        loop = asyncio.get_running_loop()
+        pending = {
+            loop.run_in_executor(self.executor, self._process_image_sync, image_path): image_path
+            for image_path in image_paths
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    image_path = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        log_with_timestamp(f"处理图像 {image_path} 时出错: {e}")
+                        result = None
+                    yield image_path, result
+        finally:
+            # 已在运行的推理无法中断，排队中的任务直接取消
+            for future in pending:
+                future.cancel()
+    
+    async def evaluate_images(self, image_paths: List[str],
+                              policy: Optional[VotingPolicy] = None) -> Tuple[bool, List[Tuple[str, Optional[bool]]]]:
+        """
+        按投票策略判定多帧结果，结论确定后立即返回并取消剩余任务
+        
+        Args:
+            image_paths: 图像文件路径列表
+            policy: 投票策略，默认任一帧为True即判定为True
+            
+        Returns:
+            (结论, 已完成的处理结果列表)
+        """
+        policy = policy or VotingPolicy.first_true()
+        results = []
+        true_count = 0
+        verdict = policy.decide(0, len(image_paths))
+        if verdict is not None:
+            return verdict, results
+        
+        start_time = time.perf_counter()
+        iterator = self.process_images_as_completed(image_paths)
+        try:
+            async for image_path, result in iterator:
+                results.append((image_path, result))
+                if result is True:
+                    true_count += 1
+                verdict = policy.decide(true_count, len(image_paths) - len(results))
+                if verdict is not None:
+                    break
+        finally:
+            await iterator.aclose()
+        MODEL_BATCH_SECONDS.observe(
+            time.perf_counter() - start_time, model=type(self).__name__, batch_size=len(image_paths)
+        )
+        
+        if len(results) < len(image_paths):
+            log_with_timestamp(f"已根据 {len(results)}/{len(image_paths)} 帧得出结论: {verdict}，取消剩余任务")
+        return bool(verdict), results
+    
     def _process_image_sync(self, image_path: str) -> Optional[bool]:
         """
         同步处理单个图像的包装函数
@@ -105,6 +229,7 @@ class BaseModelInterface(ABC):
             
             # 记录处理时间
             processing_time = end_time - start_time
+            MODEL_INFERENCE_SECONDS.observe(processing_time, model=type(self).__name__)
             log_with_timestamp(f"处理图像 {image_path} 耗时: {processing_time:.2f}秒")
             
             return result
@@ -112,10 +237,25 @@ class BaseModelInterface(ABC):
             log_with_timestamp(f"处理图像 {image_path} 时出错: {e}")
             return None
     
+    def warm_up(self) -> bool:
+        """
+        用空白图像执行一次推理，提前完成推理设备和模型的初始化，避免第一次检测时等待
+        
+        Returns:
+            模型已加载并完成预热时返回True，模型未加载时返回False
+        """
+        import numpy as np
+        model = getattr(self, 'model', None)
+        if model is None:
+            return False
+        model(np.zeros((640, 640, 3), dtype=np.uint8), device=getattr(self, 'device', None), verbose=False)
+        return True
+    
     def __del__(self):
         """析构函数，关闭线程池"""
         if hasattr(self, 'executor'):
-            self.executor.shutdown(wait=True)
+            # 提前得出结论后可能仍有推理在运行，最后一个引用可能在线程池自己的线程中释放，不能等待线程结束
+            self.executor.shutdown(wait=False, cancel_futures=True)
 
 class AntiRollingModel(BaseModelInterface):
     """防遛确认模型A"""
@@ -151,6 +291,7 @@ class AntiRollingModel(BaseModelInterface):
 
         """加载模型"""
         try:
+            YOLO, torch = _import_model_dependencies()
             # 根据系统自动判断用mps还是gpu还是cpu
             if torch.backends.mps.is_available():
                 self.device = "mps"
@@ -273,6 +414,7 @@ class RemoveRollingModel(BaseModelInterface):
     def _load_model(self):
         """加载模型"""
         try:
+            YOLO, torch = _import_model_dependencies()
             # 根据系统自动判断用mps还是gpu还是cpu
             if torch.backends.mps.is_available():
                 self.device = "mps"
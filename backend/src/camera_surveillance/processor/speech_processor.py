@@ -1,13 +1,17 @@
-import requests
 import os
 import time
+import wave
 import logging
-from typing import List, Tuple
+import tempfile
+from typing import Callable, Iterable, List, Optional
 from pathlib import Path
 from datetime import datetime
 from http import HTTPStatus
-from dashscope.audio.asr import Recognition, Transcription
-import json
+
+from .audio_transcriber import StreamingTranscriptionSession
+from .transcript_cache import TranscriptCache, transcript_cache_key
+from .vad import VoiceActivityDetector, SpeechTimeline, extract_speech_wav
+from ..transcript import TranscriptSegment
 
 def log_with_timestamp(message: str):
     """带时间戳的日志输出函数"""
@@ -20,13 +24,16 @@ def log_with_timestamp(message: str):
 class SpeechProcessor:
     """语音处理器，集成百炼语音识别服务"""
     
-    def __init__(self, model: str = 'paraformer-realtime-v2', sample_rate: int = 16000):
+    def __init__(self, model: str = 'paraformer-realtime-v2', sample_rate: int = 16000, use_vad: bool = True,
+                 transcript_cache: Optional[TranscriptCache] = None):
         """
         初始化语音处理器
         
         Args:
             model: 语音识别模型名称
             sample_rate: 音频采样率，默认16000Hz
+            use_vad: 是否在识别前做语音活动检测，只识别语音片段
+            transcript_cache: 转录缓存，相同音频内容只识别一次
         """
         # 导入百炼SDK
         try:
@@ -41,17 +48,23 @@ class SpeechProcessor:
         
         self.model = model
         self.sample_rate = sample_rate
+        self.use_vad = use_vad
+        self.language_hints = ['zh', 'en']  # 支持中英文混合识别
+        self.transcript_cache = transcript_cache
+        self.vad = VoiceActivityDetector(sample_rate=sample_rate)
+        # 最近一次文件转录的语音时间轴，用于把识别时间换算回原始音频时间
+        self.last_speech_timeline: Optional[SpeechTimeline] = None
         log_with_timestamp(f"SpeechProcessor初始化完成，模型: {self.model}，采样率: {self.sample_rate}Hz")
     
-    def transcribe_file(self, audio_file_path: str) -> List[Tuple[float, str]]:
+    def transcribe_file(self, audio_file_path: str) -> List[TranscriptSegment]:
         """
-        转录音频文件，返回带时间戳的文本列表
+        转录音频文件，返回带媒体时间的转录片段
         
         Args:
             audio_file_path: 音频文件路径
             
         Returns:
-            识别出的文本列表，每个元素为(时间戳, 文本)的元组
+            转录片段列表，句子和词的开始/结束时间均为原始音频中的时间（秒）
         """
         log_with_timestamp(f"开始转录音频文件: {audio_file_path}")
         
@@ -60,43 +73,67 @@ class SpeechProcessor:
             log_with_timestamp(f"错误: 音频文件不存在: {audio_file_path}")
             return []
         
+        # 相同音频内容和识别参数命中缓存时不再调用语音识别
+        cache_key = self._cache_key(audio_file_path)
+        if cache_key is not None:
+            cached = self.transcript_cache.get(cache_key)
+            if cached is not None:
+                log_with_timestamp(f"转录缓存命中，跳过语音识别，共 {len(cached)} 条结果")
+                return cached
+        
+        speech_file_path = None
+        self.last_speech_timeline = None
         try:
-            task_response = Transcription.async_call(
-                model='paraformer-v2',
-                file_urls=[
-                    'https://test-workspace-wl.oss-cn-hangzhou.aliyuncs.com/voice/extracted_audio.wav?Expires=1763206898&OSSAccessKeyId=TMP.3Krxew4PmqeU7DxGWAouXnxb77PyfgXcmfXBYAvFLvMST3eEoNiH9ysUA9AFtu5NGkuCLYQJGUeBsjSH7aZn6bGq8rLpkZ&Signature=9BMIP6bSzqY7lq86ifbNaceD448%3D'],
-                language_hints=['zh', 'en']  # “language_hints”只支持paraformer-v2模型
-            )
-
-            transcribe_response = Transcription.wait(task=task_response.output.task_id)
-            if transcribe_response.status_code == HTTPStatus.OK:
-                log_with_timestamp(json.dumps(transcribe_response.output, indent=4, ensure_ascii=False))
-                log_with_timestamp('transcription done!')
-
-            # 创建识别器实例
+            # 语音活动检测，只把语音片段送去识别
+            if self.use_vad:
+                # 同一文件可能被同时转录，语音片段文件名需唯一
+                root, ext = os.path.splitext(audio_file_path)
+                fd, speech_file_path = tempfile.mkstemp(prefix=f"{os.path.basename(root)}_speech_", suffix=ext,
+                                                        dir=os.path.dirname(audio_file_path) or None)
+                os.close(fd)
+                timeline = extract_speech_wav(audio_file_path, speech_file_path, self.vad)
+                if timeline is None:
+                    os.remove(speech_file_path)
+                    speech_file_path = None
+                elif not timeline.segments:
+                    log_with_timestamp('未检测到语音，跳过识别')
+                    return []
+                else:
+                    self.last_speech_timeline = timeline
+            
+            # 创建识别器实例，百炼SDK导入耗时较长，使用时才导入
+            from dashscope.audio.asr import Recognition
             recognition = Recognition(
                 model=self.model,
                 format='wav',  # 根据实际文件格式调整
                 sample_rate=self.sample_rate,
-                language_hints=['zh', 'en'],  # 支持中英文混合识别
+                language_hints=self.language_hints,
                 callback=None
             )
             
-            result = recognition.call(audio_file_path)
+            result = recognition.call(speech_file_path or audio_file_path)
             
             if result.status_code == HTTPStatus.OK:
                 log_with_timestamp('识别成功')
-                # 获取完整的句子结果
-                full_result = result.get_sentence()
-                log_with_timestamp(f'speech_result: {result}')
-                log_with_timestamp(f'full_result: {full_result}')
-                if full_result and 'text' in full_result:
-                    # 模拟时间戳，实际应用中可以从result中获取更精确的时间戳
-                    timestamp = 0.0
-                    return [(timestamp, full_result['text'])]
-                else:
+                # 获取完整的句子结果，时间为识别音频中的毫秒偏移
+                sentences = result.get_sentence() or []
+                if isinstance(sentences, dict):
+                    sentences = [sentences]
+                segments = [
+                    TranscriptSegment.from_sentence(sentence, is_final=True)
+                    for sentence in sentences if sentence.get('text')
+                ]
+                if not segments:
                     log_with_timestamp('未找到识别结果')
                     return []
+                # 只识别了语音片段时，把时间换算回原始音频时间
+                if self.last_speech_timeline is not None:
+                    segments = [segment.map_time(self.last_speech_timeline.to_source_time) for segment in segments]
+                for segment in segments:
+                    log_with_timestamp(f'[{segment.begin:.2f}s-{segment.end:.2f}s] 识别结果: {segment.text}')
+                if cache_key is not None:
+                    self.transcript_cache.put(cache_key, segments)
+                return segments
             else:
                 log_with_timestamp(f'识别失败: {result.message}')
                 return []
@@ -104,8 +141,36 @@ class SpeechProcessor:
         except Exception as e:
             log_with_timestamp(f"转录过程中发生错误: {e}")
             return []
+        finally:
+            if speech_file_path and os.path.exists(speech_file_path):
+                os.remove(speech_file_path)
     
-    def transcribe_url(self, audio_url: str, temp_filename: str = 'temp_audio.wav') -> List[Tuple[float, str]]:
+    def _cache_key(self, audio_file_path: str) -> Optional[str]:
+        """
+        计算音频文件的转录缓存键，键值取自WAV中的PCM数据，与文件名和文件头无关；
+        启用语音活动检测时包含检测参数，缓存的片段时间经过语音时间轴换算
+        
+        Args:
+            audio_file_path: 音频文件路径
+            
+        Returns:
+            缓存键，未启用缓存或不是16位WAV文件时返回None
+        """
+        if self.transcript_cache is None:
+            return None
+        try:
+            with wave.open(audio_file_path, 'rb') as wav_file:
+                params = wav_file.getparams()
+                pcm_data = wav_file.readframes(params.nframes)
+        except (wave.Error, EOFError):
+            return None
+        if params.sampwidth != 2:
+            return None
+        return transcript_cache_key([pcm_data], self.model, self.language_hints,
+                                    params.framerate, params.nchannels,
+                                    vad_params=self.vad.params() if self.use_vad else None)
+    
+    def transcribe_url(self, audio_url: str, temp_filename: str = 'temp_audio.wav') -> List[TranscriptSegment]:
         """
         从URL转录音频，支持在线音频处理
         
@@ -120,6 +185,7 @@ class SpeechProcessor:
         
         try:
             # 下载音频文件到临时位置
+            import requests
             r = requests.get(audio_url)
             with open(temp_filename, 'wb') as f:
                 f.write(r.content)
@@ -143,23 +209,46 @@ class SpeechProcessor:
                 os.remove(temp_filename)
             return []
     
-    def transcribe_stream(self, audio_stream) -> List[Tuple[float, str]]:
+    def transcribe_stream(self, audio_stream: Iterable[bytes],
+                          on_sentence: Optional[Callable[[TranscriptSegment], None]] = None) -> List[TranscriptSegment]:
         """
-        转录实时音频流（预留接口）
+        转录实时音频流
         
         Args:
-            audio_stream: 音频流数据
+            audio_stream: 16位PCM数据块的可迭代对象，采样率与初始化参数一致
+            on_sentence: 句子回调，每识别出一句话调用一次
             
         Returns:
-            识别出的文本列表
+            转录片段列表，时间为音频流中的时间（秒）；启用语音活动检测时只把语音送去识别
         """
-        # 这个方法可以用于实时音频流处理
-        # 实现会类似于示例中的流式处理方式
-        raise NotImplementedError("实时音频流处理暂未实现")
+        from dashscope.audio.asr import Recognition
+        session = StreamingTranscriptionSession(
+            lambda callback: Recognition(
+                model=self.model,
+                format='pcm',
+                sample_rate=self.sample_rate,
+                language_hints=self.language_hints,
+                callback=callback
+            ),
+            on_sentence=on_sentence,
+            sample_rate=self.sample_rate,
+            vad=self.vad if self.use_vad else None
+        )
+        try:
+            for pcm_data in audio_stream:
+                session.feed(pcm_data)
+        except Exception as e:
+            log_with_timestamp(f"流式转录过程中发生错误: {e}")
+        finally:
+            segments = session.stop()
+        
+        return segments
 
 
 # 示例使用
 if __name__ == "__main__":
+    import requests
+    
     # 创建语音处理器实例
     processor = SpeechProcessor()
 
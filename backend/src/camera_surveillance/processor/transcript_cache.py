@@ -0,0 +1,179 @@
+import json
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+
+from ..transcript import TranscriptSegment
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+def transcript_cache_key(pcm_chunks: Iterable[bytes], model: str,
+                         language_hints: Optional[List[str]] = None,
+                         sample_rate: int = 16000, channels: int = 1,
+                         vad_params: Optional[Dict[str, Any]] = None, source: str = "pcm") -> str:
+    """
+    计算转录缓存键：归一化PCM内容与识别参数的SHA-256
+
+    Args:
+        pcm_chunks: 归一化后的16位PCM数据块
+        model: 语音识别模型名称
+        language_hints: 语言提示
+        sample_rate: PCM采样率
+        channels: PCM声道数
+        vad_params: 识别前做语音活动检测时的检测参数，缓存的片段时间经过语音时间轴换算，参数不同时结果不同
+        source: 数据块的内容类型，"pcm"为归一化PCM，"media"为未解码的媒体文件内容
+
+    Returns:
+        十六进制缓存键
+    """
+    digest = hashlib.sha256()
+    params = {
+        "model": model,
+        "language_hints": list(language_hints or []),
+        "sample_rate": sample_rate,
+        "channels": channels
+    }
+    if vad_params is not None:
+        params["vad"] = vad_params
+    if source != "pcm":
+        params["source"] = source
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    for chunk in pcm_chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def media_cache_key(media_path: str, model: str,
+                    language_hints: Optional[List[str]] = None,
+                    sample_rate: int = 16000,
+                    vad_params: Optional[Dict[str, Any]] = None,
+                    block_size: int = 1024 * 1024) -> str:
+    """
+    计算媒体文件的转录缓存键：按文件内容而不是解码后的PCM计算，
+    不需要先完整解码音频就能查询缓存，未命中时可以边解码边识别
+
+    Args:
+        media_path: 视频或音频文件路径
+        model: 语音识别模型名称
+        language_hints: 语言提示
+        sample_rate: 识别使用的PCM采样率
+        vad_params: 识别前做语音活动检测时的检测参数
+        block_size: 读取文件的块大小（字节）
+
+    Returns:
+        十六进制缓存键
+    """
+    with open(media_path, "rb") as media_file:
+        blocks = iter(lambda: media_file.read(block_size), b"")
+        return transcript_cache_key(blocks, model, language_hints, sample_rate,
+                                    vad_params=vad_params, source="media")
+
+class TranscriptCache:
+    """
+    基于SQLite的转录结果缓存
+    相同音频内容和识别参数只识别一次；总大小超过上限时按最近访问时间淘汰
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        初始化转录缓存
+
+        Args:
+            db_path: SQLite数据库文件路径
+            max_bytes: 缓存内容总大小上限（字节）
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        # 转录在线程池中执行，连接在线程间共享，由锁保护
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            "key TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_accessed ON transcripts (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[List[TranscriptSegment]]:
+        """
+        查询缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            转录片段列表，未命中时返回None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE transcripts SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return [TranscriptSegment.from_dict(item) for item in json.loads(row[0])]
+
+    def put(self, key: str, segments: List[TranscriptSegment]):
+        """
+        写入缓存，超出大小上限时淘汰最久未访问的条目
+
+        Args:
+            key: 缓存键
+            segments: 转录片段列表
+        """
+        value = json.dumps([segment.to_dict() for segment in segments], ensure_ascii=False)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            log_with_timestamp(f"转录结果 {size} 字节超过缓存上限，不写入缓存")
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """按最近访问时间淘汰条目，直到总大小不超过上限，调用方需持有锁"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM transcripts ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        log_with_timestamp(f"转录缓存淘汰 {evicted} 条，当前大小 {total} 字节")
+
+    @property
+    def total_bytes(self) -> int:
+        """缓存内容总大小（字节）"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,402 @@
+import wave
+import threading
+from collections import deque
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from datetime import datetime
+
+if TYPE_CHECKING:
+    import numpy as np
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+@dataclass
+class SpeechSegment:
+    """语音片段，时间为原始音频中的时间（秒）"""
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+class SpeechTimeline:
+    """
+    语音时间轴
+    只把语音片段拼接后送去识别时，识别结果的时间是拼接后音频中的时间，
+    通过该时间轴换算回原始音频中的时间
+    """
+
+    def __init__(self, segments: List[SpeechSegment]):
+        """
+        初始化语音时间轴
+
+        Args:
+            segments: 按时间顺序排列的语音片段
+        """
+        self.segments = segments
+        self._offsets = []
+        offset = 0.0
+        for segment in segments:
+            self._offsets.append(offset)
+            offset += segment.duration
+        self.speech_duration = offset
+
+    def add(self, start: float, end: float):
+        """
+        追加一段语音，与上一段首尾相接时合并，用于流式检测时逐帧扩展时间轴
+
+        Args:
+            start: 原始音频中的开始时间（秒），不早于已有片段
+            end: 原始音频中的结束时间（秒）
+        """
+        if self.segments and abs(start - self.segments[-1].end) < 1e-9:
+            self.segments[-1].end = end
+        else:
+            self._offsets.append(self.speech_duration)
+            self.segments.append(SpeechSegment(start, end))
+        self.speech_duration += end - start
+
+    def to_source_time(self, speech_time: float, is_end: bool = False) -> float:
+        """
+        把拼接后音频中的时间换算为原始音频中的时间
+
+        Args:
+            speech_time: 拼接后音频中的时间（秒）
+            is_end: 是否为结束时间，恰好落在两个片段交界处时结束时间归前一个片段
+
+        Returns:
+            原始音频中的时间（秒）
+        """
+        if not self.segments:
+            return speech_time
+        if is_end:
+            index = max(0, bisect_left(self._offsets, speech_time) - 1)
+        else:
+            index = max(0, bisect_right(self._offsets, speech_time) - 1)
+        segment = self.segments[index]
+        return min(segment.end, segment.start + max(0.0, speech_time - self._offsets[index]))
+
+class VoiceActivityDetector:
+    """基于短时能量和过零率的语音活动检测器，按帧向量化计算"""
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30,
+                 energy_margin_db: float = 12.0, min_energy_db: float = -50.0,
+                 zcr_range: Tuple[float, float] = (0.02, 0.45),
+                 min_speech_ms: int = 200, min_silence_ms: int = 400, padding_ms: int = 200):
+        """
+        初始化语音活动检测器
+
+        Args:
+            sample_rate: 采样率
+            frame_ms: 分析帧长（毫秒）
+            energy_margin_db: 语音能量需高出背景噪声的分贝数
+            min_energy_db: 语音能量下限（dBFS）
+            zcr_range: 语音帧过零率范围，超出范围的低能量帧视为噪声
+            min_speech_ms: 最短语音片段，更短的片段视为噪声丢弃
+            min_silence_ms: 最短静音间隔，更短的间隔与前后语音合并
+            padding_ms: 语音片段前后扩展的时长，避免切掉字头字尾
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = max(1, int(sample_rate * frame_ms / 1000))
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.zcr_range = zcr_range
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.min_silence_frames = max(1, int(min_silence_ms / frame_ms))
+        self.padding_frames = int(padding_ms / frame_ms)
+
+    def params(self) -> Dict[str, Any]:
+        """
+        影响检测结果的参数，用于转录缓存键：参数不同时语音片段和时间换算不同
+
+        Returns:
+            参数字典
+        """
+        return {
+            "sample_rate": self.sample_rate,
+            "frame_size": self.frame_size,
+            "energy_margin_db": self.energy_margin_db,
+            "min_energy_db": self.min_energy_db,
+            "zcr_range": list(self.zcr_range),
+            "min_speech_frames": self.min_speech_frames,
+            "min_silence_frames": self.min_silence_frames,
+            "padding_frames": self.padding_frames
+        }
+
+    def frame_features(self, samples: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        计算每帧的能量（dBFS）和过零率
+
+        Args:
+            samples: 单声道16位PCM采样
+
+        Returns:
+            (能量数组, 过零率数组)
+        """
+        import numpy as np
+        n_frames = len(samples) // self.frame_size
+        if n_frames == 0:
+            return np.zeros(0), np.zeros(0)
+        frames = samples[:n_frames * self.frame_size].astype(np.float32).reshape(n_frames, self.frame_size) / 32768.0
+
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        energy_db = 20.0 * np.log10(np.maximum(rms, 1e-10))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return energy_db, zcr
+
+    def _smooth(self, is_speech: "np.ndarray") -> List[Tuple[int, int]]:
+        """合并短静音、丢弃短语音并扩展边界，返回帧区间列表"""
+        import numpy as np
+        # 找出连续语音帧区间
+        padded = np.concatenate(([False], is_speech, [False]))
+        changes = np.flatnonzero(padded[1:] != padded[:-1])
+        runs = list(zip(changes[0::2], changes[1::2]))
+
+        merged = []
+        for start, end in runs:
+            if merged and start - merged[-1][1] < self.min_silence_frames:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+
+        n_frames = len(is_speech)
+        result = []
+        for start, end in merged:
+            if end - start < self.min_speech_frames:
+                continue
+            start = max(0, start - self.padding_frames)
+            end = min(n_frames, end + self.padding_frames)
+            if result and start <= result[-1][1]:
+                result[-1] = (result[-1][0], end)
+            else:
+                result.append((start, end))
+        return result
+
+    def detect(self, samples: "np.ndarray") -> List[SpeechSegment]:
+        """
+        检测语音片段
+
+        Args:
+            samples: 单声道16位PCM采样
+
+        Returns:
+            语音片段列表，时间为原始音频中的时间
+        """
+        import numpy as np
+        energy_db, zcr = self.frame_features(samples)
+        if len(energy_db) == 0:
+            return []
+
+        # 以能量较低的帧估计背景噪声
+        noise_floor = float(np.percentile(energy_db, 10))
+        threshold = max(noise_floor + self.energy_margin_db, self.min_energy_db)
+        # 能量明显高于阈值的帧直接判为语音；接近阈值的帧还需要过零率落在语音范围内
+        strong = energy_db >= threshold + 6.0
+        weak = (energy_db >= threshold) & (zcr >= self.zcr_range[0]) & (zcr <= self.zcr_range[1])
+        is_speech = strong | weak
+
+        frame_seconds = self.frame_size / float(self.sample_rate)
+        return [
+            SpeechSegment(start * frame_seconds, end * frame_seconds)
+            for start, end in self._smooth(is_speech)
+        ]
+
+    def detect_pcm(self, pcm_data: bytes, channels: int = 1) -> List[SpeechSegment]:
+        """
+        检测16位PCM数据中的语音片段
+
+        Args:
+            pcm_data: 16位小端PCM数据
+            channels: 声道数，多声道时取平均
+
+        Returns:
+            语音片段列表
+        """
+        import numpy as np
+        samples = np.frombuffer(pcm_data[:len(pcm_data) - len(pcm_data) % (2 * channels)], dtype='<i2')
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return self.detect(samples)
+
+class StreamingSpeechGate:
+    """
+    流式语音门限，用于实时识别会话
+    增量送入单声道16位PCM，按帧判断语音，只放行确认的语音及其前后的缓冲音频；
+    背景噪声按最近一段时间的帧能量估计，放行的音频在原始流中的位置记录在语音时间轴中
+    """
+
+    def __init__(self, vad: VoiceActivityDetector, noise_window_ms: int = 10000, hangover_ms: int = 1000):
+        """
+        初始化流式语音门限
+
+        Args:
+            vad: 语音活动检测器，使用其帧长、能量阈值和平滑参数
+            noise_window_ms: 估计背景噪声的时间窗口
+            hangover_ms: 语音结束后继续放行的静音时长，识别器需要句尾静音来结束句子
+        """
+        self.vad = vad
+        self.frame_bytes = vad.frame_size * 2
+        self.frame_seconds = vad.frame_size / float(vad.sample_rate)
+        frame_ms = self.frame_seconds * 1000
+        self.hangover_frames = max(vad.min_silence_frames + vad.padding_frames, int(hangover_ms / frame_ms))
+        self.timeline = SpeechTimeline([])
+        self.passed_bytes = 0
+        self._energies = deque(maxlen=max(1, int(noise_window_ms / frame_ms)))
+        # 语音开始前的缓冲帧，确认语音后一起放行，避免切掉字头
+        self._preroll = deque(maxlen=max(1, vad.padding_frames))
+        # 尚未确认为语音的帧：[(帧序号, 数据), ...]
+        self._candidate = []
+        self._candidate_speech = 0
+        self._candidate_gap = 0
+        self._open = False
+        self._silence_run = 0
+        self._frame_index = 0
+        self._remainder = b""
+        # 时间轴在送入线程中扩展，在识别回调线程中换算
+        self._lock = threading.Lock()
+
+    def _threshold(self) -> float:
+        """按最近的帧能量估计背景噪声，得到语音能量阈值"""
+        import numpy as np
+        if len(self._energies) < 10:
+            return self.vad.min_energy_db
+        noise_floor = float(np.percentile(self._energies, 10))
+        return max(noise_floor + self.vad.energy_margin_db, self.vad.min_energy_db)
+
+    def process(self, pcm_data: bytes) -> bytes:
+        """
+        送入一段PCM数据，返回应送去识别的音频
+
+        Args:
+            pcm_data: 单声道16位PCM数据
+
+        Returns:
+            放行的PCM数据，可能为空
+        """
+        import numpy as np
+        data = self._remainder + pcm_data
+        n_frames = len(data) // self.frame_bytes
+        self._remainder = data[n_frames * self.frame_bytes:]
+        if n_frames == 0:
+            return b""
+        energy_db, zcr = self.vad.frame_features(np.frombuffer(data[:n_frames * self.frame_bytes], dtype='<i2'))
+        self._energies.extend(energy_db.tolist())
+        threshold = self._threshold()
+        strong = energy_db >= threshold + 6.0
+        weak = (energy_db >= threshold) & (zcr >= self.vad.zcr_range[0]) & (zcr <= self.vad.zcr_range[1])
+        is_speech = strong | weak
+
+        passed = []
+        for i in range(n_frames):
+            frame = (self._frame_index, data[i * self.frame_bytes:(i + 1) * self.frame_bytes])
+            self._frame_index += 1
+            if self._open:
+                passed.append(frame)
+                self._silence_run = 0 if is_speech[i] else self._silence_run + 1
+                if self._silence_run >= self.hangover_frames:
+                    self._open = False
+                continue
+            if is_speech[i]:
+                self._candidate.append(frame)
+                self._candidate_speech += 1
+                self._candidate_gap = 0
+                if self._candidate_speech >= self.vad.min_speech_frames:
+                    passed.extend(self._preroll)
+                    passed.extend(self._candidate)
+                    self._preroll.clear()
+                    self._reset_candidate()
+                    self._open = True
+                    self._silence_run = 0
+            elif self._candidate and self._candidate_gap < self.vad.min_silence_frames:
+                # 短暂的低能量帧仍计入待确认的语音
+                self._candidate.append(frame)
+                self._candidate_gap += 1
+            else:
+                # 待确认的语音太短，视为噪声，只保留最近的帧作为缓冲
+                self._preroll.extend(self._candidate)
+                self._preroll.append(frame)
+                self._reset_candidate()
+
+        with self._lock:
+            for index, _ in passed:
+                self.timeline.add(index * self.frame_seconds, (index + 1) * self.frame_seconds)
+        self.passed_bytes += len(passed) * self.frame_bytes
+        return b"".join(frame for _, frame in passed)
+
+    def _reset_candidate(self):
+        self._candidate = []
+        self._candidate_speech = 0
+        self._candidate_gap = 0
+
+    def to_source_time(self, speech_time: float, is_end: bool = False) -> float:
+        """把放行音频中的时间换算为原始流中的时间，见SpeechTimeline.to_source_time"""
+        with self._lock:
+            return self.timeline.to_source_time(speech_time, is_end)
+
+def slice_pcm(pcm_data: bytes, segments: List[SpeechSegment], sample_rate: int,
+              channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    按语音片段截取并拼接PCM数据
+
+    Args:
+        pcm_data: PCM数据
+        segments: 语音片段
+        sample_rate: 采样率
+        channels: 声道数
+        sample_width: 采样宽度（字节）
+
+    Returns:
+        拼接后的语音PCM数据
+    """
+    frame_bytes = channels * sample_width
+    parts = []
+    for segment in segments:
+        start = int(round(segment.start * sample_rate)) * frame_bytes
+        end = int(round(segment.end * sample_rate)) * frame_bytes
+        parts.append(pcm_data[start:end])
+    return b"".join(parts)
+
+def extract_speech_wav(src_path: str, dst_path: str,
+                       vad: Optional[VoiceActivityDetector] = None) -> Optional[SpeechTimeline]:
+    """
+    从WAV文件中截取语音片段，写入新的WAV文件
+
+    Args:
+        src_path: 原始WAV文件路径
+        dst_path: 输出WAV文件路径
+        vad: 语音活动检测器，为None时按文件采样率创建
+
+    Returns:
+        语音时间轴；文件不是16位WAV时返回None，表示未做语音检测
+    """
+    try:
+        with wave.open(src_path, 'rb') as wav_file:
+            params = wav_file.getparams()
+            pcm_data = wav_file.readframes(params.nframes)
+    except (wave.Error, EOFError) as e:
+        log_with_timestamp(f"无法读取WAV文件，跳过语音活动检测: {e}")
+        return None
+    if params.sampwidth != 2:
+        return None
+
+    if vad is None or vad.sample_rate != params.framerate:
+        vad = VoiceActivityDetector(sample_rate=params.framerate)
+    segments = vad.detect_pcm(pcm_data, channels=params.nchannels)
+    timeline = SpeechTimeline(segments)
+
+    total_duration = params.nframes / float(params.framerate) if params.framerate else 0.0
+    log_with_timestamp(
+        f"语音活动检测: 共 {len(segments)} 个语音片段，语音时长 {timeline.speech_duration:.1f}秒 / "
+        f"总时长 {total_duration:.1f}秒"
+    )
+
+    with wave.open(dst_path, 'wb') as out_file:
+        out_file.setparams(params)
+        out_file.writeframes(slice_pcm(pcm_data, segments, params.framerate, params.nchannels))
+    return timeline
@@ -1,41 +1,256 @@
 import os
-from typing import Optional, Dict, Any
+import re
+import time
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
 from pathlib import Path
 from datetime import datetime
 
+from ..frame_preprocessor import FramePreprocessor, PreprocessedImage
+from ..frame_quality import detect_number_region
+from ..metrics import VEHICLE_RECOGNITION_SECONDS
+
 def log_with_timestamp(message: str):
     """带时间戳的日志输出函数"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
 
-class VehicleNumberRecognizer:
-    """车辆编号识别器，使用阿里云视觉大模型"""
-    
-    def __init__(self):
-        """初始化车辆编号识别器"""
-        # 导入阿里云dashscope SDK
+@dataclass
+class RecognitionAttempt:
+    """单次车号识别尝试记录"""
+    backend: str
+    text: Optional[str]
+    confidence: float
+    elapsed: float
+    remote: bool = False
+    error: Optional[str] = None
+    accepted: bool = False  # 是否采用了该次结果
+
+def ctc_greedy_decode(output, charset: str) -> Tuple[str, float]:
+    """
+    CTC贪心解码
+
+    Args:
+        output: 文字识别模型输出，形状为(1, T, C)或(T, 1, C)
+        charset: 字符表，下标0为CTC空白符，不包含在字符表中
+
+    Returns:
+        (识别文本, 置信度)，置信度为输出字符概率的平均值
+    """
+    import numpy as np
+
+    logits = np.asarray(output, dtype=np.float32)
+    if logits.ndim == 3:
+        logits = logits[0] if logits.shape[0] == 1 else logits[:, 0, :]
+
+    # 输出为logits时先做softmax
+    if logits.min() < 0 or not np.allclose(logits.sum(axis=1), 1.0, atol=1e-3):
+        logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+        logits = logits / logits.sum(axis=1, keepdims=True)
+
+    indices = logits.argmax(axis=1)
+    probs = logits.max(axis=1)
+
+    chars = []
+    char_probs = []
+    previous = 0
+    for index, prob in zip(indices, probs):
+        if index != 0 and index != previous and index - 1 < len(charset):
+            chars.append(charset[index - 1])
+            char_probs.append(float(prob))
+        previous = index
+
+    if not chars:
+        return "", 0.0
+    return "".join(chars), float(np.mean(char_probs))
+
+class VehicleNumberBackend(ABC):
+    """车号识别后端接口基类"""
+
+    name = "base"
+    remote = False
+
+    @abstractmethod
+    def recognize(self, image_path: str, device_id: Optional[str] = None,
+                  region: Optional[Tuple[int, int, int, int]] = None) -> Tuple[Optional[str], float]:
+        """
+        识别图像中的车辆编号
+
+        Args:
+            image_path: 图像文件路径
+            device_id: 设备ID
+            region: 已知的车号区域（原图坐标）
+
+        Returns:
+            (车辆编号, 置信度)，未识别到时车辆编号为None
+        """
+        pass
+
+class LocalOCRBackend(VehicleNumberBackend):
+    """本地CPU文字识别后端，使用ONNX格式的CRNN/CTC文字识别模型"""
+
+    name = "local_ocr"
+    remote = False
+
+    def __init__(self, model_path: str, charset: str,
+                 input_height: int = 32, input_width: int = 320,
+                 number_pattern: Optional[str] = r"^[0-9A-Z]{4,10}$",
+                 num_threads: int = 1):
+        """
+        初始化本地文字识别后端
+
+        Args:
+            model_path: ONNX模型文件路径
+            charset: 字符表（按模型输出顺序，下标0为CTC空白符，不包含在字符表中）
+            input_height: 模型输入高度
+            input_width: 模型输入宽度
+            number_pattern: 车号格式校验正则，不匹配时置信度记为0
+            num_threads: 推理线程数
+        """
         try:
-            from dashscope import MultiModalConversation
-            self.MultiModalConversation = MultiModalConversation
+            import onnxruntime
         except ImportError:
-            log_with_timestamp("警告: 未安装dashscope库，请先安装: pip install dashscope")
+            log_with_timestamp("警告: 未安装onnxruntime库，请先安装: pip install onnxruntime")
             raise
-    
-    def recognize_vehicle_number(self, image_path: str) -> Optional[str]:
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        input_shape = self.session.get_inputs()[0].shape
+        # 输入通道数，动态维度时默认3通道
+        self.input_channels = input_shape[1] if len(input_shape) == 4 and isinstance(input_shape[1], int) else 3
+        self.charset = charset
+        self.input_height = input_height
+        self.input_width = input_width
+        self.number_pattern = re.compile(number_pattern) if number_pattern else None
+        log_with_timestamp(f"本地文字识别模型加载成功: {model_path}")
+
+    @classmethod
+    def from_files(cls, model_path: str, charset_path: str, **kwargs) -> "LocalOCRBackend":
         """
-        识别图像中的车辆编号
-        
+        从模型文件和字符表文件创建后端，字符表文件每行一个字符
+
         Args:
-            image_path: 图像文件路径
-            
+            model_path: ONNX模型文件路径
+            charset_path: 字符表文件路径
+
         Returns:
-            识别到的车辆编号，如果未识别到则返回None
+            本地文字识别后端
+        """
+        with open(charset_path, "r", encoding="utf-8") as f:
+            charset = "".join(line.rstrip("\r\n") for line in f if line.rstrip("\r\n"))
+        return cls(model_path, charset, **kwargs)
+
+    def _preprocess(self, image_path: str, region: Optional[Tuple[int, int, int, int]]):
+        """裁剪车号区域，缩放到模型输入尺寸并归一化"""
+        import cv2
+        import numpy as np
+
+        image = cv2.imread(image_path)
+        if image is None:
+            return None
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if region is None:
+            region = detect_number_region(gray)
+        if region is not None:
+            x, y, w, h = region
+            if w > 0 and h > 0:
+                image = image[y:y + h, x:x + w]
+
+        # 保持宽高比缩放到固定高度，右侧补零到固定宽度
+        height, width = image.shape[:2]
+        target_width = min(self.input_width, max(1, int(width * self.input_height / float(height))))
+        image = cv2.resize(image, (target_width, self.input_height), interpolation=cv2.INTER_LINEAR)
+        if self.input_channels == 1:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)[:, :, None]
+
+        tensor = np.zeros((self.input_height, self.input_width, image.shape[2]), dtype=np.float32)
+        tensor[:, :target_width, :] = (image.astype(np.float32) / 255.0 - 0.5) / 0.5
+        return tensor.transpose(2, 0, 1)[None, ...]
+
+    def recognize(self, image_path: str, device_id: Optional[str] = None,
+                  region: Optional[Tuple[int, int, int, int]] = None) -> Tuple[Optional[str], float]:
+        tensor = self._preprocess(image_path, region)
+        if tensor is None:
+            return None, 0.0
+
+        output = self.session.run(None, {self.input_name: tensor})[0]
+        text, confidence = ctc_greedy_decode(output, self.charset)
+        text = re.sub(r"[^0-9A-Za-z]", "", text).upper()
+        if not text:
+            return None, 0.0
+        if self.number_pattern is not None and not self.number_pattern.match(text):
+            return text, 0.0
+        return text, confidence
+
+class VLMBackend(VehicleNumberBackend):
+    """远程视觉大模型后端，使用阿里云qwen3-vl"""
+
+    name = "qwen3-vl"
+    remote = True
+
+    def __init__(self, preprocessor: Optional[FramePreprocessor] = None,
+                 model: str = 'qwen3-vl-8b-instruct'):
         """
+        初始化远程视觉大模型后端
+
+        Args:
+            preprocessor: 上传前的图像预处理器，为None时上传原图
+            model: 视觉大模型名称
+        """
+        # 导入阿里云dashscope SDK
+        try:
+            from dashscope import MultiModalConversation
+            self.MultiModalConversation = MultiModalConversation
+        except ImportError:
+            log_with_timestamp("警告: 未安装dashscope库，请先安装: pip install dashscope")
+            raise
+
+        self.preprocessor = preprocessor
+        self.model = model
+        # 上传统计，多个检测在线程池中同时识别，更新时持有锁
+        self.call_count = 0
+        self.total_uploaded_bytes = 0
+        self.last_upload: Optional[PreprocessedImage] = None
+        self._stats_lock = threading.Lock()
+
+    def _prepare_upload(self, image_path: str, device_id: Optional[str],
+                        region: Optional[Tuple[int, int, int, int]]) -> PreprocessedImage:
+        """预处理待上传图像，并记录上传字节数"""
+        upload = None
+        if self.preprocessor is not None:
+            try:
+                upload = self.preprocessor.prepare(image_path, device_id=device_id, region=region)
+            except Exception as e:
+                log_with_timestamp(f"预处理车号图像时出错，使用原图: {e}")
+        if upload is None:
+            size = os.path.getsize(image_path) if os.path.exists(image_path) else 0
+            upload = PreprocessedImage(image_path, size, size, is_original=True)
+
+        with self._stats_lock:
+            self.call_count += 1
+            self.total_uploaded_bytes += upload.uploaded_bytes
+            self.last_upload = upload
+        log_with_timestamp(
+            f"车号识别上传图像: {upload.uploaded_bytes} 字节（原图 {upload.original_bytes} 字节），"
+            f"尺寸: {upload.size}，裁剪区域: {upload.crop}"
+        )
+        return upload
+
+    def recognize(self, image_path: str, device_id: Optional[str] = None,
+                  region: Optional[Tuple[int, int, int, int]] = None) -> Tuple[Optional[str], float]:
+        upload = self._prepare_upload(image_path, device_id, region)
         try:
             # 构建图像路径
-            abs_image_path = Path(image_path).resolve()
+            abs_image_path = Path(upload.path).resolve()
             image_url = f"file://{abs_image_path}"
-            
+
             # 构建消息
             messages = [
                 {
@@ -46,17 +261,17 @@ class VehicleNumberRecognizer:
                     ]
                 }
             ]
-            
+
             # 调用阿里云视觉大模型
             response = self.MultiModalConversation.call(
                 # 从环境变量获取API KEY
                 api_key=os.getenv('DASHSCOPE_API_KEY'),
-                model='qwen3-vl-8b-instruct',  # 使用适当的视觉模型
+                model=self.model,
                 messages=messages
             )
 
             log_with_timestamp(f"vehicle response: {response}")
-            
+
             # 解析响应
             if response and "output" in response and "choices" in response["output"]:
                 content = response["output"]["choices"][0]["message"]["content"]
@@ -64,10 +279,136 @@ class VehicleNumberRecognizer:
                     text_result = content[0]["text"].strip()
                     # 如果模型返回"未识别"，则返回None
                     if text_result == "未识别" or "未识别" in text_result or not text_result:
-                        return None
-                    return text_result
-            
-            return None
+                        return None, 0.0
+                    return text_result, 1.0
+
+            return None, 0.0
+        finally:
+            # 清理预处理生成的上传文件
+            if not upload.is_original:
+                try:
+                    os.remove(upload.path)
+                except OSError:
+                    pass
+
+class VehicleNumberRecognizer:
+    """车辆编号识别器，优先使用本地文字识别，置信度不足时回退到阿里云视觉大模型"""
+
+    def __init__(self, preprocessor: Optional[FramePreprocessor] = None,
+                 local_backend: Optional[VehicleNumberBackend] = None,
+                 remote_backend: Optional[VehicleNumberBackend] = None,
+                 confidence_threshold: float = 0.85):
+        """
+        初始化车辆编号识别器
+
+        Args:
+            preprocessor: 上传前的图像预处理器，为None时上传原图
+            local_backend: 本地识别后端，为None时只使用远程识别
+            remote_backend: 远程识别后端，为None时创建默认的视觉大模型后端
+            confidence_threshold: 本地识别置信度阈值，低于该值时调用远程识别
+        """
+        if remote_backend is None:
+            try:
+                remote_backend = VLMBackend(preprocessor=preprocessor)
+            except ImportError:
+                # 没有本地后端时无法识别，保持原有行为直接抛出
+                if local_backend is None:
+                    raise
+                log_with_timestamp("远程视觉大模型不可用，仅使用本地文字识别")
+
+        self.local_backend = local_backend
+        self.remote_backend = remote_backend
+        self.confidence_threshold = confidence_threshold
+        # 最近完成的一次识别的尝试记录；并发识别时调用方应使用recognize_with_attempts的返回值
+        self.last_attempts: List[RecognitionAttempt] = []
+        self._attempts_lock = threading.Lock()
+
+    @property
+    def total_uploaded_bytes(self) -> int:
+        """远程识别累计上传字节数"""
+        return getattr(self.remote_backend, "total_uploaded_bytes", 0)
+
+    def _attempt(self, backend: VehicleNumberBackend, image_path: str, device_id: Optional[str],
+                 region: Optional[Tuple[int, int, int, int]]) -> RecognitionAttempt:
+        """调用单个后端并记录耗时"""
+        start_time = time.time()
+        try:
+            text, confidence = backend.recognize(image_path, device_id=device_id, region=region)
+            error = None
         except Exception as e:
-            log_with_timestamp(f"识别车辆编号时出错: {e}")
-            return None
\ No newline at end of file
+            text, confidence, error = None, 0.0, str(e)
+            log_with_timestamp(f"{backend.name} 识别车辆编号时出错: {e}")
+        attempt = RecognitionAttempt(
+            backend=backend.name,
+            text=text,
+            confidence=confidence,
+            elapsed=time.time() - start_time,
+            remote=backend.remote,
+            error=error
+        )
+        VEHICLE_RECOGNITION_SECONDS.observe(
+            attempt.elapsed,
+            backend="vlm" if backend.remote else backend.name,
+            outcome="error" if error else ("recognized" if text else "empty")
+        )
+        log_with_timestamp(
+            f"车号识别 [{attempt.backend}] 结果: {attempt.text}，置信度: {attempt.confidence:.2f}，"
+            f"耗时: {attempt.elapsed:.2f}秒"
+        )
+        return attempt
+
+    def recognize_with_attempts(self, image_path: str, device_id: Optional[str] = None,
+                                region: Optional[Tuple[int, int, int, int]] = None,
+                                allow_remote: bool = True) -> Tuple[Optional[str], List[RecognitionAttempt]]:
+        """
+        识别车辆编号并返回每次尝试的记录
+
+        Args:
+            image_path: 图像文件路径
+            device_id: 设备ID
+            region: 已知的车号区域（原图坐标）
+            allow_remote: 是否允许调用远程识别
+
+        Returns:
+            (车辆编号, 尝试记录列表)
+        """
+        attempts = []
+        accepted = None
+
+        if self.local_backend is not None:
+            attempt = self._attempt(self.local_backend, image_path, device_id, region)
+            attempts.append(attempt)
+            if attempt.text and attempt.confidence >= self.confidence_threshold:
+                accepted = attempt
+
+        if accepted is None and allow_remote and self.remote_backend is not None:
+            attempt = self._attempt(self.remote_backend, image_path, device_id, region)
+            attempts.append(attempt)
+            if attempt.text:
+                accepted = attempt
+            # 远程调用出错（如网络异常）时，退而使用本地低置信度结果
+            elif attempt.error and attempts[0].text and attempts[0].confidence > 0:
+                accepted = attempts[0]
+
+        with self._attempts_lock:
+            self.last_attempts = attempts
+        if accepted is None:
+            return None, attempts
+        accepted.accepted = True
+        return accepted.text, attempts
+
+    def recognize_vehicle_number(self, image_path: str, device_id: Optional[str] = None,
+                                 region: Optional[Tuple[int, int, int, int]] = None) -> Optional[str]:
+        """
+        识别图像中的车辆编号
+
+        Args:
+            image_path: 图像文件路径
+            device_id: 设备ID，用于选择预处理配置
+            region: 已知的车号区域（原图坐标）
+
+        Returns:
+            识别到的车辆编号，如果未识别到则返回None
+        """
+        vehicle_number, _ = self.recognize_with_attempts(image_path, device_id=device_id, region=region)
+        return vehicle_number
@@ -0,0 +1,91 @@
+import time
+import asyncio
+from typing import Any, Callable, Dict, Optional
+from datetime import datetime
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+# 组件状态：等待预热 / 预热中 / 就绪 / 依赖不可用（功能降级，不影响就绪） / 预热失败
+COMPONENT_STATES = ("pending", "warming", "ready", "unavailable", "failed")
+
+class ComponentUnavailable(Exception):
+    """组件依赖不可用，服务以降级方式运行，不影响就绪状态"""
+    pass
+
+class ReadinessTracker:
+    """
+    服务就绪状态
+    启动时逐个预热组件并记录状态和耗时，所有组件都已就绪或依赖不可用时服务就绪
+    """
+
+    def __init__(self):
+        """初始化就绪状态"""
+        self.started_at = time.time()
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.finished = False
+
+    def register(self, name: str):
+        """
+        登记需要预热的组件
+
+        Args:
+            name: 组件名称
+        """
+        self.components[name] = {"status": "pending", "duration_ms": None, "error": None}
+
+    async def warm_up(self, name: str, func: Callable[[], Any]) -> Optional[Any]:
+        """
+        在线程池中执行组件的预热函数，记录状态和耗时
+
+        Args:
+            name: 组件名称
+            func: 预热函数，抛出ComponentUnavailable表示依赖不可用，抛出其他异常表示预热失败
+
+        Returns:
+            预热函数的返回值，不可用或失败时返回None
+        """
+        if name not in self.components:
+            self.register(name)
+        component = self.components[name]
+        component["status"] = "warming"
+        start_time = time.perf_counter()
+        result = None
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(None, func)
+            component["status"] = "ready"
+        except ComponentUnavailable as e:
+            component["status"] = "unavailable"
+            component["error"] = str(e)
+        except Exception as e:
+            component["status"] = "failed"
+            component["error"] = str(e)
+        component["duration_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+        log_with_timestamp(
+            f"组件 {name} 预热{'完成' if component['status'] == 'ready' else '未完成'}，"
+            f"状态: {component['status']}，耗时 {component['duration_ms']}ms"
+            + (f"，原因: {component['error']}" if component["error"] else "")
+        )
+        return result
+
+    @property
+    def ready(self) -> bool:
+        """所有组件预热结束且没有失败的组件时为True"""
+        return self.finished and all(
+            component["status"] in ("ready", "unavailable") for component in self.components.values()
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        就绪状态快照，用于健康检查接口
+
+        Returns:
+            包含ready、uptime_seconds和各组件状态的字典
+        """
+        return {
+            "ready": self.ready,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "components": {name: dict(component) for name, component in self.components.items()}
+        }
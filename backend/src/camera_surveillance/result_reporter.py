@@ -1,30 +1,187 @@
-import json
+import time
 import asyncio
-from typing import List, Dict, Any
+from collections import deque
+from typing import Iterable, List, Dict, Any, Optional, Set, Tuple, Union
 from pathlib import Path
 from datetime import datetime
 
+from .result_store import ResultStore
+from .evidence_frames import EvidenceFrameStore
+from .serialization import JSON_CODEC, MessageCodec, send_encoded
+from .session_manager import real_device_id
+from .metrics import RESULTS_REPORTED, RESULT_FANOUT_SECONDS, RESULT_MESSAGES_DROPPED
+
 def log_with_timestamp(message: str):
     """带时间戳的日志输出函数"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
 
+# 慢客户端策略：发送队列满时丢弃新消息 / 用新消息替换队列中同类的旧消息 / 断开连接
+# 同一设备同类的结果是不同的检测，合并会丢失被替换的检测，只适合只关心最新结果的客户端
+SLOW_CONSUMER_POLICIES = ("drop", "coalesce", "disconnect")
+
+class ResultSubscriber:
+    """
+    结果订阅者，每个WebSocket连接一个有界发送队列，由独立的发送任务按顺序发送
+    某个客户端发送缓慢只会积压它自己的队列，不影响其他客户端和产生结果的处理流程
+    """
+    
+    def __init__(self, websocket, reporter: "ResultReporter", max_queue_size: int = 100,
+                 policy: str = "drop", codec: MessageCodec = JSON_CODEC):
+        """
+        初始化结果订阅者
+        
+        Args:
+            websocket: WebSocket连接对象
+            reporter: 所属的结果报告器，连接失效时从中移除
+            max_queue_size: 发送队列长度上限
+            policy: 队列满时的慢客户端策略，见SLOW_CONSUMER_POLICIES
+            codec: 客户端连接时协商的消息编码
+        """
+        self.websocket = websocket
+        self.codec = codec
+        self.reporter = reporter
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        # 队列元素为(合并键, 已序列化的消息)
+        self.queue: deque = deque()
+        self.dropped = 0
+        self.closed = False
+        # 重放历史结果期间暂停发送，保证历史结果先于新结果发出
+        self.held = False
+        # 订阅的设备ID和结果类型，None表示不按该维度过滤
+        self.device_ids: Optional[Set[str]] = None
+        self.types: Optional[Set[str]] = None
+        self._ready = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._send_loop())
+    
+    def offer(self, message: Union[str, bytes], key: Optional[Tuple] = None) -> bool:
+        """
+        把消息放入发送队列，不等待发送完成
+        
+        Args:
+            message: 按本连接编码序列化的消息
+            key: 合并键，coalesce策略下队列满时替换队列中合并键相同的旧消息
+            
+        Returns:
+            消息是否进入队列
+        """
+        if self.closed:
+            return False
+        if len(self.queue) >= self.max_queue_size:
+            if self.policy == "disconnect":
+                log_with_timestamp(f"客户端发送队列已满（{self.max_queue_size}条），断开连接")
+                self.reporter.remove_websocket_connection(self.websocket)
+                asyncio.get_running_loop().create_task(self._close_websocket())
+                RESULT_MESSAGES_DROPPED.inc(action="disconnected")
+                return False
+            if self.policy == "coalesce" and key is not None:
+                for index, (queued_key, _) in enumerate(self.queue):
+                    if queued_key == key:
+                        # 同类结果只保留最新的一条，位置保持不变
+                        self.queue[index] = (key, message)
+                        self.dropped += 1
+                        RESULT_MESSAGES_DROPPED.inc(action="coalesced")
+                        return True
+            self.dropped += 1
+            RESULT_MESSAGES_DROPPED.inc(action="dropped")
+            return False
+        self.queue.append((key, message))
+        self._ready.set()
+        return True
+    
+    def prepend(self, messages: List[Tuple[Optional[Tuple], Union[str, bytes]]]):
+        """
+        把重放的历史消息放到发送队列最前面，不受队列长度上限限制
+        
+        Args:
+            messages: [(合并键, 已序列化的消息), ...]，按发送顺序排列
+        """
+        if self.closed:
+            return
+        self.queue.extendleft(reversed(messages))
+        self.held = False
+        self._ready.set()
+    
+    async def _send_loop(self):
+        """按顺序发送队列中的消息，发送失败时移除连接"""
+        while True:
+            if self.held or not self.queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            _, message = self.queue.popleft()
+            try:
+                await send_encoded(self.websocket, message)
+            except Exception as e:
+                log_with_timestamp(f"发送结果到前端时出错: {e}")
+                # 移除失效的连接
+                self.reporter.remove_websocket_connection(self.websocket)
+                return
+    
+    async def _close_websocket(self):
+        """关闭被断开的慢客户端连接"""
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+    
+    def close(self):
+        """停止发送任务并丢弃未发送的消息"""
+        self.closed = True
+        self.queue.clear()
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
 class ResultReporter:
     """结果报告器，用于将处理结果回传给前端"""
     
-    def __init__(self):
-        """初始化结果报告器"""
-        self.websocket_connections = []
+    def __init__(self, max_queue_size: int = 100, slow_consumer_policy: str = "drop",
+                 store: Optional[ResultStore] = None,
+                 frame_store: Optional[EvidenceFrameStore] = None):
+        """
+        初始化结果报告器
+        
+        Args:
+            max_queue_size: 每个连接的发送队列长度上限
+            slow_consumer_policy: 发送队列满时的处理策略，drop丢弃新消息，
+                coalesce用新消息替换队列中同一设备同类的旧消息（被替换的检测结果丢失），disconnect断开连接
+            store: 结果存储，设置后每条结果先写入存储并带上序号seq再发送
+            frame_store: 证据帧存储，设置后结果中的frames为帧ID，通过/frames/{帧ID}获取，否则为帧文件路径
+        """
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"不支持的慢客户端策略: {slow_consumer_policy}")
+        self.max_queue_size = max_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.store = store
+        self.frame_store = frame_store
+        self.subscribers: Dict[Any, ResultSubscriber] = {}
+        # 主题到订阅者的索引：按设备ID、按结果类型，以及该维度不过滤的订阅者
+        self._by_device: Dict[str, Set[ResultSubscriber]] = {}
+        self._by_type: Dict[str, Set[ResultSubscriber]] = {}
+        self._any_device: Set[ResultSubscriber] = set()
+        self._any_type: Set[ResultSubscriber] = set()
     
-    def add_websocket_connection(self, websocket):
+    @property
+    def websocket_connections(self) -> List[Any]:
+        """当前连接的WebSocket列表"""
+        return list(self.subscribers)
+    
+    def add_websocket_connection(self, websocket, codec: MessageCodec = JSON_CODEC):
         """
-        添加WebSocket连接
+        添加WebSocket连接，需要在事件循环中调用
         
         Args:
             websocket: WebSocket连接对象
+            codec: 客户端连接时协商的消息编码
         """
-        if websocket not in self.websocket_connections:
-            self.websocket_connections.append(websocket)
+        if websocket not in self.subscribers:
+            subscriber = ResultSubscriber(
+                websocket, self, self.max_queue_size, self.slow_consumer_policy, codec
+            )
+            self.subscribers[websocket] = subscriber
+            # 新连接默认接收所有结果
+            self._index(subscriber)
     
     def remove_websocket_connection(self, websocket):
         """
@@ -33,27 +190,188 @@ class ResultReporter:
         Args:
             websocket: WebSocket连接对象
         """
-        if websocket in self.websocket_connections:
-            self.websocket_connections.remove(websocket)
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber is not None:
+            self._unindex(subscriber)
+            subscriber.close()
+    
+    def subscribe(self, websocket, device_ids: Optional[Iterable[str]] = None,
+                  types: Optional[Iterable[str]] = None) -> bool:
+        """
+        设置连接订阅的设备和结果类型，替换之前的订阅
+        
+        Args:
+            websocket: WebSocket连接对象
+            device_ids: 订阅的设备ID，为None或空时接收所有设备的结果；带时间戳后缀的ID按真实设备ID订阅
+            types: 订阅的结果类型，为None或空时接收所有类型的结果
+            
+        Returns:
+            连接是否存在
+        """
+        subscriber = self.subscribers.get(websocket)
+        if subscriber is None:
+            return False
+        self._unindex(subscriber)
+        subscriber.device_ids = set(real_device_id(device_id) for device_id in device_ids) if device_ids else None
+        subscriber.types = set(types) if types else None
+        self._index(subscriber)
+        return True
+    
+    def _index(self, subscriber: ResultSubscriber):
+        """把订阅者加入主题索引"""
+        if subscriber.device_ids is None:
+            self._any_device.add(subscriber)
+        else:
+            for device_id in subscriber.device_ids:
+                self._by_device.setdefault(device_id, set()).add(subscriber)
+        if subscriber.types is None:
+            self._any_type.add(subscriber)
+        else:
+            for result_type in subscriber.types:
+                self._by_type.setdefault(result_type, set()).add(subscriber)
+    
+    def _unindex(self, subscriber: ResultSubscriber):
+        """把订阅者从主题索引中移除"""
+        self._any_device.discard(subscriber)
+        self._any_type.discard(subscriber)
+        for device_id in subscriber.device_ids or ():
+            subscribers = self._by_device.get(device_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._by_device[device_id]
+        for result_type in subscriber.types or ():
+            subscribers = self._by_type.get(result_type)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._by_type[result_type]
+    
+    def _route(self, device_id: Optional[str], result_type: Optional[str]) -> Set[ResultSubscriber]:
+        """
+        查找应接收该结果的订阅者
+        
+        Args:
+            device_id: 结果所属设备，为None时不按设备过滤
+            result_type: 结果类型，为None时不按类型过滤
+            
+        Returns:
+            订阅者集合
+        """
+        if device_id is None:
+            by_device = set(self.subscribers.values())
+        else:
+            by_device = self._any_device | self._by_device.get(device_id, set())
+        if result_type is None:
+            return by_device
+        return by_device & (self._any_type | self._by_type.get(result_type, set()))
+    
+    def send_to_connection(self, websocket, data: Dict[str, Any]) -> bool:
+        """
+        通过连接的发送队列向单个客户端发送消息，与广播消息共用发送顺序
+        
+        Args:
+            websocket: WebSocket连接对象
+            data: 消息数据
+            
+        Returns:
+            消息是否进入队列
+        """
+        subscriber = self.subscribers.get(websocket)
+        if subscriber is None:
+            return False
+        return subscriber.offer(subscriber.codec.encode(data))
+    
+    async def replay(self, websocket, after_seq: int, limit: int = 1000) -> int:
+        """
+        重放连接断开期间错过的结果，按订阅过滤后放在发送队列最前面
+        需要在添加连接和设置订阅之后、下一次上报之前调用，之后上报的结果已进入发送队列，不会重复
+        
+        Args:
+            websocket: WebSocket连接对象
+            after_seq: 客户端收到的最后一条结果的序号
+            limit: 最多重放的条数，超出时只重放最近的结果
+            
+        Returns:
+            重放的结果条数
+        """
+        subscriber = self.subscribers.get(websocket)
+        if subscriber is None or self.store is None:
+            return 0
+        # 在第一次await之前确定重放范围，之后上报的结果已直接进入发送队列
+        until_seq = self.store.last_seq
+        if until_seq <= after_seq:
+            return 0
+        subscriber.held = True
+        results = []
+        try:
+            loop = asyncio.get_running_loop()
+            # 等待后台线程写完已追加的结果
+            await loop.run_in_executor(None, self.store.flush)
+            after_seq = max(after_seq, until_seq - limit)
+            results, _ = await loop.run_in_executor(None, lambda: self.store.query(
+                after_seq=after_seq,
+                until_seq=until_seq,
+                device_ids=sorted(subscriber.device_ids) if subscriber.device_ids else None,
+                result_types=sorted(subscriber.types) if subscriber.types else None,
+                limit=limit
+            ))
+        finally:
+            subscriber.prepend([
+                ((result.get("type"), result.get("device_id")), subscriber.codec.encode(result))
+                for result in results
+            ])
+        log_with_timestamp(f"重放 {len(results)} 条序号 {after_seq} 之后的结果")
+        return len(results)
     
     async def report_result(self, result_data: Dict[str, Any]):
         """
-        报告处理结果到所有连接的前端
+        报告处理结果到订阅了该设备和结果类型的前端
+        只把消息放入各连接的发送队列，不等待发送完成；
+        设备ID统一为真实设备ID后再保存和分发，同一设备各次连接和上传的结果可以按设备订阅和查询
         
         Args:
             result_data: 结果数据
         """
-        # 转换为JSON格式
-        message = json.dumps(result_data, ensure_ascii=False)
+        start_time = time.perf_counter()
+        RESULTS_REPORTED.inc(type=result_data.get("type"))
+        device_id = result_data.get("device_id")
+        if isinstance(device_id, str):
+            result_data = dict(result_data, device_id=real_device_id(device_id))
+        if self.store is not None:
+            # 不等待写入，序号即为客户端重连时重放的游标
+            result_data = dict(result_data, seq=self.store.append(result_data))
         
-        # 发送到所有连接的客户端
-        for websocket in self.websocket_connections:
-            try:
-                await websocket.send_text(message)
-            except Exception as e:
-                log_with_timestamp(f"发送结果到前端时出错: {e}")
-                # 移除失效的连接
-                self.remove_websocket_connection(websocket)
+        subscribers = self._route(result_data.get("device_id"), result_data.get("type"))
+        if not subscribers:
+            RESULT_FANOUT_SECONDS.observe(time.perf_counter() - start_time)
+            return
+        
+        # 每种编码只序列化一次，使用同一编码的订阅者共用序列化结果
+        messages: Dict[str, Union[str, bytes]] = {}
+        key = (result_data.get("type"), result_data.get("device_id"))
+        
+        # 放入订阅者的发送队列，_route返回新集合，断开连接修改索引不影响遍历
+        for subscriber in subscribers:
+            message = messages.get(subscriber.codec.name)
+            if message is None:
+                message = messages[subscriber.codec.name] = subscriber.codec.encode(result_data)
+            subscriber.offer(message, key)
+        RESULT_FANOUT_SECONDS.observe(time.perf_counter() - start_time)
+    
+    def _frame_refs(self, frame_paths: List[str]) -> List[str]:
+        """
+        把帧文件路径转换为结果中引用帧的方式：有证据帧存储时为帧ID，否则为原路径
+        登记证据帧会读取、哈希并复制帧文件，调用方应在线程池中创建结果，不要在事件循环中直接调用
+        """
+        if self.frame_store is None:
+            return frame_paths
+        frame_ids = []
+        for frame_path in frame_paths:
+            frame_id = self.frame_store.register(frame_path)
+            if frame_id is not None:
+                frame_ids.append(frame_id)
+        return frame_ids
     
     def create_vehicle_number_result(self, device_id: str, vehicle_number: str, 
                                    frame_paths: List[str], timestamp: float) -> Dict[str, Any]:
@@ -74,7 +392,7 @@ class ResultReporter:
             "device_id": device_id,
             "result": f"识别车号：{vehicle_number}",
             "vehicle_number": vehicle_number,
-            "frames": frame_paths,
+            "frames": self._frame_refs(frame_paths),
             "timestamp": timestamp,
             "status": "success"
         }
@@ -97,7 +415,7 @@ class ResultReporter:
             "device_id": device_id,
             "result": "未识别车号",
             "vehicle_number": None,
-            "frames": frame_paths,
+            "frames": self._frame_refs(frame_paths),
             "timestamp": timestamp,
             "status": "failure"
         }
@@ -122,7 +440,7 @@ class ResultReporter:
             "device_id": device_id,
             "result": result_text,
             "success": is_success,
-            "frames": frame_paths,
+            "frames": self._frame_refs(frame_paths),
             "timestamp": timestamp,
             "status": "success" if is_success else "failure"
         }
@@ -147,7 +465,7 @@ class ResultReporter:
             "device_id": device_id,
             "result": result_text,
             "success": is_success,
-            "frames": frame_paths,
+            "frames": self._frame_refs(frame_paths),
             "timestamp": timestamp,
             "status": "success" if is_success else "failure"
         }
\ No newline at end of file
@@ -0,0 +1,218 @@
+import os
+import time
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+
+from .serialization import dumps_json, loads_json
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+class ResultStore:
+    """
+    基于SQLite的处理结果存储，只追加不修改
+    结果在追加时分配递增序号，由后台线程按批写入；序号同时作为查询分页和断线重放的游标
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 100, flush_interval: float = 0.5):
+        """
+        初始化结果存储
+
+        Args:
+            db_path: SQLite数据库文件路径
+            batch_size: 每批写入的最大结果数
+            flush_interval: 未攒满一批时的最长等待时间（秒）
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._seq_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        # WAL模式下写入线程与查询互不阻塞
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "seq INTEGER PRIMARY KEY, "
+            "device_id TEXT, "
+            "type TEXT, "
+            "timestamp REAL, "
+            "created_at REAL NOT NULL, "
+            "payload TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_device ON results (device_id, seq)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_type ON results (type, seq)")
+        # 结果中的timestamp有的是视频内的相对秒数，有的是墙钟时间，时间范围查询按写入时的墙钟时间created_at
+        self._conn.execute("DROP INDEX IF EXISTS idx_results_timestamp")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at)")
+        self._conn.commit()
+        self._last_seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM results").fetchone()[0]
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    @property
+    def last_seq(self) -> int:
+        """最近分配的结果序号"""
+        return self._last_seq
+
+    def append(self, result_data: Dict[str, Any]) -> int:
+        """
+        追加结果，不等待写入数据库
+
+        Args:
+            result_data: 结果数据
+
+        Returns:
+            分配的结果序号
+        """
+        with self._seq_lock:
+            self._last_seq += 1
+            seq = self._last_seq
+        row = (
+            seq,
+            result_data.get("device_id"),
+            result_data.get("type"),
+            result_data.get("timestamp"),
+            time.time(),
+            dumps_json(result_data)
+        )
+        self._queue.put(row)
+        return seq
+
+    def _write_loop(self):
+        """后台写入线程：攒批后在一个事务中写入"""
+        conn = sqlite3.connect(self.db_path)
+        while True:
+            row = self._queue.get()
+            if row is None:
+                self._queue.task_done()
+                break
+            batch = [row]
+            deadline = time.time() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                    break
+                batch.append(row)
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO results (seq, device_id, type, timestamp, created_at, payload) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        batch
+                    )
+            except sqlite3.Error as e:
+                log_with_timestamp(f"写入 {len(batch)} 条结果失败: {e}")
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                break
+        conn.close()
+
+    def flush(self):
+        """等待已追加的结果全部写入数据库"""
+        self._queue.join()
+
+    def query(self, device_id: Optional[str] = None, result_type: Optional[str] = None,
+              start_time: Optional[float] = None, end_time: Optional[float] = None,
+              after_seq: Optional[int] = None, until_seq: Optional[int] = None,
+              device_ids: Optional[List[str]] = None, result_types: Optional[List[str]] = None,
+              limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        按序号升序查询结果
+
+        Args:
+            device_id: 设备ID
+            result_type: 结果类型
+            start_time: 结果上报时间下限（Unix时间戳，包含），按存储时记录的created_at过滤
+            end_time: 结果上报时间上限（Unix时间戳，包含）
+            after_seq: 游标，只返回序号大于该值的结果
+            until_seq: 只返回序号不大于该值的结果
+            device_ids: 设备ID列表，与device_id同时给出时取交集
+            result_types: 结果类型列表，与result_type同时给出时取交集
+            limit: 返回的最大条数
+
+        Returns:
+            (结果列表, 下一页游标)，结果中带seq字段；没有更多结果时游标为None
+        """
+        conditions = []
+        params: List[Any] = []
+        if device_id is not None:
+            conditions.append("device_id = ?")
+            params.append(device_id)
+        if device_ids:
+            conditions.append(f"device_id IN ({','.join('?' * len(device_ids))})")
+            params.extend(device_ids)
+        if result_type is not None:
+            conditions.append("type = ?")
+            params.append(result_type)
+        if result_types:
+            conditions.append(f"type IN ({','.join('?' * len(result_types))})")
+            params.extend(result_types)
+        if start_time is not None:
+            conditions.append("created_at >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            conditions.append("created_at <= ?")
+            params.append(end_time)
+        if after_seq is not None:
+            conditions.append("seq > ?")
+            params.append(after_seq)
+        if until_seq is not None:
+            conditions.append("seq <= ?")
+            params.append(until_seq)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # 多取一条判断是否还有下一页
+        with self._read_lock:
+            rows = self._conn.execute(
+                f"SELECT seq, payload FROM results {where} ORDER BY seq ASC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+        results = []
+        for seq, payload in rows[:limit]:
+            result = loads_json(payload)
+            result["seq"] = seq
+            results.append(result)
+        next_cursor = results[-1]["seq"] if len(rows) > limit else None
+        return results, next_cursor
+
+    def prune(self, max_age: float) -> int:
+        """
+        删除超过保留时长的结果
+
+        Args:
+            max_age: 保留时长（秒），按写入时的墙钟时间created_at计算
+
+        Returns:
+            删除的结果数
+        """
+        with self._read_lock:
+            cursor = self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - max_age,))
+            self._conn.commit()
+        if cursor.rowcount:
+            log_with_timestamp(f"清理 {cursor.rowcount} 条过期结果")
+        return cursor.rowcount
+
+    def close(self):
+        """写入剩余结果并关闭数据库"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._read_lock:
+            self._conn.close()
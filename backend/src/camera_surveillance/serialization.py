@@ -0,0 +1,137 @@
+import json
+from typing import Any, Dict, Optional, Union
+
+# orjson和msgpack均为可选依赖：没有orjson时退回标准库json，没有msgpack时只支持JSON编码
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def dumps_json(data: Any) -> str:
+    """
+    序列化为JSON字符串，非ASCII字符不转义
+
+    Args:
+        data: 可JSON序列化的数据
+
+    Returns:
+        JSON字符串
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, option=_ORJSON_OPTIONS).decode("utf-8")
+        except TypeError:
+            # orjson不支持的类型（例如超出64位的整数）交给标准库处理
+            pass
+    return json.dumps(data, ensure_ascii=False)
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    解析JSON字符串
+
+    Args:
+        data: JSON字符串或UTF-8字节
+
+    Returns:
+        解析结果
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+CODEC_NAMES = ("json", "msgpack")
+
+class MessageCodec:
+    """WebSocket消息编解码器，JSON编码为文本消息，MessagePack编码为二进制消息"""
+
+    def __init__(self, name: str):
+        """
+        初始化编解码器
+
+        Args:
+            name: 编码名称，json或msgpack
+        """
+        if name not in CODEC_NAMES:
+            raise ValueError(f"不支持的消息编码: {name}")
+        if name == "msgpack" and not MSGPACK_AVAILABLE:
+            raise ValueError("未安装msgpack，不支持MessagePack编码")
+        self.name = name
+        self.binary = name == "msgpack"
+
+    def encode(self, data: Any) -> Union[str, bytes]:
+        """
+        编码消息
+
+        Args:
+            data: 消息数据
+
+        Returns:
+            JSON编码返回字符串，MessagePack编码返回字节
+        """
+        if self.binary:
+            return msgpack.packb(data, use_bin_type=True)
+        return dumps_json(data)
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        """
+        解码客户端发来的消息，文本消息始终按JSON解析，二进制消息按当前编码解析
+
+        Args:
+            data: 文本或二进制消息
+
+        Returns:
+            消息数据
+        """
+        if self.binary and isinstance(data, bytes):
+            return msgpack.unpackb(data, raw=False)
+        return loads_json(data)
+
+    async def send(self, websocket, data: Any):
+        """
+        编码并发送消息
+
+        Args:
+            websocket: WebSocket连接对象
+            data: 消息数据
+        """
+        await send_encoded(websocket, self.encode(data))
+
+JSON_CODEC = MessageCodec("json")
+_CODECS: Dict[str, MessageCodec] = {"json": JSON_CODEC}
+if MSGPACK_AVAILABLE:
+    _CODECS["msgpack"] = MessageCodec("msgpack")
+
+def negotiate_codec(requested: Optional[str]) -> MessageCodec:
+    """
+    根据客户端连接时请求的编码选择编解码器，不支持的编码退回JSON
+
+    Args:
+        requested: 客户端请求的编码名称，例如连接地址中的encoding参数
+
+    Returns:
+        编解码器
+    """
+    return _CODECS.get((requested or "json").lower(), JSON_CODEC)
+
+async def send_encoded(websocket, message: Union[str, bytes]):
+    """
+    发送已编码的消息，字节按二进制消息发送
+
+    Args:
+        websocket: WebSocket连接对象
+        message: 已编码的消息
+    """
+    if isinstance(message, bytes):
+        await websocket.send_bytes(message)
+    else:
+        await websocket.send_text(message)
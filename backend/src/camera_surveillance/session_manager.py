@@ -0,0 +1,187 @@
+import re
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from datetime import datetime
+
+def log_with_timestamp(message: str):
+    """带时间戳的日志输出函数"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+# 客户端追加在设备ID后的时间戳（秒或毫秒），如camera01_1700000000000
+DEVICE_ID_TIMESTAMP_SUFFIX = re.compile(r"_\d{10,13}$")
+
+def real_device_id(device_id: str) -> str:
+    """
+    去掉客户端追加在设备ID后的时间戳，得到设备的真实ID，用作会话的键
+    客户端每次连接或上传都会生成带新时间戳的ID，按原ID建立会话时同一设备的会话永远不会被复用
+
+    Args:
+        device_id: 连接地址或请求中的设备ID，可能带有时间戳后缀
+
+    Returns:
+        真实设备ID
+    """
+    return DEVICE_ID_TIMESTAMP_SUFFIX.sub("", device_id) or device_id
+
+class DeviceSession:
+    """设备会话，持有设备的处理流水线，在连接断开后保留到空闲超时"""
+
+    def __init__(self, device_id: str, pipeline: Any):
+        """
+        初始化设备会话
+
+        Args:
+            device_id: 设备ID
+            pipeline: 设备的处理流水线对象
+        """
+        self.device_id = device_id
+        self.pipeline = pipeline
+        self.created_at = time.time()
+        self.last_active = time.monotonic()
+        self.connections = 0
+        self.reuse_count = 0
+        # 正在关闭的会话不能被复用或再次淘汰
+        self.closing = False
+
+    @property
+    def idle_seconds(self) -> float:
+        """没有连接的时长（秒），有连接时为0"""
+        if self.connections > 0:
+            return 0.0
+        return time.monotonic() - self.last_active
+
+class DeviceSessionManager:
+    """
+    设备会话管理器
+    同一设备的连接和任务共用一条长期存在的处理流水线，客户端断线重连时恢复原会话；
+    没有连接超过空闲超时的会话被关闭
+    """
+
+    def __init__(self, create_pipeline: Callable[[str], Awaitable[Any]],
+                 close_pipeline: Callable[[Any], Awaitable[None]],
+                 idle_timeout: float = 300.0):
+        """
+        初始化设备会话管理器
+
+        Args:
+            create_pipeline: 为设备创建处理流水线的协程函数
+            close_pipeline: 关闭处理流水线的协程函数
+            idle_timeout: 空闲超时（秒）
+        """
+        self.create_pipeline = create_pipeline
+        self.close_pipeline = close_pipeline
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[str, DeviceSession] = {}
+        self._lock = asyncio.Lock()
+        # 设备ID -> 正在创建会话的完成通知
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def acquire(self, device_id: str) -> DeviceSession:
+        """
+        获取设备会话，存在时复用，否则创建；调用方使用完毕后需调用release
+
+        Args:
+            device_id: 设备ID
+
+        Returns:
+            设备会话
+        """
+        while True:
+            async with self._lock:
+                self._start_sweeper()
+                session = self.sessions.get(device_id)
+                if session is not None and not session.closing:
+                    session.connections += 1
+                    session.reuse_count += 1
+                    log_with_timestamp(f"复用设备 {device_id} 的会话，当前连接数: {session.connections}")
+                    return session
+                pending = self._pending.get(device_id)
+                if pending is None:
+                    pending = asyncio.get_running_loop().create_future()
+                    self._pending[device_id] = pending
+                    break
+            # 同一设备的会话正在创建，创建完成（或失败）后重新获取；创建流水线时不持有锁，不阻塞其他设备
+            await asyncio.shield(pending)
+
+        try:
+            pipeline = await self.create_pipeline(device_id)
+            async with self._lock:
+                session = DeviceSession(device_id, pipeline)
+                session.connections = 1
+                self.sessions[device_id] = session
+            log_with_timestamp(f"为设备 {device_id} 创建会话")
+            return session
+        finally:
+            async with self._lock:
+                del self._pending[device_id]
+            pending.set_result(None)
+
+    def release(self, session: DeviceSession):
+        """
+        释放设备会话，连接数为0后开始计算空闲时间
+
+        Args:
+            session: 设备会话
+        """
+        session.connections = max(0, session.connections - 1)
+        session.last_active = time.monotonic()
+
+    def _start_sweeper(self):
+        """在事件循环中启动空闲会话清理任务"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+
+    async def _sweep_loop(self):
+        """定期关闭空闲超时的会话"""
+        interval = max(1.0, min(self.idle_timeout / 2, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                log_with_timestamp(f"清理空闲会话时出错: {e}")
+
+    async def evict_idle(self) -> int:
+        """
+        关闭空闲超时的会话
+
+        Returns:
+            关闭的会话数
+        """
+        async with self._lock:
+            expired = [
+                session for session in self.sessions.values()
+                if session.connections == 0 and not session.closing and session.idle_seconds >= self.idle_timeout
+            ]
+            for session in expired:
+                session.closing = True
+        for session in expired:
+            log_with_timestamp(f"设备 {session.device_id} 的会话空闲 {session.idle_seconds:.0f}秒，关闭会话")
+            await self._close(session)
+        return len(expired)
+
+    async def _close(self, session: DeviceSession):
+        """关闭会话的处理流水线并移除会话"""
+        try:
+            await self.close_pipeline(session.pipeline)
+        except Exception as e:
+            log_with_timestamp(f"关闭设备 {session.device_id} 的会话时出错: {e}")
+        finally:
+            async with self._lock:
+                if self.sessions.get(session.device_id) is session:
+                    del self.sessions[session.device_id]
+
+    async def close_all(self):
+        """关闭所有会话，用于服务停止"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        async with self._lock:
+            sessions = [session for session in self.sessions.values() if not session.closing]
+            for session in sessions:
+                session.closing = True
+        for session in sessions:
+            await self._close(session)
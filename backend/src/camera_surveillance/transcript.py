@@ -0,0 +1,133 @@
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+@dataclass
+class WordTiming:
+    """词级时间戳，时间为媒体时间（秒）"""
+    begin: float
+    end: float
+    text: str
+    punctuation: str = ""
+
+@dataclass
+class TranscriptSegment:
+    """转录片段数据类，时间均为媒体时间（秒）"""
+    begin: float
+    end: float
+    text: str
+    is_final: bool = True
+    words: List[WordTiming] = field(default_factory=list)
+
+    @classmethod
+    def from_sentence(cls, sentence: Dict[str, Any], offset: float = 0.0,
+                      is_final: Optional[bool] = None) -> "TranscriptSegment":
+        """
+        从百炼识别结果的句子创建转录片段
+
+        Args:
+            sentence: 识别结果句子，begin_time/end_time单位为毫秒
+            offset: 时间偏移（秒），用于把识别会话内的时间换算为媒体时间
+            is_final: 是否为完整句子，为None时根据end_time判断
+
+        Returns:
+            转录片段
+        """
+        begin_ms = sentence.get("begin_time") or 0
+        end_ms = sentence.get("end_time")
+        if is_final is None:
+            is_final = end_ms is not None
+
+        words = []
+        for word in sentence.get("words") or []:
+            if word.get("begin_time") is None:
+                continue
+            word_end_ms = word.get("end_time")
+            if word_end_ms is None:
+                word_end_ms = word["begin_time"]
+            words.append(WordTiming(
+                begin=offset + word["begin_time"] / 1000.0,
+                end=offset + word_end_ms / 1000.0,
+                text=word.get("text", ""),
+                punctuation=word.get("punctuation") or ""
+            ))
+
+        if end_ms is None:
+            # 中间结果没有句子结束时间，使用最后一个词的结束时间
+            end = words[-1].end if words else offset + begin_ms / 1000.0
+        else:
+            end = offset + end_ms / 1000.0
+        return cls(
+            begin=offset + begin_ms / 1000.0,
+            end=end,
+            text=sentence.get("text", ""),
+            is_final=is_final,
+            words=words
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TranscriptSegment":
+        """从to_dict的输出恢复转录片段"""
+        return cls(
+            begin=data["begin"],
+            end=data["end"],
+            text=data["text"],
+            is_final=data.get("is_final", True),
+            words=[WordTiming(**word) for word in data.get("words", [])]
+        )
+
+    def map_time(self, mapper: Callable[[float, bool], float]) -> "TranscriptSegment":
+        """
+        换算片段和词的时间，例如把只含语音片段的音频时间换算回原始音频时间
+
+        Args:
+            mapper: 时间换算函数，参数为(时间, 是否为结束时间)
+
+        Returns:
+            换算后的新片段
+        """
+        return TranscriptSegment(
+            begin=mapper(self.begin, False),
+            end=mapper(self.end, True),
+            text=self.text,
+            is_final=self.is_final,
+            words=[
+                WordTiming(mapper(w.begin, False), mapper(w.end, True), w.text, w.punctuation)
+                for w in self.words
+            ]
+        )
+
+    def time_range_for_span(self, start: int, end: int) -> Tuple[float, float]:
+        """
+        根据文本中的字符区间查找对应的媒体时间范围
+
+        Args:
+            start: 起始字符位置
+            end: 结束字符位置（不包含）
+
+        Returns:
+            (开始时间, 结束时间)，词时间戳无法对齐时返回整句的时间范围
+        """
+        if not self.words:
+            return self.begin, self.end
+
+        # 按句子文本对齐每个词的字符区间
+        position = 0
+        begin_time = None
+        end_time = None
+        for word in self.words:
+            index = self.text.find(word.text, position) if word.text else -1
+            if index < 0:
+                return self.begin, self.end
+            word_start, word_end = index, index + len(word.text)
+            position = word_end
+            if word_end > start and word_start < end:
+                if begin_time is None:
+                    begin_time = word.begin
+                end_time = word.end
+        if begin_time is None:
+            return self.begin, self.end
+        return begin_time, end_time
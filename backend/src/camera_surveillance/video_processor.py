@@ -1,19 +1,201 @@
 import asyncio
-import cv2
 import queue
+import subprocess
+import threading
 import time
-from typing import Generator
+from typing import Callable, Generator, Optional
 import os
 from pathlib import Path
 from datetime import datetime
 import base64
 import tempfile
 
+from .metrics import FFMPEG_SECONDS, AUDIO_EXTRACTION_SECONDS, AUDIO_EXTRACTED_SECONDS
+
 def log_with_timestamp(message: str):
     """带时间戳的日志输出函数"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
 
+def stream_pcm_audio(media_path: str, sample_rate: int = 16000, channels: int = 1,
+                     chunk_duration: float = 0.1) -> Generator[bytes, None, None]:
+    """
+    用ffmpeg把媒体文件的音频重采样为16位PCM，从标准输出分块读取，不写中间文件
+    
+    Args:
+        media_path: 视频或音频文件路径
+        sample_rate: 输出采样率
+        channels: 输出声道数
+        chunk_duration: 每个音频块的持续时间（秒）
+        
+    Yields:
+        16位小端PCM数据块
+    """
+    cmd = [
+        'ffmpeg',
+        '-nostdin',
+        '-loglevel', 'error',
+        '-i', media_path,
+        '-vn',
+        '-ac', str(channels),
+        '-ar', str(sample_rate),
+        '-f', 's16le',
+        '-'
+    ]
+    chunk_size = max(2 * channels, int(sample_rate * chunk_duration) * 2 * channels)
+    start_time = time.perf_counter()
+    pcm_bytes = 0
+    # 错误输出写入临时文件：不读取的管道写满后ffmpeg会阻塞，读取标准输出的一方随之死锁
+    error_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=error_file)
+    try:
+        while True:
+            pcm_data = process.stdout.read(chunk_size)
+            if not pcm_data:
+                break
+            pcm_bytes += len(pcm_data)
+            yield pcm_data
+        if process.wait() != 0:
+            error_file.seek(0)
+            # 只保留最后一段错误信息，损坏的输入可能每个数据包都输出一行
+            stderr = error_file.read()[-4096:]
+            log_with_timestamp(f"ffmpeg提取PCM音频失败: {stderr.decode('utf-8', 'ignore').strip()}")
+    finally:
+        # 调用方提前停止读取时结束ffmpeg进程
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        error_file.close()
+        # 进程耗时包含调用方消费音频的时间
+        FFMPEG_SECONDS.observe(time.perf_counter() - start_time, operation="pcm_stream")
+        AUDIO_EXTRACTED_SECONDS.inc(pcm_bytes / float(sample_rate * 2 * channels), mode="file")
+
+class IncrementalAudioExtractor:
+    """
+    增量音频提取器
+    实时检测的媒体块按顺序追加到同一个会话媒体文件，同时写入常驻ffmpeg进程的标准输入，
+    ffmpeg只解码新到达的数据，输出的16位单声道PCM交给回调。
+    处理量随会话时长线性增长，已处理过的音频不会被重复提取和识别
+    """
+    
+    def __init__(self, media_path: str, on_pcm: Callable[[bytes], None],
+                 sample_rate: int = 16000, chunk_duration: float = 0.1):
+        """
+        初始化增量音频提取器
+        
+        Args:
+            media_path: 会话媒体文件路径，媒体块按顺序追加到该文件
+            on_pcm: PCM数据回调，在读取线程中按时间顺序调用
+            sample_rate: 输出采样率
+            chunk_duration: 每个PCM数据块的持续时间（秒）
+        """
+        self.media_path = media_path
+        self.on_pcm = on_pcm
+        self.sample_rate = sample_rate
+        self.chunk_size = max(2, int(sample_rate * chunk_duration) * 2)
+        # 字节水位线：已接收的媒体数据字节数
+        self.bytes_received = 0
+        # 时间水位线：已提取的PCM字节数，换算为时长即为下一个数据块在会话中的起始时间
+        self.pcm_bytes = 0
+        self._media_file = None
+        self._process: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._audio_failed = False
+        self._started_at = 0.0
+    
+    @property
+    def extracted_duration(self) -> float:
+        """已提取音频的时长（秒），即会话媒体中的时间水位线"""
+        return self.pcm_bytes / float(self.sample_rate * 2)
+    
+    def _start(self):
+        """启动ffmpeg解码进程和读取线程"""
+        cmd = [
+            'ffmpeg',
+            '-loglevel', 'error',
+            '-i', 'pipe:0',
+            '-vn',
+            '-ac', '1',
+            '-ar', str(self.sample_rate),
+            '-f', 's16le',
+            'pipe:1'
+        ]
+        try:
+            self._started_at = time.perf_counter()
+            self._process = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        except Exception as e:
+            log_with_timestamp(f"启动ffmpeg增量音频提取失败，仅保存媒体数据: {e}")
+            self._audio_failed = True
+            return
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+    
+    def _read_loop(self):
+        """读取ffmpeg输出的PCM数据，推进时间水位线"""
+        while True:
+            pcm_data = self._process.stdout.read(self.chunk_size)
+            if not pcm_data:
+                break
+            self.pcm_bytes += len(pcm_data)
+            AUDIO_EXTRACTED_SECONDS.inc(len(pcm_data) / float(self.sample_rate * 2), mode="incremental")
+            try:
+                self.on_pcm(pcm_data)
+            except Exception as e:
+                log_with_timestamp(f"处理增量音频数据时出错: {e}")
+    
+    def append(self, data: bytes):
+        """
+        追加一个媒体块，只有新数据会被解码
+        
+        Args:
+            data: 媒体块字节数据，第一个块需包含容器头
+        """
+        with AUDIO_EXTRACTION_SECONDS.time():
+            self._append(data)
+    
+    def _append(self, data: bytes):
+        """写入会话媒体文件和ffmpeg的标准输入"""
+        if self._media_file is None:
+            self._media_file = open(self.media_path, 'wb')
+            self._start()
+        self._media_file.write(data)
+        self._media_file.flush()
+        self.bytes_received += len(data)
+        
+        if self._audio_failed:
+            return
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            log_with_timestamp(f"ffmpeg增量音频提取已退出: {e}")
+            self._audio_failed = True
+    
+    def close(self):
+        """结束输入，等待剩余音频提取完成并释放资源"""
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            if self._reader is not None:
+                self._reader.join()
+            returncode = self._process.wait()
+            FFMPEG_SECONDS.observe(time.perf_counter() - self._started_at, operation="incremental")
+            self._process.stdout.close()
+            if returncode != 0:
+                log_with_timestamp(f"ffmpeg增量音频提取异常退出，返回码: {returncode}")
+            self._process = None
+        if self._media_file is not None:
+            self._media_file.close()
+            self._media_file = None
+        log_with_timestamp(
+            f"增量音频提取结束，共接收 {self.bytes_received} 字节，提取音频 {self.extracted_duration:.1f}秒"
+        )
+
 class VideoStreamProcessor:
     """视频流处理器，负责处理视频流并提取音频"""
     
@@ -44,6 +226,7 @@ class VideoStreamProcessor:
         Returns:
             录制文件路径
         """
+        import cv2
         if not output_path:
             timestamp = int(time.time())
             output_path = str(self.workspace_path / f"video_{timestamp}.mp4")
@@ -69,6 +252,7 @@ class VideoStreamProcessor:
             image_path: 图像文件路径
             video_path: 视频文件路径（可选）
         """
+        import cv2
         # 如果指定了视频路径，则更新输出路径
         if video_path:
             self.output_video_path = video_path
@@ -96,6 +280,7 @@ class VideoStreamProcessor:
         Args:
             video_stream: 视频流数据（URL、文件路径或OpenCV VideoCapture对象）
         """
+        import cv2
         # 如果是URL或文件路径，使用OpenCV读取
         if isinstance(video_stream, str):
             cap = cv2.VideoCapture(video_stream)
@@ -167,7 +352,8 @@ class VideoStreamProcessor:
         ]
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            with FFMPEG_SECONDS.time(operation="remux"):
+                result = subprocess.run(cmd, capture_output=True, text=True)
             if result.returncode != 0:
                 log_with_timestamp(f"ffmpeg处理失败: {result.stderr}")
                 # 如果ffmpeg失败，回退到原来的方法（仅视频）
@@ -192,6 +378,7 @@ class VideoStreamProcessor:
             temp_video_path: 临时视频文件路径
             output_path: 输出视频文件路径
         """
+        import cv2
         # 使用OpenCV处理临时视频文件
         cap = cv2.VideoCapture(temp_video_path)
         
@@ -234,13 +421,16 @@ class VideoStreamProcessor:
         if self.video_writer:
             self.video_writer.release()
     
-    def extract_audio_from_video(self, video_path: str, audio_path: str) -> bool:
+    def extract_audio_from_video(self, video_path: str, audio_path: str,
+                                 sample_rate: int = None, channels: int = None) -> bool:
         """
         从视频文件中提取音频
         
         Args:
             video_path: 视频文件路径
             audio_path: 音频输出文件路径
+            sample_rate: 输出采样率，为None时保持原始采样率
+            channels: 输出声道数，为None时保持原始声道数
             
         Returns:
             是否成功提取音频
@@ -253,15 +443,37 @@ class VideoStreamProcessor:
                 '-i', video_path,
                 '-q:a', '0',
                 '-map', 'a',
+            ]
+            if sample_rate:
+                cmd += ['-ar', str(sample_rate)]
+            if channels:
+                cmd += ['-ac', str(channels)]
+            cmd += [
                 audio_path,
                 '-y'  # 覆盖输出文件
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            with FFMPEG_SECONDS.time(operation="extract_audio"):
+                result = subprocess.run(cmd, capture_output=True, text=True)
             return result.returncode == 0
         except Exception as e:
             log_with_timestamp(f"提取音频时出错: {e}")
             return False
     
+    def extract_audio_pcm_stream(self, video_path: str, sample_rate: int = 16000,
+                                 chunk_duration: float = 0.1) -> Generator[bytes, None, None]:
+        """
+        从视频文件中提取单声道16位PCM音频流，可直接分块送入识别器
+        
+        Args:
+            video_path: 视频文件路径
+            sample_rate: 输出采样率，默认16000Hz
+            chunk_duration: 每个音频块的持续时间（秒）
+            
+        Yields:
+            16位小端PCM数据块
+        """
+        return stream_pcm_audio(video_path, sample_rate=sample_rate, channels=1, chunk_duration=chunk_duration)
+    
     def extract_audio_frames(self, audio_path: str, chunk_duration: float = 1.0) -> Generator[bytes, None, None]:
         """
         从音频文件中提取音频帧
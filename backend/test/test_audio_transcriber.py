@@ -8,14 +8,58 @@
 
 import os
 import sys
+import shutil
 import tempfile
 import wave
 from pathlib import Path
 
+import numpy as np
+
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from camera_surveillance.processor.audio_transcriber import AudioTranscriber
+from camera_surveillance.processor import audio_transcriber as audio_transcriber_module
+from camera_surveillance.processor.audio_transcriber import AudioTranscriber, StreamingTranscriptionSession
+from camera_surveillance.processor.vad import VoiceActivityDetector
+from camera_surveillance.video_processor import stream_pcm_audio
+
+class FakeResult:
+    """模拟识别结果"""
+    
+    def __init__(self, sentence):
+        self.sentence = sentence
+    
+    def get_sentence(self):
+        return self.sentence
+
+class FakeRecognition:
+    """本地替身识别器：每收到1秒音频输出一句话，时间为会话内毫秒"""
+    
+    def __init__(self, callback, sample_rate=16000, fail_after=None):
+        self.callback = callback
+        self.bytes_per_second = sample_rate * 2
+        self.received = 0
+        self.sentences = 0
+        self.fail_after = fail_after
+        self.stopped = False
+    
+    def start(self):
+        self.callback.on_open()
+    
+    def send_audio_frame(self, data):
+        self.received += len(data)
+        while self.received >= (self.sentences + 1) * self.bytes_per_second:
+            begin = self.sentences * 1000
+            # 先发中间结果，再发完整句子
+            self.callback.on_event(FakeResult({"begin_time": begin, "end_time": None, "text": "车号"}))
+            self.callback.on_event(FakeResult({"begin_time": begin, "end_time": begin + 800, "text": f"第{self.sentences}句车号确认"}))
+            self.sentences += 1
+            if self.fail_after is not None and self.sentences >= self.fail_after:
+                self.callback.on_error(FakeResult(None))
+    
+    def stop(self):
+        self.stopped = True
+        self.callback.on_close()
 
 def create_test_wav_file():
     """创建测试WAV文件"""
@@ -94,6 +138,174 @@ def test_import():
     
     print("导入测试完成\n")
 
+def test_streaming_session():
+    """测试流式识别会话"""
+    print("测试流式识别会话...")
+    
+    events = []
+    session = StreamingTranscriptionSession(FakeRecognition, on_sentence=events.append)
+    
+    # 分块送入2.5秒静音PCM
+    chunk = b'\x00\x00' * 1600
+    for _ in range(25):
+        session.feed(chunk)
+    segments = session.stop()
+    
+    print(f"识别结果: {segments}")
+    assert len(segments) == 2
+    assert [s.begin for s in segments] == [0.0, 1.0]
+    assert segments[1].end == 1.8
+    assert all(s.is_final for s in events), "默认不回调中间结果"
+    assert abs(session.fed_duration - 2.5) < 1e-6
+    
+    # 只通过回调处理句子的长期会话不保存句子
+    events = []
+    session = StreamingTranscriptionSession(FakeRecognition, on_sentence=events.append, keep_segments=False)
+    for _ in range(25):
+        session.feed(chunk)
+    assert session.stop() == [] and session.segments == []
+    assert len(events) == 2
+    
+    print("流式识别会话测试完成\n")
+
+def test_streaming_session_restart():
+    """测试识别会话出错后重启，时间仍为流内时间"""
+    print("测试流式识别会话重启...")
+    
+    recognitions = []
+    
+    def factory(callback):
+        recognition = FakeRecognition(callback, fail_after=1)
+        recognitions.append(recognition)
+        return recognition
+    
+    session = StreamingTranscriptionSession(factory)
+    chunk = b'\x00\x00' * 16000
+    for _ in range(3):
+        session.feed(chunk)
+    segments = session.stop()
+    
+    print(f"识别结果: {segments}")
+    assert len(recognitions) == 3
+    assert recognitions[0].stopped
+    assert [s.begin for s in segments] == [0.0, 1.0, 2.0]
+    
+    print("流式识别会话重启测试完成\n")
+
+def create_speech_pcm():
+    """创建10秒PCM：低噪声背景中在2~3秒和6~7.5秒有两段语音"""
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 30, 16000 * 10)
+    t = np.arange(len(samples)) / 16000.0
+    for start, end in [(2.0, 3.0), (6.0, 7.5)]:
+        mask = (t >= start) & (t < end)
+        samples[mask] += 6000 * np.sin(2 * np.pi * 220 * t[mask])
+    return samples.astype(np.int16).tobytes()
+
+def test_streaming_session_vad():
+    """测试流式识别会话只送语音，句子时间换算回音频流时间"""
+    print("测试流式识别会话语音门限...")
+    
+    recognitions = []
+    
+    def factory(callback):
+        recognition = FakeRecognition(callback)
+        recognitions.append(recognition)
+        return recognition
+    
+    pcm = create_speech_pcm()
+    session = StreamingTranscriptionSession(factory, vad=VoiceActivityDetector())
+    for start in range(0, len(pcm), 3200):
+        session.feed(pcm[start:start + 3200])
+    segments = session.stop()
+    
+    print(f"送入 {session.fed_duration:.1f}秒，实际识别 {session.sent_duration:.1f}秒，识别结果: {segments}")
+    assert abs(session.fed_duration - 10.0) < 1e-6
+    assert session.sent_duration < 7.0, "静音部分不应送去识别"
+    assert recognitions[0].received == session.bytes_sent
+    assert segments, "语音部分应被识别"
+    # 识别器内时间从0开始，换算后应落在语音附近而不是静音开头
+    assert all(segment.begin >= 1.5 for segment in segments)
+    
+    # transcribe_pcm 同样只识别语音
+    transcriber = AudioTranscriber()
+    transcriber.create_recognition = factory
+    recognitions.clear()
+    segments = transcriber.transcribe_pcm(pcm)
+    print(f"PCM识别结果: {segments}")
+    assert recognitions[0].received < len(pcm) * 0.7
+    assert segments and all(segment.begin >= 1.5 for segment in segments)
+    
+    print("流式识别会话语音门限测试完成\n")
+
+def test_wav_resampled_before_sending():
+    """测试采样率不匹配的WAV先重采样再发送"""
+    print("测试WAV重采样...")
+    
+    sent = []
+    
+    class CollectingRecognition:
+        def send_audio_frame(self, data):
+            sent.append(data)
+    
+    transcribed = []
+    
+    def fake_stream_pcm_audio(media_path, sample_rate=16000, channels=1, chunk_duration=0.1):
+        """替代ffmpeg管道，输出1秒16kHz单声道静音"""
+        transcribed.append((media_path, sample_rate, channels))
+        yield b'\x00\x00' * sample_rate
+    
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+        wav_path = temp_file.name
+    with wave.open(wav_path, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(b'\x00\x00' * 2 * 44100)
+    
+    original = audio_transcriber_module.stream_pcm_audio
+    audio_transcriber_module.stream_pcm_audio = fake_stream_pcm_audio
+    try:
+        transcriber = AudioTranscriber(use_vad=False)
+        transcriber._send_wav_chunks(CollectingRecognition(), wav_path)
+    finally:
+        audio_transcriber_module.stream_pcm_audio = original
+        os.remove(wav_path)
+    
+    # 发送的是重采样后的16kHz单声道数据，而不是44.1kHz双声道原始数据
+    assert transcribed == [(wav_path, 16000, 1)]
+    assert sum(len(data) for data in sent) == 16000 * 2
+    
+    print("WAV重采样测试完成\n")
+
+def test_stream_pcm_audio():
+    """测试ffmpeg管道输出16kHz单声道PCM"""
+    print("测试PCM管道提取...")
+    
+    if shutil.which('ffmpeg') is None:
+        print("未安装ffmpeg，跳过测试\n")
+        return
+    
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+        wav_path = temp_file.name
+    with wave.open(wav_path, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(b'\x00\x00' * 2 * 44100)
+    
+    try:
+        chunks = list(stream_pcm_audio(wav_path, sample_rate=16000, channels=1, chunk_duration=0.1))
+    finally:
+        os.remove(wav_path)
+    
+    total = sum(len(chunk) for chunk in chunks)
+    print(f"共 {len(chunks)} 个数据块，{total} 字节")
+    assert all(len(chunk) <= 3200 for chunk in chunks)
+    assert abs(total - 16000 * 2) <= 3200
+    
+    print("PCM管道提取测试完成\n")
+
 def main():
     """主函数"""
     print("开始测试音频转录器功能...\n")
@@ -101,6 +313,11 @@ def main():
     # 运行各个测试
     test_import()
     test_audio_transcriber()
+    test_streaming_session()
+    test_streaming_session_restart()
+    test_streaming_session_vad()
+    test_wav_resampled_before_sending()
+    test_stream_pcm_audio()
     
     print("音频转录器测试完成!")
 
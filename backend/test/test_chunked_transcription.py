@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分块转录测试脚本
+用于测试长录音在停顿处分块、并发转录后的时间换算与边界去重
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.transcript import TranscriptSegment
+from camera_surveillance.processor.audio_transcriber import AudioTranscriber
+from camera_surveillance.processor.chunked_transcription import (
+    plan_transcription_chunks, merge_chunk_transcripts
+)
+from camera_surveillance.processor.vad import SpeechSegment
+
+SAMPLE_RATE = 16000
+
+class FakeResult:
+    """模拟识别结果"""
+
+    def __init__(self, sentence):
+        self.sentence = sentence
+
+    def get_sentence(self):
+        return self.sentence
+
+class ChunkRecognition:
+    """本地替身识别器：停止时把收到的整段音频识别为一句话，并记录最大并发数"""
+
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    started = 0
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.received = 0
+
+    def start(self):
+        with ChunkRecognition.lock:
+            ChunkRecognition.started += 1
+            ChunkRecognition.active += 1
+            ChunkRecognition.max_active = max(ChunkRecognition.max_active, ChunkRecognition.active)
+
+    def send_audio_frame(self, data):
+        self.received += len(data)
+
+    def stop(self):
+        time.sleep(0.05)
+        duration_ms = int(self.received / (SAMPLE_RATE * 2) * 1000)
+        self.callback.on_event(FakeResult({"begin_time": 0, "end_time": duration_ms, "text": "车号确认"}))
+        with ChunkRecognition.lock:
+            ChunkRecognition.active -= 1
+
+def test_plan_chunks_at_pauses():
+    """测试在停顿处分块，超长语音强制切分并保留重叠"""
+    print("测试分块规划...")
+
+    segments = [SpeechSegment(0.0, 20.0), SpeechSegment(25.0, 50.0), SpeechSegment(70.0, 90.0)]
+    chunks = plan_transcription_chunks(segments, max_chunk_seconds=60.0)
+    print(f"分块: {[(c.start, c.end) for c in chunks]}")
+    assert [(c.start, c.end) for c in chunks] == [(0.0, 50.0), (70.0, 90.0)]
+    assert len(chunks[0].segments) == 2
+
+    chunks = plan_transcription_chunks([SpeechSegment(0.0, 130.0)], max_chunk_seconds=60.0, overlap_seconds=1.0)
+    assert [(c.start, c.end) for c in chunks] == [(0.0, 60.0), (59.0, 119.0), (118.0, 130.0)]
+
+    print("分块规划测试完成\n")
+
+def test_merge_deduplicates_borders():
+    """测试合并时去掉分块重叠区域中的重复句子"""
+    print("测试分块结果合并...")
+
+    first = [TranscriptSegment(50.0, 59.8, "铁鞋设置"), TranscriptSegment(58.6, 60.0, "手闸")]
+    second = [TranscriptSegment(58.7, 60.4, "手闸拧紧。"), TranscriptSegment(70.0, 72.0, "车号确认")]
+    merged = merge_chunk_transcripts([second, first])
+    print(f"合并结果: {[(s.begin, s.text) for s in merged]}")
+    assert [s.text for s in merged] == ["铁鞋设置", "手闸拧紧。", "车号确认"]
+
+    print("分块结果合并测试完成\n")
+
+def test_concurrent_chunked_transcription():
+    """测试分块并发转录，结果换算回原始音频时间"""
+    print("测试分块并发转录...")
+
+    rng = np.random.default_rng(0)
+    duration = 30.0
+    samples = rng.normal(0, 30, int(SAMPLE_RATE * duration))
+    t = np.arange(len(samples)) / SAMPLE_RATE
+    for start, end in [(2.0, 4.0), (12.0, 14.0), (22.0, 24.0)]:
+        mask = (t >= start) & (t < end)
+        samples[mask] += 6000 * np.sin(2 * np.pi * 220 * t[mask])
+    pcm = samples.astype(np.int16).tobytes()
+
+    transcriber = AudioTranscriber()
+    transcriber.create_recognition = ChunkRecognition
+    ChunkRecognition.max_active = 0
+    segments = transcriber.transcribe_pcm_chunked(pcm, max_chunk_seconds=5.0, max_concurrent=2)
+    print(f"识别结果: {[(round(s.begin, 1), round(s.end, 1), s.text) for s in segments]}")
+
+    assert len(segments) == 3
+    for segment, (start, end) in zip(segments, [(2.0, 4.0), (12.0, 14.0), (22.0, 24.0)]):
+        assert abs(segment.begin - start) < 0.5 and abs(segment.end - end) < 0.5
+    assert ChunkRecognition.max_active <= 2
+
+    print("分块并发转录测试完成\n")
+
+def test_chunked_transcription_while_decoding():
+    """测试边解码边分块转录：解码结束前已完整的分块就开始识别"""
+    print("测试边解码边分块转录...")
+
+    rng = np.random.default_rng(1)
+    duration = 60.0
+    speech = [(2.0, 4.0), (12.0, 14.0), (22.0, 24.0), (40.0, 42.0), (55.0, 57.0)]
+    samples = rng.normal(0, 30, int(SAMPLE_RATE * duration))
+    t = np.arange(len(samples)) / SAMPLE_RATE
+    for start, end in speech:
+        mask = (t >= start) & (t < end)
+        samples[mask] += 6000 * np.sin(2 * np.pi * 220 * t[mask])
+    pcm = samples.astype(np.int16).tobytes()
+
+    started_before_end = []
+
+    def pcm_stream():
+        block = SAMPLE_RATE * 2 // 10
+        for start in range(0, len(pcm), block):
+            yield pcm[start:start + block]
+        # 最后一块交出后记录已提交的识别数
+        time.sleep(0.2)
+        started_before_end.append(ChunkRecognition.started)
+
+    transcriber = AudioTranscriber()
+    transcriber.create_recognition = ChunkRecognition
+    ChunkRecognition.started = 0
+    segments = transcriber.transcribe_pcm_stream_chunked(pcm_stream(), max_chunk_seconds=5.0, max_concurrent=2)
+    print(f"识别结果: {[(round(s.begin, 1), round(s.end, 1), s.text) for s in segments]}")
+
+    assert len(segments) == len(speech)
+    for segment, (start, end) in zip(segments, speech):
+        assert abs(segment.begin - start) < 0.5 and abs(segment.end - end) < 0.5
+    assert started_before_end[0] >= 3, "解码结束前应已开始识别前面的分块"
+
+    print("边解码边分块转录测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试分块转录模块...\n")
+
+    test_plan_chunks_at_pauses()
+    test_merge_deduplicates_borders()
+    test_concurrent_chunked_transcription()
+    test_chunked_transcription_while_decoding()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
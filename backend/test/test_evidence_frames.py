@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+证据帧存储测试脚本
+用于测试帧ID登记、缩略图缓存淘汰和Range请求解析
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.evidence_frames import EvidenceFrameStore, parse_byte_range
+
+def write_frame(path: str, value: int):
+    """写入测试帧"""
+    rng = np.random.default_rng(value)
+    cv2.imwrite(path, rng.integers(0, 255, (480, 640, 3), dtype=np.uint8))
+
+def test_register_and_thumbnail():
+    """测试登记后覆盖原文件不影响证据帧，缩略图按宽度缩小并缓存"""
+    print("测试证据帧登记和缩略图...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = EvidenceFrameStore(os.path.join(directory, "evidence"), thumbnail_width=160)
+        frame_path = os.path.join(directory, "frame_1.00.jpg")
+        write_frame(frame_path, 1)
+        frame_id = store.register(frame_path)
+        assert store.register(frame_path) == frame_id
+
+        # 工作空间中的同名帧被后续检测覆盖
+        write_frame(frame_path, 2)
+        assert store.register(frame_path) != frame_id
+        with open(store.frame_path(frame_id), "rb") as stored, open(frame_path, "rb") as current:
+            assert stored.read() != current.read()
+
+        thumbnail = store.thumbnail_path(frame_id)
+        assert cv2.imread(thumbnail).shape[:2] == (120, 160)
+        assert store.thumbnail_path(frame_id) == thumbnail
+        assert os.path.getsize(thumbnail) < os.path.getsize(store.frame_path(frame_id))
+
+        # 无效或不存在的帧ID
+        assert store.frame_path("../../etc/passwd") is None
+        assert store.thumbnail_path("0" * 32) is None
+        assert store.register(os.path.join(directory, "missing.jpg")) is None
+
+    print("证据帧登记和缩略图测试完成\n")
+
+def test_thumbnail_cache_eviction():
+    """测试缩略图缓存超过上限时淘汰最久未访问的缩略图"""
+    print("测试缩略图缓存淘汰...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = EvidenceFrameStore(os.path.join(directory, "evidence"))
+        frame_ids = []
+        for value in range(3):
+            frame_path = os.path.join(directory, f"frame_{value}.jpg")
+            write_frame(frame_path, value)
+            frame_ids.append(store.register(frame_path))
+
+        first = store.thumbnail_path(frame_ids[0], 320)
+        store.thumbnail_max_bytes = os.path.getsize(first) * 2 + 100
+        second = store.thumbnail_path(frame_ids[1], 320)
+        # 访问第一张后，第二张成为最久未访问的缩略图
+        store.thumbnail_path(frame_ids[0], 320)
+        store.thumbnail_path(frame_ids[2], 320)
+        print(f"缓存大小: {store.thumbnail_bytes} 字节")
+        assert os.path.exists(first)
+        assert not os.path.exists(second)
+        assert store.thumbnail_bytes <= store.thumbnail_max_bytes
+
+        # 重新打开时从磁盘恢复缓存索引
+        reopened = EvidenceFrameStore(os.path.join(directory, "evidence"))
+        assert reopened.thumbnail_bytes == store.thumbnail_bytes
+
+    print("缩略图缓存淘汰测试完成\n")
+
+def test_thumbnail_generated_outside_lock():
+    """测试生成缩略图时解码和编码不持有存储的锁"""
+    print("测试缩略图生成不持有锁...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = EvidenceFrameStore(os.path.join(directory, "evidence"))
+        frame_path = os.path.join(directory, "frame.jpg")
+        write_frame(frame_path, 1)
+        frame_id = store.register(frame_path)
+
+        lock_held = []
+        original_imread = cv2.imread
+
+        def imread(path, *args):
+            lock_held.append(store._lock.locked())
+            return original_imread(path, *args)
+
+        cv2.imread = imread
+        try:
+            assert store.thumbnail_path(frame_id) is not None
+        finally:
+            cv2.imread = original_imread
+        assert lock_held == [False]
+        assert not [name for name in os.listdir(store.thumbnails_dir) if name.endswith(".tmp")]
+
+    print("缩略图生成不持有锁测试完成\n")
+
+def test_prune_expired_frames():
+    """测试清理超过保留时长的证据帧及其缩略图，再次被引用的帧顺延保留"""
+    print("测试清理过期证据帧...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = EvidenceFrameStore(os.path.join(directory, "evidence"))
+        frame_paths = []
+        frame_ids = []
+        for value in range(3):
+            frame_path = os.path.join(directory, f"frame_{value}.jpg")
+            write_frame(frame_path, value)
+            frame_paths.append(frame_path)
+            frame_ids.append(store.register(frame_path))
+            store.thumbnail_path(frame_ids[-1])
+
+        # 前两帧一天前登记，其中第二帧又被新结果引用
+        old = time.time() - 86400
+        for frame_id in frame_ids[:2]:
+            os.utime(store.frame_path(frame_id), (old, old))
+        assert store.register(frame_paths[1]) == frame_ids[1]
+
+        assert store.prune(3600) == 1
+        assert store.frame_path(frame_ids[0]) is None
+        assert store.thumbnail_path(frame_ids[0]) is None
+        assert store.frame_path(frame_ids[1]) is not None and store.frame_path(frame_ids[2]) is not None
+        assert len(os.listdir(store.thumbnails_dir)) == 2
+        assert store.thumbnail_bytes == sum(
+            os.path.getsize(os.path.join(store.thumbnails_dir, name)) for name in os.listdir(store.thumbnails_dir)
+        )
+
+    print("清理过期证据帧测试完成\n")
+
+def test_parse_byte_range():
+    """测试Range请求头解析"""
+    print("测试Range解析...")
+
+    assert parse_byte_range(None, 1000) is None
+    assert parse_byte_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_byte_range("bytes=900-", 1000) == (900, 999)
+    assert parse_byte_range("bytes=-100", 1000) == (900, 999)
+    assert parse_byte_range("bytes=500-5000", 1000) == (500, 999)
+    # 多区间不支持，返回完整文件
+    assert parse_byte_range("bytes=0-1,5-6", 1000) is None
+    try:
+        parse_byte_range("bytes=1000-", 1000)
+        assert False, "超出范围应抛出ValueError"
+    except ValueError:
+        pass
+
+    print("Range解析测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试证据帧存储模块...\n")
+
+    test_register_and_thumbnail()
+    test_thumbnail_cache_eviction()
+    test_thumbnail_generated_outside_lock()
+    test_prune_expired_frames()
+    test_parse_byte_range()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧确认测试脚本
+用于测试每帧确认、按帧数和按时间的累计确认以及信用窗口
+"""
+
+import os
+import sys
+import asyncio
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.frame_ack import FrameAcknowledger
+
+def test_per_frame_ack():
+    """测试默认每帧确认，与原确认消息兼容"""
+    print("测试每帧确认...")
+
+    async def run_test():
+        sent = []
+        async def send(message):
+            sent.append(message)
+        acknowledger = FrameAcknowledger(send, window=8)
+        for index in range(3):
+            await acknowledger.frame_processed(timestamp=100 + index)
+        assert [m["status"] for m in sent] == ["frame_processed"] * 3
+        assert [m["timestamp"] for m in sent] == [100, 101, 102]
+        assert [(m["seq"], m["credit"]) for m in sent] == [(1, 9), (2, 10), (3, 11)]
+
+    asyncio.run(run_test())
+
+    print("每帧确认测试完成\n")
+
+def test_cumulative_ack():
+    """测试每N帧累计确认，携带最大序号，空闲时确认剩余帧"""
+    print("测试累计确认...")
+
+    async def run_test():
+        sent = []
+        async def send(message):
+            sent.append(message)
+        acknowledger = FrameAcknowledger(send, mode="count", every_frames=4, interval_ms=50, window=2)
+        assert acknowledger.window == 4
+        acknowledger.start()
+        # 客户端序号可以不连续，确认只带最大序号
+        for seq in [1, 2, 3, 5, 6, 7, 8, 9, 10]:
+            await acknowledger.frame_processed(seq=seq, timestamp=seq * 10)
+        print(f"确认消息: {sent}")
+        assert [(m["seq"], m["frames"]) for m in sent] == [(5, 4), (9, 4)]
+        assert sent[-1]["credit"] == 13
+
+        # 剩余一帧在空闲超时后确认
+        await asyncio.sleep(0.15)
+        assert [(m["seq"], m["frames"]) for m in sent[2:]] == [(10, 1)]
+        await asyncio.sleep(0.1)
+        assert len(sent) == 3
+        await acknowledger.stop()
+
+        # 按时间累计确认
+        sent.clear()
+        acknowledger = FrameAcknowledger(send, mode="interval", interval_ms=50)
+        for _ in range(20):
+            await acknowledger.frame_processed()
+        assert sent == []
+        await asyncio.sleep(0.06)
+        await acknowledger.frame_processed()
+        assert [(m["seq"], m["frames"]) for m in sent] == [(21, 21)]
+
+    asyncio.run(run_test())
+
+    print("累计确认测试完成\n")
+
+def test_invalid_seq():
+    """测试客户端序号无效时回复frame_rejected，不影响确认状态"""
+    print("测试无效序号...")
+
+    async def run_test():
+        sent = []
+        async def send(message):
+            sent.append(message)
+        acknowledger = FrameAcknowledger(send, window=8)
+        assert await acknowledger.frame_processed(seq=3, timestamp=30)
+        for seq in ("abc", [1], {"seq": 1}, float("inf"), float("nan")):
+            assert not await acknowledger.frame_processed(seq=seq, timestamp=40)
+        assert await acknowledger.frame_processed(seq="4", timestamp=50)
+        print(f"确认消息: {sent}")
+        assert [m["status"] for m in sent] == ["frame_processed"] + ["frame_rejected"] * 5 + ["frame_processed"]
+        assert sent[1]["reason"] == "invalid_seq"
+        assert (sent[-1]["seq"], sent[-1]["frames"], sent[-1]["credit"]) == (4, 1, 12)
+
+    asyncio.run(run_test())
+
+    print("无效序号测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试帧确认模块...\n")
+
+    test_per_frame_ack()
+    test_cumulative_ack()
+    test_invalid_seq()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧提取器测试脚本
+用于测试多个检测共用同一个帧提取器并发提取帧
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.frame_extractor import FrameExtractor
+
+FPS = 10
+
+def create_test_video(video_path: str, seconds: int = 10, offset: int = 0):
+    """创建测试视频，每帧的亮度等于帧序号（加偏移），便于校验读到的帧"""
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (64, 48))
+    for frame_idx in range(seconds * FPS):
+        writer.write(np.full((48, 64, 3), offset + frame_idx * 2, dtype=np.uint8))
+    writer.release()
+
+def test_shared_extractor_concurrent():
+    """测试多个线程共用一个帧提取器时读到的帧与顺序提取一致"""
+    print("测试共用帧提取器并发提取...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        video_path = os.path.join(directory, "video.avi")
+        create_test_video(video_path)
+        timestamps = [1.0, 3.0, 5.0, 7.0, 2.0, 6.0]
+
+        extractor = FrameExtractor(video_path)
+        expected = {}
+        for timestamp in timestamps:
+            frames = extractor.extract_frames_around_timestamp(timestamp, 1.0, 1.0, 0.5)
+            expected[timestamp] = [(t, int(cv2.imread(path).mean())) for t, path in frames]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda timestamp: extractor.extract_frames_around_timestamp(timestamp, 1.0, 1.0, 0.5),
+                timestamps
+            ))
+        extractor.release()
+
+        for timestamp, frames in zip(timestamps, results):
+            actual = [(t, int(cv2.imread(path).mean())) for t, path in frames]
+            print(f"时间 {timestamp}: {actual}")
+            assert actual == expected[timestamp]
+            assert len(actual) == 5
+
+    print("共用帧提取器并发提取测试完成\n")
+
+def test_extractors_in_same_directory():
+    """测试同一目录下不同视频的提取器提取相同时间点时不会覆盖对方的帧文件"""
+    print("测试同一目录下的多个帧提取器...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        first_path = os.path.join(directory, "first.avi")
+        second_path = os.path.join(directory, "second.avi")
+        create_test_video(first_path)
+        create_test_video(second_path, offset=50)
+
+        first = FrameExtractor(first_path)
+        second = FrameExtractor(second_path)
+        first_frames = first.extract_frames_around_timestamp(3.0, 1.0, 1.0, 0.5)
+        second_frames = second.extract_frames_around_timestamp(3.0, 1.0, 1.0, 0.5)
+        # 同一提取器重复提取同一时间点也写入新文件
+        repeated_frames = first.extract_frames_around_timestamp(3.0, 1.0, 1.0, 0.5)
+        first.release()
+        second.release()
+
+        first_paths = {path for _, path in first_frames}
+        assert not first_paths & {path for _, path in second_frames}
+        assert not first_paths & {path for _, path in repeated_frames}
+        for (t1, first_frame), (t2, second_frame) in zip(first_frames, second_frames):
+            assert t1 == t2
+            difference = cv2.imread(second_frame).mean() - cv2.imread(first_frame).mean()
+            print(f"时间 {t1}: 亮度差 {difference:.1f}")
+            assert abs(difference - 50) < 3
+
+    print("同一目录下的多个帧提取器测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试帧提取器模块...\n")
+
+    test_shared_extractor_concurrent()
+    test_extractors_in_same_directory()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
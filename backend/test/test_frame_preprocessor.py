@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧预处理测试脚本
+用于测试上传视觉大模型前的裁剪和压缩
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.frame_preprocessor import FramePreprocessor, UploadPreprocessConfig
+
+def create_test_image(path):
+    """创建一张带车号区域的大尺寸测试图像"""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (9, 9), 3)
+    cv2.rectangle(image, (700, 600), (1300, 700), (255, 255, 255), -1)
+    cv2.putText(image, "4512307", (720, 680), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 6)
+    cv2.imwrite(path, image, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+
+def test_roi_crop_reduces_bytes():
+    """测试固定区域裁剪和降分辨率"""
+    print("测试固定区域裁剪...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, "frame.jpg")
+        create_test_image(image_path)
+
+        preprocessor = FramePreprocessor(UploadPreprocessConfig(roi=(0.3, 0.5, 0.4, 0.2), max_side=512))
+        upload = preprocessor.prepare(image_path)
+        print(f"原图 {upload.original_bytes} 字节，上传 {upload.uploaded_bytes} 字节，尺寸 {upload.size}")
+
+        assert not upload.is_original
+        assert upload.crop == (576, 540, 768, 216)
+        assert max(upload.size) <= 512
+        assert upload.uploaded_bytes < upload.original_bytes
+        assert os.path.exists(upload.path)
+
+    print("固定区域裁剪测试完成\n")
+
+def test_region_detection_crop():
+    """测试自动检测车号区域后裁剪"""
+    print("测试自动区域裁剪...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, "frame.jpg")
+        create_test_image(image_path)
+
+        preprocessor = FramePreprocessor()
+        upload = preprocessor.prepare(image_path, region=(700, 600, 600, 100))
+        print(f"裁剪区域: {upload.crop}")
+
+        x, y, w, h = upload.crop
+        assert x <= 700 and y <= 600 and x + w >= 1300 and y + h >= 700
+
+    print("自动区域裁剪测试完成\n")
+
+def test_device_config():
+    """测试按设备读取配置"""
+    print("测试设备配置...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(directory, "upload.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "default": {"max_side": 800},
+                "devices": {
+                    "camera_1": {"roi": [0.1, 0.1, 0.5, 0.5], "jpeg_quality": 60},
+                    "cam": {"jpeg_quality": 50}
+                }
+            }, f)
+
+        preprocessor = FramePreprocessor.from_json_file(config_path)
+        config = preprocessor.get_config("camera_1_1700000000")
+        assert config.roi == (0.1, 0.1, 0.5, 0.5)
+        assert config.jpeg_quality == 60
+        assert config.max_side == 800
+
+        default_config = preprocessor.get_config("camera_2")
+        assert default_config.roi is None
+        assert default_config.max_side == 800
+
+        # 只去掉时间戳后缀，设备名本身带的数字编号不去掉
+        assert preprocessor.get_config("cam_01").jpeg_quality == default_config.jpeg_quality
+        assert preprocessor.get_config("cam_1700000000123").jpeg_quality == 50
+
+    print("设备配置测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试帧预处理模块...\n")
+
+    test_roi_crop_reduces_bytes()
+    test_region_detection_crop()
+    test_device_config()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
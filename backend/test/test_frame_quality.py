@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧质量评分测试脚本
+用于测试候选帧的清晰度、曝光和运动模糊排序
+"""
+
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.frame_quality import FrameQualityScorer, detect_number_region
+
+def create_test_frames(directory):
+    """创建清晰、模糊、欠曝和运动模糊的测试帧"""
+    image = np.full((240, 320), 128, dtype=np.uint8)
+    # 模拟车号：一行高对比度的字符块
+    for i in range(8):
+        x = 60 + i * 25
+        cv2.rectangle(image, (x, 100), (x + 12, 140), 20, -1)
+        cv2.rectangle(image, (x + 3, 108), (x + 9, 132), 235, -1)
+
+    frames = {
+        "sharp": image,
+        "blurred": cv2.GaussianBlur(image, (15, 15), 5),
+        "dark": (image * 0.15).astype(np.uint8),
+        "motion": cv2.filter2D(image, -1, np.ones((1, 21), np.float32) / 21),
+    }
+
+    frame_paths = []
+    for index, (name, frame) in enumerate(frames.items()):
+        path = os.path.join(directory, f"{name}.jpg")
+        cv2.imwrite(path, frame)
+        frame_paths.append((float(index), path))
+    return frame_paths
+
+def test_rank_frames():
+    """测试帧质量排序"""
+    print("测试帧质量排序...")
+
+    scorer = FrameQualityScorer()
+    with tempfile.TemporaryDirectory() as directory:
+        frame_paths = create_test_frames(directory)
+        ranked = scorer.rank_frames(frame_paths)
+
+        for quality in ranked:
+            print(f"  {os.path.basename(quality.frame_path)}: 评分 {quality.score:.3f}, "
+                  f"清晰度 {quality.sharpness:.1f}, 曝光 {quality.exposure:.2f}, 运动 {quality.motion:.2f}")
+
+        names = [os.path.basename(q.frame_path) for q in ranked]
+        assert names[0] == "sharp.jpg", "清晰帧应排在第一位"
+        assert names.index("blurred.jpg") > 0
+        assert names.index("motion.jpg") > 0
+
+    print("帧质量排序测试完成\n")
+
+def test_unreadable_frames_last():
+    """测试不可读的帧排在最后"""
+    print("测试不可读帧...")
+
+    scorer = FrameQualityScorer()
+    with tempfile.TemporaryDirectory() as directory:
+        frame_paths = create_test_frames(directory)
+        frame_paths.insert(0, (99.0, os.path.join(directory, "missing.jpg")))
+        ranked = scorer.rank_frames(frame_paths)
+
+        assert not ranked[-1].readable, "不可读帧应排在最后"
+        assert ranked[-1].frame_path.endswith("missing.jpg")
+
+    print("不可读帧测试完成\n")
+
+def test_region_detector():
+    """测试车号区域检测"""
+    print("测试车号区域检测...")
+
+    scorer = FrameQualityScorer(region_detector=detect_number_region)
+    with tempfile.TemporaryDirectory() as directory:
+        frame_paths = create_test_frames(directory)
+        quality = scorer.score_frame(*frame_paths[0])
+        print(f"检测到的区域: {quality.region}")
+
+        assert quality.region_found, "应检测到车号区域"
+        x, y, w, h = quality.region
+        assert w > h, "车号区域应为横向区域"
+
+    print("车号区域检测测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试帧质量评分模块...\n")
+
+    test_rank_frames()
+    test_unreadable_frames_last()
+    test_region_detector()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
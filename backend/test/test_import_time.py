@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+延迟导入测试脚本
+用于测试导入处理模块时不加载百炼SDK、拼音词典和模型依赖等重量级库
+"""
+
+import os
+import sys
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def imported_modules(statement):
+    """在新的解释器中执行导入语句，返回已加载的顶层模块名集合"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.join(BACKEND_DIR, "src")
+    completed = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print(' '.join(sorted({{name.split('.')[0] for name in sys.modules}})))"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    # 模块导入时可能输出警告，模块名在最后一行
+    return set(completed.stdout.splitlines()[-1].split())
+
+def test_processor_lazy_imports():
+    """测试导入处理模块和关键词检测模块不加载重量级依赖"""
+    print("测试延迟导入...")
+
+    modules = imported_modules(
+        "import camera_surveillance.processor, camera_surveillance.keyword_detector"
+    )
+    assert "camera_surveillance" in modules
+    for heavy in ("dashscope", "pypinyin", "requests", "torch", "ultralytics"):
+        assert heavy not in modules, f"导入时加载了 {heavy}"
+
+    print("延迟导入测试完成\n")
+
+def test_image_libraries_deferred():
+    """测试导入服务启动时加载的模块不加载OpenCV和NumPy"""
+    print("测试延迟导入OpenCV和NumPy...")
+
+    modules = imported_modules(
+        "import camera_surveillance.processor, camera_surveillance.video_processor, "
+        "camera_surveillance.frame_extractor, camera_surveillance.frame_quality, "
+        "camera_surveillance.frame_preprocessor, camera_surveillance.evidence_frames, "
+        "camera_surveillance.result_reporter"
+    )
+    for heavy in ("cv2", "numpy"):
+        assert heavy not in modules, f"导入时加载了 {heavy}"
+
+    print("延迟导入OpenCV和NumPy测试完成\n")
+
+def test_pinyin_loaded_on_use():
+    """测试第一次转换拼音时才导入pypinyin"""
+    print("测试按需导入拼音...")
+
+    from camera_surveillance.keyword_matcher import PINYIN_AVAILABLE
+    if not PINYIN_AVAILABLE:
+        print("未安装pypinyin，跳过")
+        return
+    modules = imported_modules(
+        "from camera_surveillance.keyword_matcher import default_pinyin; assert default_pinyin('车号') == ['che', 'hao']"
+    )
+    assert "pypinyin" in modules
+
+    print("按需导入拼音测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试延迟导入...\n")
+
+    test_processor_lazy_imports()
+    test_image_libraries_deferred()
+    test_pinyin_loaded_on_use()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
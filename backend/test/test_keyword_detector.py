@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式关键词检测测试脚本
+用于测试中间结果增量检测、同一操作合并和重复抑制
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.transcript import TranscriptSegment
+from camera_surveillance.keyword_detector import (
+    KeywordDetector, StreamingKeywordDetector, DetectionHoldQueue, OperationType
+)
+
+def create_segment(begin, text, is_final=True, char_seconds=0.25):
+    """创建逐字带时间戳的转录片段"""
+    sentence = {
+        "begin_time": int(begin * 1000),
+        "end_time": int((begin + len(text) * char_seconds) * 1000) if is_final else None,
+        "text": text,
+        "words": [
+            {"begin_time": int((begin + i * char_seconds) * 1000),
+             "end_time": int((begin + (i + 1) * char_seconds) * 1000), "text": char}
+            for i, char in enumerate(text)
+        ]
+    }
+    return TranscriptSegment.from_sentence(sentence, is_final=is_final)
+
+def test_merge_same_operation():
+    """测试同一句话中同一操作的多个关键词合并为一个检测结果"""
+    print("测试同一操作合并...")
+
+    detector = StreamingKeywordDetector(KeywordDetector())
+    detections = detector.process(create_segment(10.0, "铁鞋设置手闸拧紧"))
+    print(f"检测结果: {detections}")
+
+    assert len(detections) == 1
+    detection = detections[0]
+    assert detection.operation_type == OperationType.ANTI_ROLLING
+    assert detection.text == "铁鞋设置手闸拧紧"
+    assert (detection.segment_start, detection.segment_end) == (10.0, 12.0)
+    assert detection.timestamp == 12.0
+
+    print("同一操作合并测试完成\n")
+
+def test_suppress_repeats_within_window():
+    """测试合并窗口内的重复指令只上报一次"""
+    print("测试重复抑制...")
+
+    detector = StreamingKeywordDetector(KeywordDetector(), merge_window=5.0)
+    assert len(detector.process(create_segment(10.0, "车号确认"))) == 1
+    # 操作员2秒后重复一遍
+    assert detector.process(create_segment(13.0, "车号确认")) == []
+    # 不同操作不受影响
+    assert len(detector.process(create_segment(15.0, "铁鞋设置"))) == 1
+    # 超出窗口后再次上报
+    assert len(detector.process(create_segment(30.0, "车号确认"))) == 1
+    assert detector.suppressed == 1
+
+    print("重复抑制测试完成\n")
+
+def test_partial_results():
+    """测试中间结果中出现关键词即上报，随后的完整句子不再重复上报"""
+    print("测试中间结果检测...")
+
+    detector = StreamingKeywordDetector(KeywordDetector())
+    assert detector.process(create_segment(0.0, "现在进行车号", is_final=False)) == []
+    detections = detector.process(create_segment(0.0, "现在进行车号确认", is_final=False))
+    assert [d.operation_type for d in detections] == [OperationType.VEHICLE_NUMBER]
+    # 只扫描新增部分，跨越新旧边界的关键词仍能匹配
+    assert detector._scan_start(create_segment(0.0, "现在进行车号确认，铁鞋", is_final=False)) > 0
+    assert detector.process(create_segment(0.0, "现在进行车号确认，铁鞋", is_final=False)) == []
+    detections = detector.process(create_segment(0.0, "现在进行车号确认，铁鞋设置"))
+    assert [d.operation_type for d in detections] == [OperationType.ANTI_ROLLING]
+
+    # 关闭中间结果检测时忽略中间结果
+    detector = StreamingKeywordDetector(KeywordDetector(), use_partial=False)
+    assert detector.process(create_segment(0.0, "车号确认", is_final=False)) == []
+    assert len(detector.process(create_segment(0.0, "车号确认"))) == 1
+
+    print("中间结果检测测试完成\n")
+
+def test_hold_until_frame_window_extracted():
+    """测试中间结果产生的检测等到帧窗口的音频提取完成才放行，并按完整句子修正时间范围"""
+    print("测试检测结果等待帧窗口...")
+
+    detector = StreamingKeywordDetector(KeywordDetector())
+    hold_queue = DetectionHoldQueue(after_seconds=4.0)
+
+    # 中间结果中出现关键词，此时只提取到3秒音频
+    partial = create_segment(0.0, "现在进行车号确认", is_final=False)
+    hold_queue.add(partial, detector.process(partial))
+    assert len(hold_queue) == 1
+    assert hold_queue.release(3.0) == []
+
+    # 完整句子的词时间与中间结果不同，按完整句子修正，且不会重复检测
+    final = create_segment(0.0, "现在进行车号确认。", char_seconds=0.3)
+    hold_queue.add(final, detector.process(final))
+    assert len(hold_queue) == 1
+
+    # 帧窗口为关键词之前2秒到之后4秒，水位线越过关键词结束时间+4秒后才放行
+    assert hold_queue.release(6.0) == []
+    detections = hold_queue.release(6.4)
+    print(f"放行的检测结果: {detections}")
+    assert len(detections) == 1
+    detection = detections[0]
+    assert (round(detection.segment_start, 3), round(detection.segment_end, 3)) == (1.2, 2.4)
+    assert detection.timestamp == detection.segment_end
+    assert len(hold_queue) == 0
+
+    # 音频不再增加时全部放行
+    partial = create_segment(20.0, "铁鞋设置", is_final=False)
+    hold_queue.add(partial, detector.process(partial))
+    assert hold_queue.release(21.0) == []
+    assert [d.operation_type for d in hold_queue.flush()] == [OperationType.ANTI_ROLLING]
+
+    print("检测结果等待帧窗口测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试流式关键词检测模块...\n")
+
+    test_merge_same_operation()
+    test_suppress_repeats_within_window()
+    test_partial_results()
+    test_hold_until_frame_window_extracted()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
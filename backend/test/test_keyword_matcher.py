@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+关键词匹配测试脚本
+用于测试Aho–Corasick多模式匹配和关键词表热加载
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.keyword_matcher import AhoCorasickMatcher, FuzzyKeywordMatcher, fuzzy_syllable
+from camera_surveillance.keyword_detector import KeywordDetector, OperationType
+
+def test_automaton_matches():
+    """测试自动机找出所有匹配，包括重叠和大小写不同的匹配"""
+    print("测试多模式匹配...")
+
+    matcher = AhoCorasickMatcher([("he", 1), ("she", 2), ("his", 3), ("hers", 4), ("车号确认", 5)])
+    matches = matcher.find_all("uSHErs，车号确认")
+    print(f"匹配结果: {matches}")
+    assert [(m.start, m.end, m.label) for m in matches] == [(1, 4, 2), (2, 6, 4), (2, 4, 1), (7, 11, 5)]
+    # 返回原文中的文本
+    assert matches[0].keyword == "SHE"
+    assert matcher.find_all("没有关键词") == []
+
+    print("多模式匹配测试完成\n")
+
+def test_detector_maps_operation_type():
+    """测试检测结果对应操作类型和字符区间"""
+    print("测试操作类型映射...")
+
+    detector = KeywordDetector()
+    detections = detector.detect_keywords("铁鞋设置完成，手闸拧紧，现在车号确认")
+    print(f"检测结果: {detections}")
+    assert [d.operation_type for d in detections] == [
+        OperationType.ANTI_ROLLING, OperationType.ANTI_ROLLING, OperationType.VEHICLE_NUMBER
+    ]
+    assert [d.text for d in detections] == ["铁鞋设置", "手闸拧紧", "车号确认"]
+    assert detections[2].span == (14, 18)
+
+    print("操作类型映射测试完成\n")
+
+def test_hot_reload():
+    """测试关键词表文件修改后自动重新加载"""
+    print("测试关键词表热加载...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        table_path = os.path.join(directory, "keywords.json")
+        with open(table_path, "w", encoding="utf-8") as f:
+            json.dump({"VEHICLE_NUMBER": ["车号确认"]}, f, ensure_ascii=False)
+
+        detector = KeywordDetector(keyword_table_path=table_path, reload_interval=0)
+        assert len(detector.detect_keywords("车号对一下")) == 0
+
+        # 修改关键词表，增加方言变体，按操作类型取值作为键
+        with open(table_path, "w", encoding="utf-8") as f:
+            json.dump({"车号确认": ["车号确认", "车号对一下"]}, f, ensure_ascii=False)
+        os.utime(table_path, (1, 1))
+        detections = detector.detect_keywords("车号对一下")
+        assert [d.operation_type for d in detections] == [OperationType.VEHICLE_NUMBER]
+
+        # 文件损坏时保留当前关键词表
+        with open(table_path, "w", encoding="utf-8") as f:
+            f.write("{")
+        os.utime(table_path, (2, 2))
+        assert len(detector.detect_keywords("车号对一下")) == 1
+
+    print("关键词表热加载测试完成\n")
+
+# 测试用的逐字拼音表，避免依赖pypinyin
+TEST_PINYIN = {
+    "车": "che", "号": "hao", "确": "que", "认": "ren", "人": "ren", "好": "hao",
+    "铁": "tie", "鞋": "xie", "设": "she", "置": "zhi", "知": "zhi", "色": "se",
+    "现": "xian", "在": "zai", "进": "jin", "行": "xing", "了": "le", "却": "que",
+}
+
+def fake_pinyin(text):
+    """按测试拼音表逐字转换"""
+    return [TEST_PINYIN.get(char, char) for char in text]
+
+def test_fuzzy_syllable():
+    """测试模糊音归一化"""
+    print("测试模糊音...")
+
+    assert fuzzy_syllable("zhi") == fuzzy_syllable("zi")
+    assert fuzzy_syllable("xing") == fuzzy_syllable("xin")
+    assert fuzzy_syllable("she") == "se"
+    assert fuzzy_syllable("che") != fuzzy_syllable("she")
+
+    print("模糊音测试完成\n")
+
+def test_fuzzy_matches_homophones():
+    """测试同音字、模糊音和错字按编辑距离给出置信度"""
+    print("测试拼音容错匹配...")
+
+    matcher = FuzzyKeywordMatcher(
+        [("车号确认", OperationType.VEHICLE_NUMBER), ("铁鞋设置", OperationType.ANTI_ROLLING)],
+        max_distance=1, pinyin=fake_pinyin
+    )
+
+    # 精确匹配置信度为1.0
+    matches = matcher.find_all("现在进行车号确认了")
+    assert [(m.keyword, m.confidence) for m in matches] == [("车号确认", 1.0)]
+
+    # 同音字：车好确人
+    matches = matcher.find_all("车好确人")
+    print(f"同音字匹配: {matches}")
+    assert len(matches) == 1 and matches[0].label == OperationType.VEHICLE_NUMBER
+    assert matches[0].distance == 0.5 and matches[0].confidence == 0.875
+
+    # 模糊音（平翘舌）比同音字代价大：铁鞋色置
+    matches = matcher.find_all("铁鞋色置")
+    assert matches[0].distance == 0.5
+
+    # 中间夹有标点时返回原文区间
+    matches = matcher.find_all("好，车号确却认")
+    assert matches[0].start == 2 and matches[0].distance == 1.0
+
+    # 差异过大时不匹配
+    assert matcher.find_all("今天天气很好") == []
+
+    print("拼音容错匹配测试完成\n")
+
+def test_detector_confidence_from_distance():
+    """测试检测器置信度来自匹配距离，低于阈值的模糊匹配被过滤"""
+    print("测试检测置信度...")
+
+    detector = KeywordDetector()
+    assert detector.detect_keywords("车号确认")[0].confidence == 1.0
+
+    detector = KeywordDetector(fuzzy=True, min_confidence=0.8)
+    assert [d.confidence for d in detector.detect_keywords("车号确认")] == [1.0]
+    # 4个字的关键词错1个字，置信度0.75，低于阈值
+    assert detector.detect_keywords("车号确定") == []
+    detector.min_confidence = 0.7
+    assert [d.confidence for d in detector.detect_keywords("车号确定")] == [0.75]
+
+    print("检测置信度测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试关键词匹配模块...\n")
+
+    test_automaton_matches()
+    test_detector_maps_operation_type()
+    test_hot_reload()
+    test_fuzzy_syllable()
+    test_fuzzy_matches_homophones()
+    test_detector_confidence_from_distance()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@
 
 import os
 import sys
+import time
 import asyncio
 
 # 添加项目根目录到Python路径
@@ -16,7 +17,7 @@ sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__f
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 # 尝试导入模型和anchor，处理可能的依赖问题
-from camera_surveillance.processor.local_models import AntiRollingModel, RemoveRollingModel
+from camera_surveillance.processor.local_models import AntiRollingModel, RemoveRollingModel, BaseModelInterface, VotingPolicy
 MODELS_AVAILABLE = True
 
 def test_anti_rolling_model():
@@ -177,6 +178,72 @@ def test_model_evaluation_functions():
         traceback.print_exc()
 
 
+class FakeModel(BaseModelInterface):
+    """按图像路径返回预设结果的模拟模型，路径格式为 结果_耗时秒数"""
+    
+    def __init__(self, max_concurrent: int = 2):
+        super().__init__(max_concurrent)
+        self.processed = []
+    
+    def process_image(self, image_path: str):
+        result, delay = image_path.split("_")
+        time.sleep(float(delay))
+        self.processed.append(image_path)
+        return {"T": True, "F": False, "N": None}[result]
+
+
+def test_voting_policy():
+    """测试投票策略的提前判定"""
+    print("测试投票策略...")
+    
+    policy = VotingPolicy(required_true=2)
+    assert policy.decide(2, 3) is True
+    assert policy.decide(1, 1) is None
+    assert policy.decide(1, 0) is False
+    assert VotingPolicy.first_true().decide(0, 0) is False
+    
+    print("投票策略测试完成\n")
+
+
+def test_evaluate_images_early_exit():
+    """测试结论确定后立即返回并取消排队中的任务"""
+    print("测试多帧提前判定...")
+    
+    async def run_test():
+        # 第一帧很快判为True，排队中的帧应被取消
+        model = FakeModel(max_concurrent=2)
+        start_time = time.time()
+        verdict, results = await model.evaluate_images(["T_0.05", "F_0.5", "F_0.5", "F_0.5", "F_0.5"])
+        elapsed = time.time() - start_time
+        print(f"结论: {verdict}，结果: {results}，耗时: {elapsed:.2f}秒")
+        assert verdict is True
+        assert results == [("T_0.05", True)]
+        assert elapsed < 0.4
+        await asyncio.sleep(0.6)
+        # 已经开始的帧继续运行（完成第一帧的线程可能已取走下一帧），其余排队中的帧被取消
+        assert len(model.processed) <= 3
+        
+        # 两帧成功才判定为True，剩余帧不足时提前判定为False
+        model = FakeModel(max_concurrent=4)
+        verdict, results = await model.evaluate_images(
+            ["F_0.01", "N_0.02", "F_0.03", "T_0.5"], VotingPolicy(required_true=2)
+        )
+        assert verdict is False
+        assert len(results) == 3
+        
+        # 结果按完成顺序返回
+        model = FakeModel(max_concurrent=3)
+        order = [path async for path, _ in model.process_images_as_completed(["F_0.2", "T_0.01", "N_0.1"])]
+        assert order == ["T_0.01", "N_0.1", "F_0.2"]
+        
+        verdict, results = await model.evaluate_images([])
+        assert verdict is False and results == []
+    
+    asyncio.run(run_test())
+    
+    print("多帧提前判定测试完成\n")
+
+
 def main():
     """主函数"""
     print("开始测试本地模型模块...\n")
@@ -189,6 +256,8 @@ def main():
     
     # 运行各个测试
     test_model_evaluation_functions()
+    test_voting_policy()
+    test_evaluate_images_early_exit()
     test_anti_rolling_model()
     test_remove_rolling_model()
     
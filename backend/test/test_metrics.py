@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+指标测试脚本
+用于测试计数器、直方图的Prometheus文本格式输出和处理阶段的埋点
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.metrics import MetricsRegistry, KEYWORD_DETECTIONS, _Metric
+from camera_surveillance.keyword_detector import KeywordDetector, StreamingKeywordDetector
+from camera_surveillance.transcript import TranscriptSegment
+
+def test_counter():
+    """测试计数器按标签累加和输出"""
+    print("测试计数器...")
+
+    registry = MetricsRegistry()
+    counter = registry.counter("frames_total", "收到的帧数", ("device_id",))
+    counter.inc(device_id="cam01")
+    counter.inc(2, device_id="cam01")
+    counter.inc(device_id='cam"02')
+    assert counter.value(device_id="cam01") == 3
+    assert counter.value(device_id="cam03") == 0
+
+    text = registry.render()
+    assert "# TYPE frames_total counter" in text
+    assert 'frames_total{device_id="cam01"} 3' in text
+    assert 'frames_total{device_id="cam\\"02"} 1' in text
+
+    for bad_call in (lambda: counter.inc(-1, device_id="cam01"), lambda: counter.inc()):
+        try:
+            bad_call()
+            assert False, "应抛出ValueError"
+        except ValueError:
+            pass
+    try:
+        registry.counter("frames_total", "重复注册")
+        assert False, "应抛出ValueError"
+    except ValueError:
+        pass
+
+    print("计数器测试完成\n")
+
+def test_histogram():
+    """测试直方图的累计分桶、总和与次数"""
+    print("测试直方图...")
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "阶段耗时", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, stage="asr")
+    with histogram.time(stage="ffmpeg"):
+        time.sleep(0.01)
+    assert histogram.count(stage="asr") == 4
+    assert histogram.count(stage="ffmpeg") == 1
+
+    lines = registry.render().splitlines()
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{stage="asr",le="0.1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="asr",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="asr",le="+Inf"} 4' in lines
+    assert 'stage_seconds_sum{stage="asr"} 3.65' in lines
+    assert 'stage_seconds_count{stage="asr"} 4' in lines
+    assert 'stage_seconds_bucket{stage="ffmpeg",le="0.1"} 1' in lines
+
+    print("直方图测试完成\n")
+
+def test_metric_base_is_abstract():
+    """测试指标基类不能直接实例化，子类必须实现样本输出"""
+    print("测试指标基类...")
+
+    class IncompleteMetric(_Metric):
+        metric_type = "gauge"
+
+    for metric_class in (_Metric, IncompleteMetric):
+        try:
+            metric_class("incomplete", "缺少样本输出")
+            assert False, "应抛出TypeError"
+        except TypeError:
+            pass
+
+    print("指标基类测试完成\n")
+
+def test_keyword_detection_metrics():
+    """测试关键词检测埋点只统计上报的检测结果"""
+    print("测试关键词检测埋点...")
+
+    before = KEYWORD_DETECTIONS.value(operation="vehicle_number")
+    detector = StreamingKeywordDetector(KeywordDetector(), merge_window=5.0)
+    detector.process(TranscriptSegment(1.0, 2.0, "现在进行车号确认"))
+    # 合并窗口内的重复检测不计
+    detector.process(TranscriptSegment(3.0, 4.0, "车号确认"))
+    assert KEYWORD_DETECTIONS.value(operation="vehicle_number") == before + 1
+
+    print("关键词检测埋点测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试指标模块...\n")
+
+    test_counter()
+    test_histogram()
+    test_metric_base_is_abstract()
+    test_keyword_detection_metrics()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+就绪状态测试脚本
+用于测试组件预热状态、耗时记录和就绪判定
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.readiness import ReadinessTracker, ComponentUnavailable
+
+def test_component_states():
+    """测试预热成功、依赖不可用和预热失败的组件状态"""
+    print("测试组件状态...")
+
+    def unavailable():
+        raise ComponentUnavailable("未安装依赖")
+
+    def broken():
+        raise RuntimeError("加载失败")
+
+    async def run_test():
+        tracker = ReadinessTracker()
+        for name in ("model", "optional", "ffmpeg"):
+            tracker.register(name)
+        assert not tracker.ready
+        assert tracker.snapshot()["components"]["model"]["status"] == "pending"
+
+        result = await tracker.warm_up("model", lambda: time.sleep(0.02) or "loaded")
+        assert result == "loaded"
+        assert await tracker.warm_up("optional", unavailable) is None
+        tracker.finished = True
+        # 还有组件未预热时不就绪
+        assert not tracker.ready
+
+        assert await tracker.warm_up("ffmpeg", broken) is None
+        snapshot = tracker.snapshot()
+        components = snapshot["components"]
+        assert components["model"]["status"] == "ready" and components["model"]["duration_ms"] >= 20
+        assert components["optional"]["status"] == "unavailable"
+        assert components["ffmpeg"] == {"status": "failed", "duration_ms": components["ffmpeg"]["duration_ms"], "error": "加载失败"}
+        assert snapshot["ready"] is False
+
+    asyncio.run(run_test())
+
+    print("组件状态测试完成\n")
+
+def test_ready_when_finished():
+    """测试所有组件就绪或不可用且预热结束后服务就绪"""
+    print("测试就绪判定...")
+
+    def unavailable():
+        raise ComponentUnavailable("未安装依赖")
+
+    async def run_test():
+        tracker = ReadinessTracker()
+        await tracker.warm_up("model", lambda: None)
+        await tracker.warm_up("optional", unavailable)
+        assert not tracker.ready
+        tracker.finished = True
+        assert tracker.ready and tracker.snapshot()["ready"] is True
+
+    asyncio.run(run_test())
+
+    print("就绪判定测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试就绪状态模块...\n")
+
+    test_component_states()
+    test_ready_when_finished()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结果报告器广播测试脚本
+用于测试每个连接独立的发送队列和慢客户端策略
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.result_reporter import ResultReporter
+
+class FakeWebSocket:
+    """模拟WebSocket连接，可设置发送延迟或发送失败"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed = False
+
+    async def send_text(self, message: str):
+        if self.fail:
+            raise ConnectionError("连接已断开")
+        await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+def test_slow_client_does_not_block():
+    """测试慢客户端不影响其他客户端，失效连接被移除"""
+    print("测试并发广播...")
+
+    async def run_test():
+        reporter = ResultReporter()
+        fast, slow, broken = FakeWebSocket(), FakeWebSocket(delay=0.5), FakeWebSocket(fail=True)
+        for websocket in (fast, slow, broken):
+            reporter.add_websocket_connection(websocket)
+
+        start_time = time.time()
+        for index in range(3):
+            await reporter.report_result({"type": "anti_rolling", "device_id": f"d{index}", "result": "防遛确认"})
+        # 上报不等待发送
+        assert time.time() - start_time < 0.1
+
+        await asyncio.sleep(0.05)
+        assert len(fast.sent) == 3
+        assert json.loads(fast.sent[0])["result"] == "防遛确认"
+        assert broken not in reporter.websocket_connections
+        assert len(slow.sent) == 0
+
+        reporter.remove_websocket_connection(fast)
+        reporter.remove_websocket_connection(slow)
+
+    asyncio.run(run_test())
+
+    print("并发广播测试完成\n")
+
+def test_slow_consumer_policies():
+    """测试发送队列满时的丢弃、合并和断开策略"""
+    print("测试慢客户端策略...")
+
+    async def run_test():
+        # 默认不合并，避免同一设备同类的检测结果被替换
+        assert ResultReporter().slow_consumer_policy == "drop"
+        results = {}
+        for policy in ("drop", "coalesce", "disconnect"):
+            reporter = ResultReporter(max_queue_size=2, slow_consumer_policy=policy)
+            websocket = FakeWebSocket(delay=10.0)
+            reporter.add_websocket_connection(websocket)
+            # 等待发送任务取走第一条消息并阻塞在发送上
+            await reporter.report_result({"type": "vehicle_number", "device_id": "d1", "seq": 0})
+            await asyncio.sleep(0)
+            await reporter.report_result({"type": "vehicle_number", "device_id": "d1", "seq": 1})
+            await reporter.report_result({"type": "anti_rolling", "device_id": "d1", "seq": 2})
+            await reporter.report_result({"type": "vehicle_number", "device_id": "d1", "seq": 3})
+            await asyncio.sleep(0)
+            subscriber = reporter.subscribers.get(websocket)
+            results[policy] = [message for _, message in subscriber.queue] if subscriber else None
+            if subscriber:
+                assert subscriber.dropped == 1
+            reporter.remove_websocket_connection(websocket)
+            if policy == "disconnect":
+                assert websocket.closed
+
+        print(f"各策略队列内容: {results}")
+        assert [json.loads(m)["seq"] for m in results["drop"]] == [1, 2]
+        assert [json.loads(m)["seq"] for m in results["coalesce"]] == [3, 2]
+        assert results["disconnect"] is None
+
+    asyncio.run(run_test())
+
+    print("慢客户端策略测试完成\n")
+
+def test_subscriptions():
+    """测试按设备和结果类型订阅"""
+    print("测试订阅过滤...")
+
+    async def run_test():
+        reporter = ResultReporter()
+        everything, device_a, rolling_b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        for websocket in (everything, device_a, rolling_b):
+            reporter.add_websocket_connection(websocket)
+        reporter.subscribe(device_a, device_ids=["a"])
+        reporter.subscribe(rolling_b, device_ids=["b"], types=["anti_rolling", "remove_rolling"])
+
+        await reporter.report_result({"type": "vehicle_number", "device_id": "a"})
+        await reporter.report_result({"type": "anti_rolling", "device_id": "b"})
+        await reporter.report_result({"type": "vehicle_number", "device_id": "b"})
+        await reporter.report_result({"type": "anti_rolling", "device_id": "c"})
+        await asyncio.sleep(0.01)
+        print(f"各连接收到的消息数: {len(everything.sent)}, {len(device_a.sent)}, {len(rolling_b.sent)}")
+        assert len(everything.sent) == 4
+        assert len(device_a.sent) == 1 and json.loads(device_a.sent[0])["device_id"] == "a"
+        assert len(rolling_b.sent) == 1 and json.loads(rolling_b.sent[0])["type"] == "anti_rolling"
+
+        # 重新订阅替换之前的订阅，空订阅接收全部结果
+        reporter.subscribe(device_a, device_ids=["c"])
+        reporter.subscribe(rolling_b)
+        await reporter.report_result({"type": "anti_rolling", "device_id": "c"})
+        await asyncio.sleep(0.01)
+        assert len(device_a.sent) == 2 and len(rolling_b.sent) == 2
+
+        # 断开连接后索引中不再保留
+        for websocket in (everything, device_a, rolling_b):
+            reporter.remove_websocket_connection(websocket)
+        assert not reporter._by_device and not reporter._any_device and not reporter._any_type
+
+    asyncio.run(run_test())
+
+    print("订阅过滤测试完成\n")
+
+def test_results_use_real_device_id():
+    """测试带时间戳的设备ID统一为真实设备ID，按真实ID订阅和查询能收到各类结果"""
+    print("测试结果使用真实设备ID...")
+
+    import tempfile
+    from camera_surveillance.result_store import ResultStore
+
+    async def run_test(store):
+        reporter = ResultReporter(store=store)
+        websocket = FakeWebSocket()
+        reporter.add_websocket_connection(websocket)
+        reporter.subscribe(websocket, device_ids=["camera01"])
+
+        # 每次连接和上传的设备ID带有不同的时间戳
+        await reporter.report_result(reporter.create_vehicle_number_result("camera01_1700000000123", "1234567", [], 1.0))
+        await reporter.report_result(reporter.create_anti_rolling_result("camera01_1700000000", True, [], 2.0))
+        await reporter.report_result({"type": "error", "device_id": "camera01_1700000999999", "message": "x", "timestamp": 3.0})
+        await reporter.report_result({"type": "error", "device_id": "camera02_1700000000123", "message": "x", "timestamp": 4.0})
+        await asyncio.sleep(0.01)
+
+        messages = [json.loads(message) for message in websocket.sent]
+        print(f"收到的结果: {[(m['type'], m['device_id']) for m in messages]}")
+        assert [m["type"] for m in messages] == ["vehicle_number", "anti_rolling", "error"]
+        assert all(m["device_id"] == "camera01" for m in messages)
+
+        # 用带时间戳的ID订阅等同于按真实ID订阅
+        reporter.subscribe(websocket, device_ids=["camera02_1700000000123"])
+        assert set(reporter._by_device) == {"camera02"}
+        reporter.remove_websocket_connection(websocket)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, "results.db"))
+        asyncio.run(run_test(store))
+        store.flush()
+        results, _ = store.query(device_id="camera01")
+        assert [r["type"] for r in results] == ["vehicle_number", "anti_rolling", "error"]
+        store.close()
+
+    print("结果使用真实设备ID测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试结果报告器广播...\n")
+
+    test_slow_client_does_not_block()
+    test_slow_consumer_policies()
+    test_subscriptions()
+    test_results_use_real_device_id()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
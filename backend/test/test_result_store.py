@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结果存储测试脚本
+用于测试结果的批量写入、分页查询和重连重放
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.result_store import ResultStore
+from camera_surveillance.result_reporter import ResultReporter
+
+class FakeWebSocket:
+    """记录发送消息的模拟WebSocket连接"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, message: str):
+        self.sent.append(message)
+
+def create_result(device_id: str, result_type: str, timestamp: float):
+    """创建测试结果"""
+    return {"type": result_type, "device_id": device_id, "result": "防遛确认", "timestamp": timestamp}
+
+def test_append_and_query():
+    """测试追加、过滤和分页查询，重新打开后序号连续"""
+    print("测试结果存储查询...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "results.db")
+        store = ResultStore(db_path, batch_size=4)
+        seqs = [
+            store.append(create_result(f"cam{i % 2}", "anti_rolling" if i % 3 else "vehicle_number", 100.0 + i))
+            for i in range(10)
+        ]
+        assert seqs == list(range(1, 11))
+        store.flush()
+
+        results, cursor = store.query(device_id="cam0", limit=3)
+        assert [r["seq"] for r in results] == [1, 3, 5]
+        results, cursor = store.query(device_id="cam0", after_seq=cursor, limit=3)
+        assert [r["seq"] for r in results] == [7, 9] and cursor is None
+
+        results, _ = store.query(result_type="vehicle_number", after_seq=1, until_seq=9)
+        assert [r["seq"] for r in results] == [4, 7]
+        assert results[0]["result"] == "防遛确认"
+        store.close()
+
+        store = ResultStore(db_path)
+        assert store.append(create_result("cam0", "anti_rolling", 200.0)) == 11
+        store.close()
+
+    print("结果存储查询测试完成\n")
+
+def test_query_by_report_time():
+    """测试时间范围按上报时间过滤，不受结果中视频相对时间戳的影响"""
+    print("测试按上报时间查询...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, "results.db"))
+        # 视频内的相对时间戳与墙钟时间戳混在一起
+        store.append(create_result("cam0", "anti_rolling", 3.5))
+        store.append(create_result("cam0", "anti_rolling", time.time()))
+        time.sleep(0.01)
+        boundary = time.time()
+        time.sleep(0.01)
+        store.append(create_result("cam0", "anti_rolling", 1.0))
+        store.append(create_result("cam0", "anti_rolling", time.time()))
+        store.flush()
+
+        results, _ = store.query(start_time=boundary)
+        assert [r["seq"] for r in results] == [3, 4]
+        results, _ = store.query(end_time=boundary)
+        assert [r["seq"] for r in results] == [1, 2]
+        plan = store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT seq FROM results WHERE created_at >= ?", (boundary,)
+        ).fetchall()
+        assert any("idx_results_created_at" in str(row) for row in plan)
+        store.close()
+
+    print("按上报时间查询测试完成\n")
+
+def test_prune_expired_results():
+    """测试按保留时长删除过期结果，新结果的序号不受影响"""
+    print("测试清理过期结果...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, "results.db"), flush_interval=0.01)
+        store.append(create_result("cam0", "anti_rolling", 1.0))
+        store.append(create_result("cam0", "anti_rolling", 2.0))
+        store.flush()
+        time.sleep(0.2)
+        store.append(create_result("cam0", "anti_rolling", 3.0))
+        store.flush()
+
+        assert store.prune(0.1) == 2
+        results, _ = store.query()
+        assert [r["seq"] for r in results] == [3]
+        assert store.append(create_result("cam0", "anti_rolling", 4.0)) == 4
+        store.close()
+
+    print("清理过期结果测试完成\n")
+
+def test_replay_since_cursor():
+    """测试重连时按订阅重放错过的结果，历史结果先于新结果发送"""
+    print("测试重连重放...")
+
+    async def run_test():
+        with tempfile.TemporaryDirectory() as directory:
+            store = ResultStore(os.path.join(directory, "results.db"))
+            reporter = ResultReporter(store=store)
+            for i in range(5):
+                await reporter.report_result(create_result(f"cam{i % 2}", "anti_rolling", float(i)))
+
+            websocket = FakeWebSocket()
+            reporter.add_websocket_connection(websocket)
+            reporter.subscribe(websocket, device_ids=["cam0"])
+            replay = asyncio.ensure_future(reporter.replay(websocket, after_seq=1))
+            await asyncio.sleep(0)
+            # 重放期间上报的新结果排在历史结果之后
+            await reporter.report_result(create_result("cam0", "anti_rolling", 9.0))
+            assert await replay == 2
+            await asyncio.sleep(0.05)
+
+            received = [json.loads(message) for message in websocket.sent]
+            print(f"重放后收到的消息: {received}")
+            assert [message["seq"] for message in received] == [3, 5, 6]
+
+            reporter.remove_websocket_connection(websocket)
+            store.close()
+
+    asyncio.run(run_test())
+
+    print("重连重放测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试结果存储模块...\n")
+
+    test_append_and_query()
+    test_query_by_report_time()
+    test_prune_expired_results()
+    test_replay_since_cursor()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+消息序列化测试脚本
+用于测试JSON/MessagePack编码协商和按编码共用序列化结果
+"""
+
+import os
+import sys
+import json
+import asyncio
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.serialization import (
+    MSGPACK_AVAILABLE, JSON_CODEC, dumps_json, loads_json, negotiate_codec
+)
+from camera_surveillance.result_reporter import ResultReporter
+
+class FakeWebSocket:
+    """区分文本和二进制消息的模拟WebSocket连接"""
+
+    def __init__(self):
+        self.text = []
+        self.binary = []
+
+    async def send_text(self, message: str):
+        self.text.append(message)
+
+    async def send_bytes(self, message: bytes):
+        self.binary.append(message)
+
+def test_dumps_json():
+    """测试JSON序列化与标准库结果等价，中文不转义"""
+    print("测试JSON序列化...")
+
+    data = {"type": "anti_rolling", "result": "防遛确认", "frames": ["a", "b"], "timestamp": 1.5, "success": True}
+    encoded = dumps_json(data)
+    assert "防遛确认" in encoded
+    assert json.loads(encoded) == data
+    assert loads_json(encoded) == data
+    # numpy数值可直接序列化
+    assert json.loads(dumps_json({"score": np.float32(0.5), "count": np.int64(3)})) == {"score": 0.5, "count": 3}
+
+    print("JSON序列化测试完成\n")
+
+def test_negotiate_codec():
+    """测试编码协商和编解码往返"""
+    print("测试编码协商...")
+
+    assert negotiate_codec(None) is JSON_CODEC
+    assert negotiate_codec("unknown") is JSON_CODEC
+    codec = negotiate_codec("msgpack")
+    data = {"status": "frame_processed", "timestamp": 12.5}
+    if MSGPACK_AVAILABLE:
+        assert codec.binary and isinstance(codec.encode(data), bytes)
+    assert codec.decode(codec.encode(data)) == data
+    # 文本消息始终按JSON解析
+    assert codec.decode('{"type": "video_frame"}') == {"type": "video_frame"}
+
+    print("编码协商测试完成\n")
+
+def test_reporter_mixed_codecs():
+    """测试不同编码的订阅者分别收到文本和二进制消息"""
+    print("测试混合编码广播...")
+
+    async def run_test():
+        reporter = ResultReporter()
+        json_client, msgpack_client = FakeWebSocket(), FakeWebSocket()
+        reporter.add_websocket_connection(json_client)
+        reporter.add_websocket_connection(msgpack_client, negotiate_codec("msgpack"))
+        result = {"type": "vehicle_number", "device_id": "cam01", "vehicle_number": "4856123"}
+        await reporter.report_result(result)
+        await asyncio.sleep(0.01)
+
+        assert [json.loads(m) for m in json_client.text] == [result]
+        if MSGPACK_AVAILABLE:
+            assert msgpack_client.text == []
+            assert [negotiate_codec("msgpack").decode(m) for m in msgpack_client.binary] == [result]
+        reporter.remove_websocket_connection(json_client)
+        reporter.remove_websocket_connection(msgpack_client)
+
+    asyncio.run(run_test())
+
+    print("混合编码广播测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试消息序列化模块...\n")
+
+    test_dumps_json()
+    test_negotiate_codec()
+    test_reporter_mixed_codecs()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+设备会话管理测试脚本
+用于测试会话复用、并发创建、连接计数和空闲淘汰
+"""
+
+import os
+import sys
+import asyncio
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.session_manager import DeviceSessionManager, real_device_id
+
+class FakePipeline:
+    """记录关闭状态的模拟流水线"""
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.closed = False
+
+def make_manager(idle_timeout=60.0):
+    """创建使用模拟流水线的会话管理器，返回(管理器, 已创建的流水线列表)"""
+    created = []
+
+    async def create_pipeline(device_id):
+        # 模拟加载模型的耗时，期间同一设备的其他请求应等待而不是重复创建
+        await asyncio.sleep(0.01)
+        pipeline = FakePipeline(device_id)
+        created.append(pipeline)
+        return pipeline
+
+    async def close_pipeline(pipeline):
+        pipeline.closed = True
+
+    return DeviceSessionManager(create_pipeline, close_pipeline, idle_timeout=idle_timeout), created
+
+def test_session_reuse():
+    """测试同一设备复用会话，不同设备各自创建"""
+    print("测试会话复用...")
+
+    async def run_test():
+        manager, created = make_manager()
+        first, second, other = await asyncio.gather(
+            manager.acquire("camera_1"), manager.acquire("camera_1"), manager.acquire("camera_2")
+        )
+        assert first is second
+        assert first is not other
+        assert len(created) == 2
+        assert first.connections == 2 and other.connections == 1
+
+        # 断开后重连恢复同一会话
+        manager.release(first)
+        manager.release(second)
+        assert first.connections == 0
+        reconnected = await manager.acquire("camera_1")
+        assert reconnected is first and reconnected.reuse_count == 2
+        assert len(created) == 2
+        await manager.close_all()
+        assert all(pipeline.closed for pipeline in created)
+        assert manager.sessions == {}
+
+    asyncio.run(run_test())
+
+    print("会话复用测试完成\n")
+
+def test_idle_eviction():
+    """测试只淘汰没有连接且空闲超时的会话，淘汰后重新创建"""
+    print("测试空闲淘汰...")
+
+    async def run_test():
+        manager, created = make_manager(idle_timeout=0.05)
+        idle = await manager.acquire("camera_1")
+        busy = await manager.acquire("camera_2")
+        manager.release(idle)
+        assert await manager.evict_idle() == 0
+
+        await asyncio.sleep(0.06)
+        assert await manager.evict_idle() == 1
+        assert idle.pipeline.closed and not busy.pipeline.closed
+        assert list(manager.sessions) == ["camera_2"]
+
+        recreated = await manager.acquire("camera_1")
+        assert recreated is not idle and len(created) == 3
+        await manager.close_all()
+
+    asyncio.run(run_test())
+
+    print("空闲淘汰测试完成\n")
+
+def test_real_device_id():
+    """测试带时间戳的设备ID映射到同一设备，重连时复用会话"""
+    print("测试真实设备ID...")
+
+    assert real_device_id("camera_1") == "camera_1"
+    assert real_device_id("camera_1_1700000000") == "camera_1"
+    assert real_device_id("camera_1_1700000000123") == "camera_1"
+    assert real_device_id("cam_a_b") == "cam_a_b"
+    assert real_device_id("_1700000000") == "_1700000000"
+
+    async def run_test():
+        manager, created = make_manager()
+        first = await manager.acquire(real_device_id("camera_1_1700000000123"))
+        manager.release(first)
+        # 重连时客户端生成新的时间戳
+        second = await manager.acquire(real_device_id("camera_1_1700000005456"))
+        assert second is first and len(created) == 1
+        await manager.close_all()
+
+    asyncio.run(run_test())
+
+    print("真实设备ID测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试设备会话管理模块...\n")
+
+    test_session_reuse()
+    test_idle_eviction()
+    test_real_device_id()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
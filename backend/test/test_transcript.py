@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+转录时间戳测试脚本
+用于测试句子和词的媒体时间解析，以及关键词检测携带的音频片段时间范围
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.transcript import TranscriptSegment
+from camera_surveillance.keyword_detector import KeywordDetector, OperationType
+from camera_surveillance.processor.vad import SpeechSegment, SpeechTimeline
+
+def create_sentence():
+    """创建百炼识别结果格式的句子，时间单位为毫秒"""
+    return {
+        "begin_time": 1000,
+        "end_time": 4000,
+        "text": "现在进行车号确认。",
+        "words": [
+            {"begin_time": 1000, "end_time": 1500, "text": "现在", "punctuation": ""},
+            {"begin_time": 1500, "end_time": 2000, "text": "进行", "punctuation": ""},
+            {"begin_time": 2200, "end_time": 2800, "text": "车号", "punctuation": ""},
+            {"begin_time": 2800, "end_time": 3500, "text": "确认", "punctuation": "。"},
+        ]
+    }
+
+def test_from_sentence():
+    """测试从识别结果解析句子和词的时间"""
+    print("测试句子时间解析...")
+
+    segment = TranscriptSegment.from_sentence(create_sentence(), offset=10.0)
+    print(f"转录片段: {segment}")
+    assert segment.is_final
+    assert (segment.begin, segment.end) == (11.0, 14.0)
+    assert len(segment.words) == 4
+    assert (segment.words[2].begin, segment.words[2].end) == (12.2, 12.8)
+
+    # 中间结果没有句子结束时间，使用最后一个词的结束时间
+    partial = create_sentence()
+    partial["end_time"] = None
+    segment = TranscriptSegment.from_sentence(partial)
+    assert not segment.is_final
+    assert segment.end == 3.5
+
+    print("句子时间解析测试完成\n")
+
+def test_time_range_for_span():
+    """测试按字符区间查找词级时间范围"""
+    print("测试字符区间时间范围...")
+
+    segment = TranscriptSegment.from_sentence(create_sentence())
+    start = segment.text.index("车号确认")
+    assert segment.time_range_for_span(start, start + 4) == (2.2, 3.5)
+
+    # 无词级时间戳时返回整句范围
+    sentence = create_sentence()
+    sentence["words"] = []
+    segment = TranscriptSegment.from_sentence(sentence)
+    assert segment.time_range_for_span(start, start + 4) == (1.0, 4.0)
+
+    print("字符区间时间范围测试完成\n")
+
+def test_map_time_with_speech_timeline():
+    """测试把只含语音片段的音频时间换算回原始音频时间"""
+    print("测试语音时间轴换算...")
+
+    # 语音片段为原始音频的5~7秒和20~22秒，拼接后总长4秒
+    timeline = SpeechTimeline([SpeechSegment(5.0, 7.0), SpeechSegment(20.0, 22.0)])
+    segment = TranscriptSegment.from_sentence({
+        "begin_time": 2000,
+        "end_time": 3500,
+        "text": "车号确认",
+        "words": [{"begin_time": 2000, "end_time": 3500, "text": "车号确认"}]
+    })
+    mapped = segment.map_time(timeline.to_source_time)
+    assert (mapped.begin, mapped.end) == (20.0, 21.5)
+
+    # 恰好落在片段交界处的结束时间属于前一个片段
+    assert timeline.to_source_time(2.0, is_end=True) == 7.0
+    assert timeline.to_source_time(2.0) == 20.0
+
+    print("语音时间轴换算测试完成\n")
+
+def test_keyword_detection_carries_segment_range():
+    """测试关键词检测结果携带关键词所在的音频片段时间范围"""
+    print("测试关键词片段时间范围...")
+
+    detector = KeywordDetector()
+    segment = TranscriptSegment.from_sentence(create_sentence(), offset=10.0)
+    detections = detector.detect_keywords_with_context([segment])
+    print(f"检测结果: {detections}")
+
+    assert len(detections) == 1
+    detection = detections[0]
+    assert detection.operation_type == OperationType.VEHICLE_NUMBER
+    assert (detection.segment_start, detection.segment_end) == (12.2, 13.5)
+    assert detection.timestamp == 13.5
+
+    # 换算为媒体块内时间
+    detection.shift(10.0)
+    assert abs(detection.segment_start - 2.2) < 1e-9 and abs(detection.timestamp - 3.5) < 1e-9
+
+    # 兼容(时间戳, 文本)输入，不带片段时间范围
+    detections = detector.detect_keywords_with_context([(10.5, "现在进行车号确认操作")])
+    assert detections[0].timestamp == 10.5
+    assert detections[0].segment_start is None
+
+    print("关键词片段时间范围测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试转录时间戳模块...\n")
+
+    test_from_sentence()
+    test_time_range_for_span()
+    test_map_time_with_speech_timeline()
+    test_keyword_detection_carries_segment_range()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+转录缓存测试脚本
+用于测试按音频内容缓存转录结果和按大小淘汰
+"""
+
+import os
+import sys
+import wave
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.transcript import TranscriptSegment, WordTiming
+from camera_surveillance.processor import audio_transcriber as audio_transcriber_module
+from camera_surveillance.processor.audio_transcriber import AudioTranscriber
+from camera_surveillance.processor.transcript_cache import TranscriptCache, transcript_cache_key, media_cache_key
+from camera_surveillance.processor.vad import VoiceActivityDetector
+
+class FakeResult:
+    """模拟识别结果"""
+
+    def __init__(self, sentence):
+        self.sentence = sentence
+
+    def get_sentence(self):
+        return self.sentence
+
+class CountingRecognition:
+    """本地替身识别器：停止时输出一句话，并统计被创建的次数"""
+
+    created = 0
+
+    def __init__(self, callback):
+        CountingRecognition.created += 1
+        self.callback = callback
+
+    def start(self):
+        self.callback.on_open()
+
+    def send_audio_frame(self, data):
+        pass
+
+    def stop(self):
+        self.callback.on_event(FakeResult({"begin_time": 200, "end_time": 900, "text": "车号确认"}))
+        self.callback.on_close()
+
+def create_segment(text="车号确认"):
+    """创建测试转录片段"""
+    return TranscriptSegment(1.0, 2.0, text, words=[WordTiming(1.0, 1.5, "车号"), WordTiming(1.5, 2.0, "确认")])
+
+def test_cache_key():
+    """测试缓存键只由PCM内容和识别参数决定"""
+    print("测试缓存键...")
+
+    pcm = b"\x01\x02" * 1000
+    key = transcript_cache_key([pcm], "paraformer-realtime-v2", ["zh", "en"])
+    # 分块方式不影响缓存键
+    assert key == transcript_cache_key([pcm[:500], pcm[500:]], "paraformer-realtime-v2", ["zh", "en"])
+    assert key != transcript_cache_key([pcm], "paraformer-realtime-v2", ["zh"])
+    assert key != transcript_cache_key([pcm], "paraformer-v2", ["zh", "en"])
+    assert key != transcript_cache_key([pcm + b"\x00\x00"], "paraformer-realtime-v2", ["zh", "en"])
+    # 语音活动检测参数不同时，缓存片段的时间换算不同
+    vad_key = transcript_cache_key([pcm], "paraformer-realtime-v2", ["zh", "en"],
+                                   vad_params=VoiceActivityDetector().params())
+    assert vad_key != key
+    assert vad_key != transcript_cache_key([pcm], "paraformer-realtime-v2", ["zh", "en"],
+                                           vad_params=VoiceActivityDetector(padding_ms=400).params())
+
+    print("缓存键测试完成\n")
+
+def test_put_get_and_evict():
+    """测试写入、读取和按大小淘汰"""
+    print("测试缓存读写和淘汰...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscriptCache(os.path.join(directory, "cache.db"), max_bytes=1024 * 1024)
+        assert cache.get("missing") is None
+
+        cache.put("a", [create_segment()])
+        segments = cache.get("a")
+        assert segments == [create_segment()]
+        assert cache.hits == 1 and cache.misses == 1
+
+        # 上限只够放下两条时，淘汰最久未访问的条目
+        entry_size = cache.total_bytes
+        cache.max_bytes = entry_size * 2
+        cache.put("b", [create_segment()])
+        cache.get("a")
+        cache.put("c", [create_segment()])
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.total_bytes <= cache.max_bytes
+        cache.close()
+
+    print("缓存读写和淘汰测试完成\n")
+
+def test_transcriber_uses_cache():
+    """测试相同PCM数据第二次转录不调用语音识别"""
+    print("测试转录器使用缓存...")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscriptCache(os.path.join(directory, "cache.db"))
+        transcriber = AudioTranscriber(use_vad=False, transcript_cache=cache)
+        transcriber.create_recognition = CountingRecognition
+        CountingRecognition.created = 0
+
+        pcm = b"\x00\x00" * 16000
+        first = transcriber.transcribe_pcm(pcm)
+        second = transcriber.transcribe_pcm(pcm)
+        print(f"识别结果: {second}")
+
+        assert CountingRecognition.created == 1
+        assert first == second
+        assert (second[0].begin, second[0].end) == (0.2, 0.9)
+        cache.close()
+
+    print("转录器使用缓存测试完成\n")
+
+def test_speech_processor_cache_key():
+    """测试文件转录的缓存键包含是否做语音活动检测及检测参数"""
+    print("测试文件转录缓存键...")
+
+    from camera_surveillance.processor.speech_processor import SpeechProcessor
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscriptCache(os.path.join(directory, "cache.db"))
+        wav_path = os.path.join(directory, "audio.wav")
+        with wave.open(wav_path, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(16000)
+            wav_file.writeframes(b"\x01\x02" * 16000)
+
+        with_vad = SpeechProcessor(transcript_cache=cache)._cache_key(wav_path)
+        without_vad = SpeechProcessor(use_vad=False, transcript_cache=cache)._cache_key(wav_path)
+        processor = SpeechProcessor(transcript_cache=cache)
+        processor.vad = VoiceActivityDetector(min_silence_ms=800)
+        assert len({with_vad, without_vad, processor._cache_key(wav_path)}) == 3
+        cache.close()
+
+    print("文件转录缓存键测试完成\n")
+
+def test_media_file_cache():
+    """测试媒体文件按文件内容命中缓存，未命中时边解码边识别，命中时不再解码"""
+    print("测试媒体文件缓存...")
+
+    decoded = []
+
+    def fake_stream_pcm_audio(media_path, sample_rate=16000, channels=1, chunk_duration=0.1):
+        decoded.append(media_path)
+        for _ in range(10):
+            yield b"\x00\x00" * 1600
+
+    original = audio_transcriber_module.stream_pcm_audio
+    audio_transcriber_module.stream_pcm_audio = fake_stream_pcm_audio
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            first_path = os.path.join(directory, "first.webm")
+            second_path = os.path.join(directory, "second.webm")
+            for path in (first_path, second_path):
+                with open(path, "wb") as media_file:
+                    media_file.write(b"media" * 1000)
+
+            # 缓存键只与文件内容和识别参数有关，与PCM内容的缓存键不同
+            assert media_cache_key(first_path, "m") == media_cache_key(second_path, "m")
+            assert media_cache_key(first_path, "m") != transcript_cache_key([b"media" * 1000], "m")
+            assert media_cache_key(first_path, "m") != media_cache_key(first_path, "m", vad_params={"a": 1})
+
+            cache = TranscriptCache(os.path.join(directory, "cache.db"))
+            transcriber = AudioTranscriber(use_vad=False, transcript_cache=cache)
+            transcriber.create_recognition = CountingRecognition
+            CountingRecognition.created = 0
+
+            first = transcriber.transcribe_media_file(first_path)
+            second = transcriber.transcribe_media_file(second_path)
+            print(f"识别结果: {second}")
+            assert first == second and len(first) == 1
+            assert CountingRecognition.created == 1
+            assert decoded == [first_path], "命中缓存时不应再解码"
+            cache.close()
+    finally:
+        audio_transcriber_module.stream_pcm_audio = original
+
+    print("媒体文件缓存测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试转录缓存模块...\n")
+
+    test_cache_key()
+    test_put_get_and_evict()
+    test_transcriber_uses_cache()
+    test_speech_processor_cache_key()
+    test_media_file_cache()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+语音活动检测测试脚本
+用于测试静音过滤和时间轴换算
+"""
+
+import os
+import sys
+import wave
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.processor.vad import (
+    VoiceActivityDetector, SpeechSegment, SpeechTimeline, StreamingSpeechGate, slice_pcm, extract_speech_wav
+)
+
+SAMPLE_RATE = 16000
+
+def create_test_samples():
+    """创建测试音频：低噪声背景中在2~3秒和6~7.5秒有两段语音"""
+    rng = np.random.default_rng(0)
+    duration = 10.0
+    samples = rng.normal(0, 30, int(SAMPLE_RATE * duration))
+    t = np.arange(len(samples)) / SAMPLE_RATE
+    for start, end in [(2.0, 3.0), (6.0, 7.5)]:
+        mask = (t >= start) & (t < end)
+        # 带谐波的浊音，模拟语音
+        samples[mask] += 6000 * np.sin(2 * np.pi * 220 * t[mask]) + 2000 * np.sin(2 * np.pi * 660 * t[mask])
+    return samples.astype(np.int16)
+
+def test_detect_speech_segments():
+    """测试语音片段检测"""
+    print("测试语音片段检测...")
+
+    vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE)
+    segments = vad.detect(create_test_samples())
+    print(f"检测到的语音片段: {segments}")
+
+    assert len(segments) == 2
+    assert abs(segments[0].start - 2.0) < 0.3 and abs(segments[0].end - 3.0) < 0.3
+    assert abs(segments[1].start - 6.0) < 0.3 and abs(segments[1].end - 7.5) < 0.3
+
+    # 纯静音不应检测出语音
+    assert vad.detect(np.zeros(SAMPLE_RATE * 3, dtype=np.int16)) == []
+
+    print("语音片段检测测试完成\n")
+
+def test_speech_timeline():
+    """测试拼接后时间换算回原始时间"""
+    print("测试语音时间轴...")
+
+    timeline = SpeechTimeline([SpeechSegment(2.0, 3.0), SpeechSegment(6.0, 7.5)])
+    assert timeline.speech_duration == 2.5
+    assert timeline.to_source_time(0.0) == 2.0
+    assert timeline.to_source_time(0.5) == 2.5
+    assert timeline.to_source_time(1.0) == 6.0
+    assert timeline.to_source_time(2.0) == 7.0
+    # 超出范围时限制在最后一个片段末尾
+    assert timeline.to_source_time(10.0) == 7.5
+
+    print("语音时间轴测试完成\n")
+
+def test_extract_speech_wav():
+    """测试截取语音片段写入WAV文件"""
+    print("测试截取语音WAV...")
+
+    samples = create_test_samples()
+    with tempfile.TemporaryDirectory() as directory:
+        src_path = os.path.join(directory, "audio.wav")
+        dst_path = os.path.join(directory, "speech.wav")
+        with wave.open(src_path, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            wav_file.writeframes(samples.tobytes())
+
+        timeline = extract_speech_wav(src_path, dst_path)
+        with wave.open(dst_path, "rb") as wav_file:
+            speech_duration = wav_file.getnframes() / float(SAMPLE_RATE)
+        print(f"语音时长: {speech_duration:.2f}秒")
+
+        assert abs(speech_duration - timeline.speech_duration) < 0.01
+        assert speech_duration < 5.0, "静音部分应被过滤"
+
+    pcm = slice_pcm(samples.tobytes(), [SpeechSegment(1.0, 1.5)], SAMPLE_RATE)
+    assert len(pcm) == int(0.5 * SAMPLE_RATE) * 2
+
+    print("截取语音WAV测试完成\n")
+
+def test_streaming_speech_gate():
+    """测试流式语音门限只放行语音，并能换算回原始流时间"""
+    print("测试流式语音门限...")
+
+    samples = create_test_samples().tobytes()
+    gate = StreamingSpeechGate(VoiceActivityDetector(sample_rate=SAMPLE_RATE))
+    # 按不对齐帧长的数据块送入
+    passed = b"".join(gate.process(samples[start:start + 3000]) for start in range(0, len(samples), 3000))
+    passed_duration = len(passed) / float(SAMPLE_RATE * 2)
+    print(f"放行时长: {passed_duration:.2f}秒，语音片段: {gate.timeline.segments}")
+
+    assert len(passed) == gate.passed_bytes
+    assert abs(gate.timeline.speech_duration - passed_duration) < 1e-6
+    assert 2.5 <= passed_duration < 7.0, "静音部分应被过滤"
+    assert len(gate.timeline.segments) == 2
+    # 放行音频开头对应第一段语音的开始
+    assert abs(gate.to_source_time(0.0) - 2.0) < 0.3
+    assert abs(gate.timeline.segments[1].start - 6.0) < 0.3
+
+    # 纯静音不放行
+    gate = StreamingSpeechGate(VoiceActivityDetector(sample_rate=SAMPLE_RATE))
+    assert gate.process(b"\x00\x00" * SAMPLE_RATE * 3) == b""
+
+    print("流式语音门限测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试语音活动检测模块...\n")
+
+    test_detect_speech_segments()
+    test_speech_timeline()
+    test_extract_speech_wav()
+    test_streaming_speech_gate()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
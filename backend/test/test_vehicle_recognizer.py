@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+车号识别测试脚本
+用于测试本地识别优先、远程视觉大模型兜底的识别流程
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.processor.vehicle_recognizer import (
+    VehicleNumberBackend, VehicleNumberRecognizer, VLMBackend, ctc_greedy_decode
+)
+
+class StubBackend(VehicleNumberBackend):
+    """返回固定结果的识别后端"""
+
+    def __init__(self, name, text, confidence, remote=False, error=None):
+        self.name = name
+        self.remote = remote
+        self.text = text
+        self.confidence = confidence
+        self.error = error
+        self.calls = 0
+
+    def recognize(self, image_path, device_id=None, region=None):
+        self.calls += 1
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.text, self.confidence
+
+def test_ctc_greedy_decode():
+    """测试CTC贪心解码"""
+    print("测试CTC贪心解码...")
+
+    charset = "0123456789"
+    # 时间步: 4 4 空白 4 5 5 -> "445"
+    steps = [5, 5, 0, 5, 6, 6]
+    output = np.full((1, len(steps), len(charset) + 1), 0.01, dtype=np.float32)
+    for t, index in enumerate(steps):
+        output[0, t, index] = 0.9
+    output = output / output.sum(axis=2, keepdims=True)
+
+    text, confidence = ctc_greedy_decode(output, charset)
+    print(f"解码结果: {text}, 置信度: {confidence:.2f}")
+    assert text == "445"
+    assert 0.8 < confidence <= 1.0
+
+    print("CTC贪心解码测试完成\n")
+
+def test_local_result_skips_remote():
+    """测试本地高置信度结果不调用远程识别"""
+    print("测试本地识别优先...")
+
+    local = StubBackend("local_ocr", "4512307", 0.95)
+    remote = StubBackend("qwen3-vl", "4512307", 1.0, remote=True)
+    recognizer = VehicleNumberRecognizer(local_backend=local, remote_backend=remote,
+                                         confidence_threshold=0.85)
+
+    vehicle_number, attempts = recognizer.recognize_with_attempts("frame.jpg")
+    print(f"识别结果: {vehicle_number}, 尝试记录: {attempts}")
+    assert vehicle_number == "4512307"
+    assert remote.calls == 0
+    assert attempts[0].backend == "local_ocr" and attempts[0].accepted
+    assert attempts[0].elapsed >= 0
+
+    print("本地识别优先测试完成\n")
+
+def test_low_confidence_falls_back_to_remote():
+    """测试本地低置信度时回退到远程识别"""
+    print("测试远程兜底...")
+
+    local = StubBackend("local_ocr", "4512301", 0.4)
+    remote = StubBackend("qwen3-vl", "4512307", 1.0, remote=True)
+    recognizer = VehicleNumberRecognizer(local_backend=local, remote_backend=remote)
+
+    vehicle_number, attempts = recognizer.recognize_with_attempts("frame.jpg")
+    assert vehicle_number == "4512307"
+    assert [a.backend for a in attempts] == ["local_ocr", "qwen3-vl"]
+    assert attempts[1].remote and attempts[1].accepted
+
+    # 远程预算用尽时不调用远程识别
+    vehicle_number, attempts = recognizer.recognize_with_attempts("frame.jpg", allow_remote=False)
+    assert vehicle_number is None
+    assert remote.calls == 1
+
+    print("远程兜底测试完成\n")
+
+def test_remote_error_uses_local_result():
+    """测试远程调用出错时使用本地低置信度结果"""
+    print("测试远程出错...")
+
+    local = StubBackend("local_ocr", "4512301", 0.4)
+    remote = StubBackend("qwen3-vl", None, 0.0, remote=True, error="timeout")
+    recognizer = VehicleNumberRecognizer(local_backend=local, remote_backend=remote)
+
+    vehicle_number = recognizer.recognize_vehicle_number("frame.jpg")
+    assert vehicle_number == "4512301"
+    assert recognizer.last_attempts[1].error == "timeout"
+
+    print("远程出错测试完成\n")
+
+def test_concurrent_upload_stats():
+    """测试多个线程同时识别时上传统计不丢失"""
+    print("测试并发上传统计...")
+
+    backend = VLMBackend()
+    with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+        image_file.write(b"\x00" * 100)
+        image_file.flush()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: backend._prepare_upload(image_file.name, None, None), range(400)))
+
+    print(f"调用次数: {backend.call_count}，上传字节数: {backend.total_uploaded_bytes}")
+    assert backend.call_count == 400
+    assert backend.total_uploaded_bytes == 400 * 100
+
+    print("并发上传统计测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试车号识别模块...\n")
+
+    test_ctc_greedy_decode()
+    test_local_result_skips_remote()
+    test_low_confidence_falls_back_to_remote()
+    test_remote_error_uses_local_result()
+    test_concurrent_upload_stats()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()
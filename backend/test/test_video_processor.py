@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+视频处理器测试脚本
+用于测试实时检测视频的增量音频提取
+"""
+
+import io
+import os
+import sys
+import shutil
+import tempfile
+import wave
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from camera_surveillance.video_processor import IncrementalAudioExtractor
+
+SAMPLE_RATE = 16000
+
+def create_wav_bytes(duration: float = 2.0) -> bytes:
+    """创建44.1kHz双声道静音WAV数据"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(b'\x00\x00' * 2 * int(44100 * duration))
+    return buffer.getvalue()
+
+def test_media_chunks_appended():
+    """测试媒体块按顺序拼接到会话文件，字节水位线随之推进"""
+    print("测试媒体块拼接...")
+
+    data = create_wav_bytes()
+    with tempfile.TemporaryDirectory() as directory:
+        media_path = os.path.join(directory, "session.wav")
+        extractor = IncrementalAudioExtractor(media_path, lambda pcm: None, sample_rate=SAMPLE_RATE)
+        for start in range(0, len(data), 4096):
+            extractor.append(data[start:start + 4096])
+        assert extractor.bytes_received == len(data)
+        extractor.close()
+
+        with open(media_path, 'rb') as media_file:
+            assert media_file.read() == data
+
+    print("媒体块拼接测试完成\n")
+
+def test_incremental_extraction():
+    """测试只解码新到达的数据，时间水位线与输出音频时长一致"""
+    print("测试增量音频提取...")
+
+    if shutil.which('ffmpeg') is None:
+        print("未安装ffmpeg，跳过测试\n")
+        return
+
+    received = []
+    data = create_wav_bytes(duration=2.0)
+    with tempfile.TemporaryDirectory() as directory:
+        media_path = os.path.join(directory, "session.wav")
+        extractor = IncrementalAudioExtractor(media_path, received.append, sample_rate=SAMPLE_RATE)
+        for start in range(0, len(data), 8192):
+            extractor.append(data[start:start + 8192])
+        extractor.close()
+
+    total = sum(len(pcm) for pcm in received)
+    print(f"提取音频时长: {extractor.extracted_duration:.2f}秒")
+    assert total == extractor.pcm_bytes
+    assert abs(extractor.extracted_duration - 2.0) < 0.05
+
+    print("增量音频提取测试完成\n")
+
+def main():
+    """主函数"""
+    print("开始测试视频处理器模块...\n")
+
+    test_media_chunks_appended()
+    test_incremental_extraction()
+
+    print("所有测试完成!")
+
+if __name__ == "__main__":
+    main()